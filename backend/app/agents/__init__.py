@@ -6,6 +6,8 @@ from app.agents.query_understanding import QueryUnderstandingAgent
 from app.agents.product_researcher import ProductResearcherAgent
 from app.agents.price_comparator import PriceComparatorAgent
 from app.agents.conversation_handler import ConversationHandlerAgent
+from app.agents.query_parser import RuleBasedQueryParser
+from app.agents.combined_understanding import CombinedUnderstandingAgent
 
-__all__ = ["QueryUnderstandingAgent", "ProductResearcherAgent", "PriceComparatorAgent", "ConversationHandlerAgent"]
+__all__ = ["QueryUnderstandingAgent", "ProductResearcherAgent", "PriceComparatorAgent", "ConversationHandlerAgent", "RuleBasedQueryParser", "CombinedUnderstandingAgent"]
 
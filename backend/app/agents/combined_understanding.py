@@ -0,0 +1,170 @@
+"""
+Combined Understanding Agent
+Classifies a message (conversational vs product search) AND extracts the structured
+product query in a single LLM call, instead of ConversationHandlerAgent followed by
+QueryUnderstandingAgent.
+"""
+
+from typing import Dict, Any, Optional, Callable
+from app.infrastructure.llm import get_llm_provider, LLMProvider
+from app.agents.conversation_handler import _ResponseFieldStreamer
+
+
+STRUCTURED_QUERY_FIELDS = [
+    "product_type", "category", "max_price", "min_price", "brand", "features",
+    "query_text", "location", "delivery_location", "condition", "style"
+]
+
+
+class CombinedUnderstandingAgent:
+    """Agent that classifies a message and extracts product information in one LLM call."""
+    
+    def __init__(self, llm_provider=None):
+        """Initialize the agent with an LLM provider."""
+        self.llm = llm_provider or get_llm_provider()
+        self.system_prompt = """You are BuyBuddy, a friendly shopping assistant. For each user message (French or English) you do two things in ONE JSON answer:
+1. Classify it: conversational (greeting, small talk, thanks, questions about who you are, what you do or how you help) or product search (the user wants to find, compare or buy a product).
+2. If it is a product search, extract the product query.
+
+Return ONLY valid JSON matching this schema, keys in this order:
+{
+  "is_conversational": boolean,
+  "response": string | null,          // if conversational: short friendly reply in the user's language; else null
+  "product_type": string | null,      // main product category in English ("laptop", "dress", "shoes")
+  "category": string | null,          // subcategory in English ("gaming", "evening", "wireless")
+  "max_price": number | null,         // in euros (1 USD = 0.92 EUR, round to integer)
+  "min_price": number | null,         // in euros (1 USD = 0.92 EUR, round to integer)
+  "brand": string | null,
+  "features": string[],
+  "query_text": string | null,        // optimized search query in English
+  "location": string | null,          // country in lowercase ("canada", "france", "usa", "uk"), several separated by "/" ("canada/usa")
+  "delivery_location": string | null, // city/neighborhood in lowercase ("montreal", "toronto")
+  "condition": string | null,         // "new", "used" or "refurbished" (neuf, occasion, usagé, reconditionné)
+  "style": string | null              // in English ("casual", "formal", "sport", "vintage")
+}
+
+Rules:
+- "aide moi à trouver [product]", "help me find [product]", "je cherche", "trouve moi" are ALWAYS product searches.
+- Any mention of a product, brand, price, or condition means product search.
+- When conversational, every product field is null and features is [].
+- When it is a product search, response is null.
+- If unsure, treat the message as a product search.
+
+Examples:
+- "salut" → {"is_conversational": true, "response": "Salut 👋 Quel produit puis-je t'aider à trouver ?", "product_type": null, "category": null, "max_price": null, "min_price": null, "brand": null, "features": [], "query_text": null, "location": null, "delivery_location": null, "condition": null, "style": null}
+- "what do you do" → {"is_conversational": true, "response": "I'm a shopping assistant: I search the web for products, compare prices and find you the best deals.", "product_type": null, "category": null, "max_price": null, "min_price": null, "brand": null, "features": [], "query_text": null, "location": null, "delivery_location": null, "condition": null, "style": null}
+- "aide moi a trouver une robe de soiree moins de 100 dollar" → {"is_conversational": false, "response": null, "product_type": "dress", "category": "evening", "max_price": 92, "min_price": null, "brand": null, "features": [], "query_text": "evening dress under 100 dollars", "location": null, "delivery_location": null, "condition": null, "style": null}
+- "air force 1 d'occasion livrable à montreal" → {"is_conversational": false, "response": null, "product_type": "shoes", "category": "sneakers", "max_price": null, "min_price": null, "brand": "nike", "features": [], "query_text": "air force 1", "location": "canada", "delivery_location": "montreal", "condition": "used", "style": null}"""
+
+    def analyze(self, user_message: str) -> Dict[str, Any]:
+        """
+        Classify a message and extract the structured query in one LLM call.
+        
+        Args:
+            user_message: User's message
+        
+        Returns:
+            Dictionary with:
+            - is_conversational: bool
+            - response: str | None (response text if conversational)
+            - structured_query: Dict | None (structured query fields if product search)
+        """
+        prompt = self._build_prompt(user_message)
+        
+        try:
+            result = self.llm.generate_json(prompt, system_prompt=self.system_prompt)
+            return self._to_analysis(result, user_message)
+        except Exception as e:
+            # Fallback: product search, understood later by the regular route
+            return self._fallback_analysis()
+    
+    async def aanalyze(self, user_message: str) -> Dict[str, Any]:
+        """
+        Async version of analyze(): does not block the event loop while the LLM answers.
+        
+        Args:
+            user_message: User's message
+        
+        Returns:
+            Dictionary with is_conversational, response and structured_query (same shape as analyze())
+        """
+        prompt = self._build_prompt(user_message)
+        
+        try:
+            result = await self.llm.agenerate_json(prompt, system_prompt=self.system_prompt)
+            return self._to_analysis(result, user_message)
+        except Exception as e:
+            return self._fallback_analysis()
+    
+    async def astream_analysis(self, user_message: str, on_response_delta: Callable[[str], None]) -> Dict[str, Any]:
+        """
+        Analyze a message while streaming the conversational reply
+        (on_response_delta is never called for product searches).
+        
+        Args:
+            user_message: User's message
+            on_response_delta: Callback receiving reply text deltas
+        
+        Returns:
+            Dictionary with is_conversational, response and structured_query (same shape as analyze())
+        """
+        prompt = self._build_prompt(user_message) + "\n\nRespond ONLY with valid JSON, no other text."
+        streamer = _ResponseFieldStreamer()
+        
+        try:
+            async for chunk in self.llm.generate_stream(prompt, system_prompt=self.system_prompt):
+                delta = streamer.feed(chunk)
+                if delta:
+                    on_response_delta(delta)
+            
+            result = LLMProvider._parse_json_response(streamer.buffer)
+            return self._to_analysis(result, user_message)
+        except Exception as e:
+            return self._fallback_analysis()
+    
+    def _build_prompt(self, user_message: str) -> str:
+        """
+        Build the combined prompt for a user message.
+        
+        Args:
+            user_message: User's message
+        
+        Returns:
+            Prompt string
+        """
+        return f"""User message: "{user_message}"
+
+Return the JSON object described in the instructions."""
+
+    def _to_analysis(self, result: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+        """
+        Split the LLM JSON output into the classification and the structured query.
+        
+        Args:
+            result: Parsed JSON returned by the LLM
+            user_message: The user's message (default query_text)
+        
+        Returns:
+            Dictionary with is_conversational, response and structured_query
+        """
+        is_conversational = bool(result.get("is_conversational", False))
+        structured_query: Optional[Dict[str, Any]] = None
+        
+        if not is_conversational and result.get("product_type"):
+            structured_query = {field: result.get(field) for field in STRUCTURED_QUERY_FIELDS}
+            structured_query["features"] = structured_query["features"] or []
+            structured_query["query_text"] = structured_query["query_text"] or user_message
+        
+        return {
+            "is_conversational": is_conversational,
+            "response": result.get("response") if is_conversational else None,
+            "structured_query": structured_query
+        }
+    
+    def _fallback_analysis(self) -> Dict[str, Any]:
+        """Analysis used when the LLM fails: product search without a structured query."""
+        return {
+            "is_conversational": False,
+            "response": None,
+            "structured_query": None
+        }
@@ -4,8 +4,85 @@ Detects if user query is a conversational question and provides appropriate text
 Uses LLM to intelligently determine if query is conversational or a product search.
 """
 
-from typing import Dict, Any, Optional
-from app.infrastructure.llm import get_llm_provider
+import re
+from typing import Dict, Any, Optional, Callable
+from app.infrastructure.llm import get_llm_provider, LLMProvider
+
+
+class _ResponseFieldStreamer:
+    """
+    Incrementally extracts the "response" string from a streamed classification JSON,
+    so a conversational reply can be shown while the LLM is still writing it.
+    """
+    
+    _CONVERSATIONAL_RE = re.compile(r'"is_conversational"\s*:\s*(true|false)')
+    _RESPONSE_START_RE = re.compile(r'"response"\s*:\s*"')
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+    
+    def __init__(self):
+        """Initialize the streamer."""
+        self.buffer = ""
+        self.position = None  # Index of the next unread character of the response string
+        self.finished = False
+    
+    def feed(self, chunk: str) -> str:
+        """
+        Add a chunk of LLM output.
+        
+        Args:
+            chunk: Text chunk from the LLM stream
+        
+        Returns:
+            Newly decoded characters of the response (empty string if none yet)
+        """
+        self.buffer += chunk
+        if self.finished:
+            return ""
+        
+        if self.position is None:
+            # Only stream the reply once we know the message is conversational
+            flag = self._CONVERSATIONAL_RE.search(self.buffer)
+            start = self._RESPONSE_START_RE.search(self.buffer)
+            if not flag or flag.group(1) != "true" or not start:
+                return ""
+            self.position = start.end()
+        
+        decoded = []
+        i = self.position
+        while i < len(self.buffer):
+            char = self.buffer[i]
+            if char == '"':
+                self.finished = True
+                i += 1
+                break
+            if char != "\\":
+                decoded.append(char)
+                i += 1
+                continue
+            
+            # Escape sequence: wait for the rest of it if it is split across chunks
+            if i + 1 >= len(self.buffer):
+                break
+            escape = self.buffer[i + 1]
+            if escape != "u":
+                decoded.append(self._ESCAPES.get(escape, escape))
+                i += 2
+                continue
+            if i + 6 > len(self.buffer):
+                break
+            code = int(self.buffer[i + 2:i + 6], 16)
+            if 0xD800 <= code <= 0xDBFF:
+                # Surrogate pair (emoji): needs the low surrogate too
+                if i + 12 > len(self.buffer):
+                    break
+                low = int(self.buffer[i + 8:i + 12], 16)
+                code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                i += 6
+            decoded.append(chr(code))
+            i += 6
+        
+        self.position = i
+        return "".join(decoded)
 
 
 class ConversationHandlerAgent:
@@ -136,6 +213,93 @@ If unsure, default to: {"is_conversational": false, "response": null}"""
             - is_conversational: bool
             - response: str | None (response text if conversational)
         """
+        prompt = self._build_prompt(user_message)
+        
+        try:
+            result = self.llm.generate_json(prompt, system_prompt=self.system_prompt)
+            
+            return {
+                "is_conversational": result.get("is_conversational", False),
+                "response": result.get("response")
+            }
+        except Exception as e:
+            # Fallback: if LLM fails, assume it's a product search
+            return {
+                "is_conversational": False,
+                "response": None
+            }
+    
+    async def aanalyze_message(self, user_message: str) -> Dict[str, Any]:
+        """
+        Async version of analyze_message(): does not block the event loop while the LLM answers.
+        
+        Args:
+            user_message: User's message
+        
+        Returns:
+            Dictionary with is_conversational and response (same shape as analyze_message())
+        """
+        prompt = self._build_prompt(user_message)
+        
+        try:
+            result = await self.llm.agenerate_json(prompt, system_prompt=self.system_prompt)
+            
+            return {
+                "is_conversational": result.get("is_conversational", False),
+                "response": result.get("response")
+            }
+        except Exception as e:
+            # Fallback: if LLM fails, assume it's a product search
+            return {
+                "is_conversational": False,
+                "response": None
+            }
+    
+    async def astream_analysis(self, user_message: str, on_response_delta: Callable[[str], None]) -> Dict[str, Any]:
+        """
+        Analyze a message while streaming the conversational reply.
+        on_response_delta is called with each new piece of the reply as the LLM generates it
+        (never called for product searches).
+        
+        Args:
+            user_message: User's message
+            on_response_delta: Callback receiving reply text deltas
+        
+        Returns:
+            Dictionary with is_conversational and response (same shape as analyze_message())
+        """
+        prompt = self._build_prompt(user_message) + "\n\nRespond ONLY with valid JSON, no other text."
+        streamer = _ResponseFieldStreamer()
+        
+        try:
+            async for chunk in self.llm.generate_stream(prompt, system_prompt=self.system_prompt):
+                delta = streamer.feed(chunk)
+                if delta:
+                    on_response_delta(delta)
+            
+            result = LLMProvider._parse_json_response(streamer.buffer)
+            
+            return {
+                "is_conversational": result.get("is_conversational", False),
+                "response": result.get("response")
+            }
+        except Exception as e:
+            # Fallback: if LLM fails, assume it's a product search
+            return {
+                "is_conversational": False,
+                "response": None
+            }
+    
+    def _build_prompt(self, user_message: str) -> str:
+        """
+        Build the classification prompt for a user message.
+        
+        Args:
+            user_message: User's message
+        
+        Returns:
+            Prompt string
+        """
         prompt = f"""Analyze the following message and classify it as either conversational or product search.
 
 User message: "{user_message}"
@@ -164,17 +328,4 @@ Follow these steps:
 **CRITICAL**: "aide moi à trouver [product]" or "help me find [product]" = PRODUCT SEARCH, not conversational!
 
 Remember: "how are you" ≠ "what do you do". Understand the exact question being asked!"""
-
-        try:
-            result = self.llm.generate_json(prompt, system_prompt=self.system_prompt)
-            
-            return {
-                "is_conversational": result.get("is_conversational", False),
-                "response": result.get("response")
-            }
-        except Exception as e:
-            # Fallback: if LLM fails, assume it's a product search
-            return {
-                "is_conversational": False,
-                "response": None
-            }
+        return prompt
@@ -1,19 +1,43 @@
 """
 Price Comparator Agent
 Compares prices across different platforms and identifies the best deal.
+Statistics are computed with NumPy over all product lists at once (compare_many),
+so bulk repricing of many cached searches is one vectorized pass, not one Python loop per search.
 """
 
+import numpy as np
 from typing import List, Dict, Optional, Any
 from app.models.schemas import Product
-import re
+from app.models.normalization import get_product_record
+from app.models.clustering import ProductClusterer
+from app.core.config import settings
+
+
+# Percentiles reported in "statistics"
+PERCENTILES = (25, 50, 75, 90)
+
+# Modified z-score scale: 0.6745 * (x - median) / MAD is ~N(0, 1) for normal data
+_MAD_SCALE = 0.6745
+
+# Below this many prices, the median absolute deviation is not meaningful
+_MIN_OUTLIER_SAMPLE = 4
 
 
 class PriceComparatorAgent:
     """Agent that compares prices across products and platforms."""
     
-    def __init__(self):
-        """Initialize the price comparator agent."""
-        pass
+    def __init__(self, clusterer: Optional[ProductClusterer] = None, outlier_threshold: Optional[float] = None):
+        """
+        Initialize the price comparator agent.
+        
+        Args:
+            clusterer: Groups listings of the same item across platforms
+                (default: ProductClusterer(threshold=settings.product_cluster_threshold))
+            outlier_threshold: Modified z-score (log prices) above which a price is an outlier
+                (default: settings.price_outlier_threshold, 0 disables outlier detection)
+        """
+        self.clusterer = clusterer or ProductClusterer(threshold=settings.product_cluster_threshold)
+        self.outlier_threshold = settings.price_outlier_threshold if outlier_threshold is None else outlier_threshold
     
     def compare_prices(self, products: List[Product]) -> Dict[str, Any]:
         """
@@ -25,98 +49,346 @@ class PriceComparatorAgent:
         Returns:
             Dictionary with comparison results:
             {
-                "best_deal": Product with lowest price,
+                "best_deal": Product with lowest price (outliers excluded),
                 "price_comparison": List of products sorted by price,
-                "price_range": {"min": float, "max": float},
+                "price_range": {"min": float, "max": float} (outliers excluded),
+                "statistics": {"count", "mean", "std", "min", "max", "p25", "median", "p75", "p90"},
+                "outliers": Products with an abnormal price (e.g., "$1" accessory listings),
+                "platforms": {platform: {"count", "min", "median", "mean"}},
+                "product_clusters": Best price per item listed on several platforms,
                 "recommendation": str
             }
         """
-        if not products:
-            return {
-                "best_deal": None,
-                "price_comparison": [],
-                "price_range": {"min": None, "max": None},
-                "recommendation": "Aucun produit à comparer."
+        return self.compare_many([products])[0]
+    
+    def compare_many(self, product_lists: List[List[Product]], include_clusters: bool = True) -> List[Dict[str, Any]]:
+        """
+        Compare prices of several product lists (e.g., many cached searches) in one vectorized pass.
+        
+        Args:
+            product_lists: Product lists, compared independently
+            include_clusters: Group listings of the same item (the only per-list Python loop;
+                disable it for bulk repricing)
+        
+        Returns:
+            One comparison dictionary per list (see compare_prices)
+        """
+        # Flatten priced products: prices in euros (parsed at ingest) with their list index
+        priced: List[Product] = []
+        prices: List[float] = []
+        groups: List[int] = []
+        platforms: List[str] = []
+        for group, products in enumerate(product_lists):
+            for product in products:
+                record = get_product_record(product)
+                if record.price_eur:
+                    priced.append(product)
+                    prices.append(record.price_eur)
+                    groups.append(group)
+                    platforms.append(record.platform)
+        
+        batch = self._batch_statistics(
+            np.asarray(prices, dtype=np.float64),
+            np.asarray(groups, dtype=np.int64),
+            platforms,
+            len(product_lists)
+        )
+        
+        results = []
+        for group, products in enumerate(product_lists):
+            if not products:
+                results.append(self._empty_result("Aucun produit à comparer."))
+                continue
+            
+            members = batch["members"][group]
+            if not members.size:
+                result = self._empty_result("Aucun prix disponible pour la comparaison.")
+                result["price_comparison"] = products
+                results.append(result)
+                continue
+            
+            results.append(self._group_result(group, members, priced, batch, include_clusters))
+        
+        return results
+    
+    def _batch_statistics(
+        self,
+        prices: np.ndarray,
+        groups: np.ndarray,
+        platforms: List[str],
+        num_groups: int
+    ) -> Dict[str, Any]:
+        """
+        Compute per-list statistics, outlier flags and per-platform aggregates.
+        
+        Args:
+            prices: Prices in euros of all priced products
+            groups: List index of each price
+            platforms: Canonical platform of each price
+            num_groups: Number of product lists
+        
+        Returns:
+            {"members": [indices sorted by price per list], "prices": prices, "stats": {name: array per list},
+             "outliers": bool array per price, "platforms": [{platform: aggregates} per list]}
+        """
+        # Sort by list, then by price: each list is a contiguous, sorted slice
+        order = np.lexsort((prices, groups))
+        counts = np.bincount(groups, minlength=num_groups)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sorted_prices = prices[order]
+        safe_counts = np.maximum(counts, 1)
+        
+        sums = np.bincount(groups, weights=prices, minlength=num_groups)
+        squares = np.bincount(groups, weights=prices * prices, minlength=num_groups)
+        means = sums / safe_counts
+        stats = {
+            "count": counts,
+            "mean": means,
+            "std": np.sqrt(np.maximum(squares / safe_counts - means * means, 0.0)),
+            "min": self._group_quantiles(sorted_prices, starts, counts, 0.0),
+            "max": self._group_quantiles(sorted_prices, starts, counts, 1.0),
+        }
+        for percentile in PERCENTILES:
+            name = "median" if percentile == 50 else f"p{percentile}"
+            stats[name] = self._group_quantiles(sorted_prices, starts, counts, percentile / 100)
+        
+        return {
+            "members": np.split(order, np.cumsum(counts)[:-1]),
+            "prices": prices,
+            "stats": stats,
+            "outliers": self._flag_outliers(prices, groups, order, starts, counts),
+            "platforms": self._platform_aggregates(prices, groups, platforms, num_groups),
+        }
+    
+    @staticmethod
+    def _group_quantiles(sorted_values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+        """
+        Quantile of each contiguous sorted slice (linear interpolation, like np.percentile).
+        
+        Args:
+            sorted_values: Values sorted within each slice
+            starts: Start offset of each slice
+            counts: Length of each slice
+            q: Quantile (0-1)
+        
+        Returns:
+            Quantile per slice (0 for empty slices)
+        """
+        if not len(sorted_values):
+            return np.zeros(len(counts))
+        position = q * np.maximum(counts - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        last = len(sorted_values) - 1
+        low_values = sorted_values[np.minimum(starts + lower, last)]
+        high_values = sorted_values[np.minimum(starts + upper, last)]
+        quantiles = low_values + (high_values - low_values) * (position - lower)
+        return np.where(counts > 0, quantiles, 0.0)
+    
+    def _flag_outliers(
+        self,
+        prices: np.ndarray,
+        groups: np.ndarray,
+        order: np.ndarray,
+        starts: np.ndarray,
+        counts: np.ndarray
+    ) -> np.ndarray:
+        """
+        Flag abnormal prices with a modified z-score (median / MAD) on log prices.
+        Log prices make "$1" accessories stand out from "$300" listings as much as "$90,000" typos;
+        median and MAD are not dragged by the outliers themselves, unlike mean and standard deviation.
+        
+        Returns:
+            Boolean array, True for outliers (never flagged in lists with fewer than 4 prices)
+        """
+        if not len(prices) or self.outlier_threshold <= 0:
+            return np.zeros(len(prices), dtype=bool)
+        
+        log_prices = np.log(prices)
+        # Log is monotonic: the price order is the log price order
+        medians = self._group_quantiles(log_prices[order], starts, counts, 0.5)
+        deviations = np.abs(log_prices - medians[groups])
+        
+        deviation_order = np.lexsort((deviations, groups))
+        mads = self._group_quantiles(deviations[deviation_order], starts, counts, 0.5)
+        # MAD is 0 when most prices are equal: fall back to the mean absolute deviation
+        mean_deviations = np.bincount(groups, weights=deviations, minlength=len(counts)) / np.maximum(counts, 1)
+        scales = np.where(mads > 0, mads / _MAD_SCALE, mean_deviations * 1.2533)
+        
+        scores = np.divide(
+            deviations,
+            scales[groups],
+            out=np.zeros_like(deviations),
+            where=scales[groups] > 0
+        )
+        return (scores > self.outlier_threshold) & (counts[groups] >= _MIN_OUTLIER_SAMPLE)
+    
+    @staticmethod
+    def _platform_aggregates(
+        prices: np.ndarray,
+        groups: np.ndarray,
+        platforms: List[str],
+        num_groups: int
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Count, min, median and mean price per platform of each list.
+        
+        Returns:
+            [{platform: {"count", "min", "median", "mean"}} per list], platforms sorted by min price
+        """
+        aggregates: List[Dict[str, Dict[str, Any]]] = [{} for _ in range(num_groups)]
+        if not len(prices):
+            return aggregates
+        
+        names, codes = np.unique(np.asarray(platforms, dtype=object), return_inverse=True)
+        keys = groups * len(names) + codes.reshape(-1)
+        num_keys = num_groups * len(names)
+        
+        order = np.lexsort((prices, keys))
+        counts = np.bincount(keys, minlength=num_keys)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.bincount(keys, weights=prices, minlength=num_keys)
+        mins = np.full(num_keys, np.inf)
+        np.minimum.at(mins, keys, prices)
+        medians = PriceComparatorAgent._group_quantiles(prices[order], starts, counts, 0.5)
+        
+        for key in np.flatnonzero(counts).tolist():
+            group, code = divmod(key, len(names))
+            aggregates[group][names[code]] = {
+                "count": int(counts[key]),
+                "min": round(float(mins[key]), 2),
+                "median": round(float(medians[key]), 2),
+                "mean": round(float(sums[key] / counts[key]), 2)
             }
+        return [
+            dict(sorted(platform_aggregates.items(), key=lambda item: item[1]["min"]))
+            for platform_aggregates in aggregates
+        ]
+    
+    def _group_result(
+        self,
+        group: int,
+        members: np.ndarray,
+        priced: List[Product],
+        batch: Dict[str, Any],
+        include_clusters: bool
+    ) -> Dict[str, Any]:
+        """
+        Build the comparison dictionary of one list from the batch statistics.
+        
+        Args:
+            group: List index
+            members: Indices of the list's priced products, sorted by price
+            priced: All priced products
+            batch: Result of _batch_statistics
+            include_clusters: Group listings of the same item
+        
+        Returns:
+            Comparison dictionary (see compare_prices)
+        """
+        indices = members.tolist()
+        member_prices = batch["prices"][members].tolist()
+        outlier_flags = batch["outliers"][members].tolist()
         
-        # Extract prices and sort products
         products_with_prices = []
-        for product in products:
-            price_value = self._extract_price(product.price)
-            if price_value:
-                products_with_prices.append({
-                    "product": product,
-                    "price": price_value
-                })
+        outliers = []
+        for index, price, is_outlier in zip(indices, member_prices, outlier_flags):
+            if is_outlier:
+                outliers.append(priced[index])
+            else:
+                products_with_prices.append({"product": priced[index], "price": price})
         
+        # A very low outlier_threshold may flag every price: compare them all then
         if not products_with_prices:
-            return {
-                "best_deal": None,
-                "price_comparison": products,
-                "price_range": {"min": None, "max": None},
-                "recommendation": "Aucun prix disponible pour la comparaison."
-            }
-        
-        # Sort by price (ascending)
-        products_with_prices.sort(key=lambda x: x["price"])
+            products_with_prices = [{"product": priced[index], "price": price} for index, price in zip(indices, member_prices)]
+            outliers = []
         
-        # Extract best deal
+        # Extract best deal (outliers excluded, e.g. "$1" cases sold as "iPhone 15")
         best_deal = products_with_prices[0]["product"]
         min_price = products_with_prices[0]["price"]
         max_price = products_with_prices[-1]["price"]
         
-        # Build sorted product list
-        sorted_products = [item["product"] for item in products_with_prices]
+        statistics = {
+            name: int(values[group]) if name == "count" else round(float(values[group]), 2)
+            for name, values in batch["stats"].items()
+        }
+        
+        # Same item on several platforms: best price per item
+        product_clusters = self._compare_clusters(products_with_prices) if include_clusters else []
         
         # Generate recommendation
         recommendation = self._generate_recommendation(
-            best_deal, min_price, max_price, len(products_with_prices)
+            best_deal, min_price, max_price, len(products_with_prices), product_clusters
         )
         
         return {
             "best_deal": best_deal,
-            "price_comparison": sorted_products,
+            "price_comparison": [priced[index] for index in indices],
             "price_range": {
                 "min": min_price,
                 "max": max_price
             },
+            "statistics": statistics,
+            "outliers": outliers,
+            "platforms": batch["platforms"][group],
+            "product_clusters": product_clusters,
             "recommendation": recommendation,
-            "total_compared": len(products_with_prices)
+            "total_compared": len(member_prices)
         }
     
-    def _extract_price(self, price_str: Optional[str]) -> Optional[float]:
+    @staticmethod
+    def _empty_result(recommendation: str) -> Dict[str, Any]:
+        """Comparison dictionary of a list without priced products."""
+        return {
+            "best_deal": None,
+            "price_comparison": [],
+            "price_range": {"min": None, "max": None},
+            "statistics": None,
+            "outliers": [],
+            "platforms": {},
+            "product_clusters": [],
+            "recommendation": recommendation
+        }
+    
+    def _compare_clusters(self, products_with_prices: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Extract numeric price from price string.
+        Group priced listings of the same item and find each item's best price.
         
         Args:
-            price_str: Price string (e.g., "$1,299.99", "€1,299.99", "1299.99")
-            
+            products_with_prices: [{"product": Product, "price": float}] sorted by price
+        
         Returns:
-            Numeric price value or None if can't parse
+            One entry per item listed on at least two platforms, most listed first:
+            {"name", "best_deal", "best_price", "max_price", "platforms", "listings"}
         """
-        if not price_str:
-            return None
+        prices = {id(item["product"]): item["price"] for item in products_with_prices}
+        clusters = self.clusterer.cluster([item["product"] for item in products_with_prices])
         
-        try:
-            # Remove currency symbols and common separators
-            cleaned = price_str.replace("€", "").replace("$", "").replace("£", "")
-            cleaned = cleaned.replace(",", "").strip()
-            
-            # Extract first number (handles formats like "$1,299.99" or "1299.99")
-            numbers = re.findall(r'\d+\.?\d*', cleaned)
-            if numbers:
-                return float(numbers[0])
-        except:
-            pass
-        
-        return None
+        comparisons = []
+        for cluster in clusters:
+            platforms = list(dict.fromkeys(get_product_record(product).platform for product in cluster))
+            if len(platforms) < 2:
+                continue
+            # Products come sorted by price: the first listing is the cheapest
+            comparisons.append({
+                "name": cluster[0].name,
+                "best_deal": cluster[0],
+                "best_price": prices[id(cluster[0])],
+                "max_price": prices[id(cluster[-1])],
+                "platforms": platforms,
+                "listings": len(cluster)
+            })
+        
+        comparisons.sort(key=lambda comparison: (-comparison["listings"], comparison["best_price"]))
+        return comparisons
     
     def _generate_recommendation(
         self,
         best_deal: Product,
         min_price: float,
         max_price: float,
-        total_compared: int
+        total_compared: int,
+        product_clusters: Optional[List[Dict[str, Any]]] = None
     ) -> str:
         """
         Generate a human-readable recommendation.
@@ -126,6 +398,7 @@ class PriceComparatorAgent:
             min_price: Minimum price found
             max_price: Maximum price found
             total_compared: Number of products compared
+            product_clusters: Items listed on several platforms (see _compare_clusters)
             
         Returns:
             Recommendation string
@@ -150,6 +423,13 @@ class PriceComparatorAgent:
                     f"Écart de prix : {price_diff:.2f}€ ({price_diff_percent:.1f}% de différence)"
                 )
         
+        if product_clusters:
+            top = product_clusters[0]
+            recommendation_parts.append(
+                f"Même produit sur {len(top['platforms'])} plateformes : meilleur prix {top['best_deal'].price} "
+                f"sur {get_product_record(top['best_deal']).platform} (jusqu'à {top['max_price']:.2f}€ ailleurs)"
+            )
+        
         return " | ".join(recommendation_parts)
 
 
@@ -3,17 +3,36 @@ Product Researcher Agent
 Searches for products based on structured query information.
 """
 
-from typing import List
+from typing import List, Optional
 from app.models.schemas import Product, StructuredQuery
+from app.models.normalization import get_product_record
 from app.infrastructure.external_apis.serperdev_client import SerperDevClient
+from app.infrastructure.product_sources import ProductSearchFanOut
 
 
 class ProductResearcherAgent:
     """Agent that searches for products based on structured query."""
     
-    def __init__(self):
-        """Initialize the product researcher with SerperDev."""
-        self.serper_client = SerperDevClient()
+    def __init__(self, serper_client: Optional[SerperDevClient] = None, product_search: Optional[ProductSearchFanOut] = None):
+        """
+        Initialize the product researcher.
+        
+        Args:
+            serper_client: SerperDev client (country codes, and searches if product_search is None)
+            product_search: Multi-source product search (SerperDev, eBay, Best Buy)
+        """
+        self.serper_client = serper_client or SerperDevClient()
+        self.product_search = product_search
+    
+    @property
+    def _search_client(self):
+        """Client the searches go to: the multi-source search if set, otherwise SerperDev."""
+        return self.product_search or self.serper_client
+    
+    @property
+    def _source_label(self) -> str:
+        """Name of the search backend in error messages."""
+        return "Product" if self.product_search is not None else "SerperDev"
     
     def search(self, structured_query: StructuredQuery, num_results: int = 10) -> List[Product]:
         """
@@ -29,17 +48,45 @@ class ProductResearcherAgent:
         # Build optimized search query (include delivery_location in query if specified)
         search_query = self._build_search_query(structured_query)
         
-        # Search with SerperDev (pass location if specified)
+        # Search with SerperDev and the other product sources (pass location if specified)
         try:
             # Use delivery_location if available, otherwise use location
             search_location = structured_query.delivery_location or structured_query.location
-            products = self.serper_client.search_products(
+            products = self._search_client.search_products(
                 search_query, 
                 num_results=num_results,
                 location=structured_query.location  # Use country-level location for API
             )
         except Exception as e:
-            raise Exception(f"SerperDev search failed: {str(e)}")
+            raise Exception(f"{self._source_label} search failed: {str(e)}")
+        
+        # Filter by price if specified
+        if structured_query.max_price or structured_query.min_price:
+            products = self._filter_by_price(products, structured_query)
+        
+        return products[:num_results]
+    
+    async def asearch(self, structured_query: StructuredQuery, num_results: int = 10) -> List[Product]:
+        """
+        Async version of search(): does not block the event loop while SerperDev answers.
+        
+        Args:
+            structured_query: Structured query with product information
+            num_results: Number of results to return
+        
+        Returns:
+            List of Product objects
+        """
+        search_query = self._build_search_query(structured_query)
+        
+        try:
+            products = await self._search_client.asearch_products(
+                search_query, 
+                num_results=num_results,
+                location=structured_query.location  # Use country-level location for API
+            )
+        except Exception as e:
+            raise Exception(f"{self._source_label} search failed: {str(e)}")
         
         # Filter by price if specified
         if structured_query.max_price or structured_query.min_price:
@@ -112,7 +159,7 @@ class ProductResearcherAgent:
         
         Args:
             products: List of products
-            structured_query: Structured query with price constraints
+            structured_query: Structured query with price constraints (in euros)
             
         Returns:
             Filtered list of products
@@ -120,41 +167,18 @@ class ProductResearcherAgent:
         filtered = []
         
         for product in products:
-            if not product.price:
-                # If no price info, include it (let user decide)
+            price_value = get_product_record(product).price_eur
+            if price_value is None:
+                # No price info or can't parse it: include it (let user decide)
                 filtered.append(product)
                 continue
             
-            # Try to extract numeric price
-            try:
-                import re
-                # Detect currency (dollar or euro)
-                is_dollar = "$" in product.price or "dollar" in product.price.lower()
-                
-                # Remove currency symbols and extract number
-                price_str = product.price.replace("€", "").replace("$", "").replace(",", "").strip()
-                # Extract first number found
-                numbers = re.findall(r'\d+\.?\d*', price_str)
-                if numbers:
-                    price_value = float(numbers[0])
-                    
-                    # Convert dollars to euros if needed (1 USD = 0.92 EUR)
-                    if is_dollar:
-                        price_value = price_value * 0.92
-                    
-                    # Check constraints (all prices now in euros)
-                    if structured_query.max_price and price_value > structured_query.max_price:
-                        continue
-                    if structured_query.min_price and price_value < structured_query.min_price:
-                        continue
-                    
-                    filtered.append(product)
-                else:
-                    # Can't parse price, include it anyway
-                    filtered.append(product)
-            except:
-                # Can't parse price, include it anyway
-                filtered.append(product)
+            # Check constraints (all prices in euros)
+            if structured_query.max_price and price_value > structured_query.max_price:
+                continue
+            if structured_query.min_price and price_value < structured_query.min_price:
+                continue
+            
+            filtered.append(product)
         
         return filtered
-
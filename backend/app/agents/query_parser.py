@@ -0,0 +1,453 @@
+"""
+Rule-Based Query Parser
+Deterministic fast path for simple product queries ("nike shoes under 100 dollars",
+"robe de soirée moins de 80€", "iphone 15 occasion canada"): regexes and small
+lexicons produce a full structured query plus a confidence score, so the LLM is
+only needed for the queries the rules cannot fully explain.
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from app.infrastructure.cache.query_cache import STOPWORDS, fold_text, normalize_numbers
+from app.infrastructure.external_apis.serperdev_client import SerperDevClient
+
+
+USD_TO_EUR = 0.92
+
+# phrase -> (product_type, noun used in query_text)
+PRODUCT_TYPES = {
+    "laptop": ("laptop", "laptop"), "laptops": ("laptop", "laptop"),
+    "ordinateur portable": ("laptop", "laptop"), "pc portable": ("laptop", "laptop"),
+    "notebook": ("laptop", "laptop"),
+    "computer": ("computer", "computer"), "ordinateur": ("computer", "computer"),
+    "pc": ("computer", "computer"), "desktop": ("computer", "desktop computer"),
+    "phone": ("phone", "phone"), "smartphone": ("phone", "smartphone"),
+    "telephone": ("phone", "phone"), "cellulaire": ("phone", "phone"), "cell": ("phone", "phone"),
+    "tablet": ("tablet", "tablet"), "tablette": ("tablet", "tablet"),
+    "dress": ("dress", "dress"), "robe": ("dress", "dress"), "robes": ("dress", "dress"),
+    "shoes": ("shoes", "shoes"), "chaussures": ("shoes", "shoes"), "chaussure": ("shoes", "shoes"),
+    "sneakers": ("shoes", "sneakers"), "baskets": ("shoes", "sneakers"), "espadrilles": ("shoes", "sneakers"),
+    "boots": ("shoes", "boots"), "bottes": ("shoes", "boots"),
+    "headphones": ("headphones", "headphones"), "casque": ("headphones", "headphones"),
+    "ecouteurs": ("headphones", "earbuds"), "earbuds": ("headphones", "earbuds"),
+    "watch": ("watch", "watch"), "montre": ("watch", "watch"), "smartwatch": ("watch", "smartwatch"),
+    "camera": ("camera", "camera"), "appareil photo": ("camera", "camera"),
+    "tv": ("tv", "tv"), "television": ("tv", "tv"), "televiseur": ("tv", "tv"),
+    "monitor": ("monitor", "monitor"), "ecran": ("monitor", "monitor"),
+    "keyboard": ("keyboard", "keyboard"), "clavier": ("keyboard", "keyboard"),
+    "mouse": ("mouse", "mouse"), "souris": ("mouse", "mouse"),
+    "bag": ("bag", "bag"), "sac": ("bag", "bag"), "backpack": ("bag", "backpack"), "sac a dos": ("bag", "backpack"),
+    "jacket": ("jacket", "jacket"), "veste": ("jacket", "jacket"), "manteau": ("jacket", "coat"), "coat": ("jacket", "coat"),
+    "shirt": ("shirt", "shirt"), "chemise": ("shirt", "shirt"), "t shirt": ("shirt", "t-shirt"), "tshirt": ("shirt", "t-shirt"),
+    "pants": ("pants", "pants"), "pantalon": ("pants", "pants"), "jeans": ("pants", "jeans"), "jean": ("pants", "jeans"),
+    "console": ("console", "console"),
+}
+
+# phrase -> (product_type, brand): model names that imply both
+MODEL_KEYWORDS = {
+    "iphone": ("phone", "apple"), "ipad": ("tablet", "apple"), "macbook": ("laptop", "apple"),
+    "airpods": ("headphones", "apple"), "apple watch": ("watch", "apple"),
+    "galaxy": ("phone", "samsung"), "pixel": ("phone", "google"),
+    "air force": ("shoes", "nike"), "air max": ("shoes", "nike"), "jordan": ("shoes", "nike"),
+    "playstation": ("console", "sony"), "ps5": ("console", "sony"), "xbox": ("console", "microsoft"),
+}
+
+# Accessory head nouns: "coque iphone" / "phone case" / "housse pc portable" look for the accessory,
+# not the product they name; the rules cannot tell which is which, so the LLM decides
+ACCESSORY_WORDS = {
+    "coque", "coques", "housse", "housses", "etui", "etuis", "protection", "protege", "film", "verre",
+    "chargeur", "chargeurs", "cable", "cables", "adaptateur", "support", "sacoche", "bracelet", "batterie",
+    "case", "cases", "cover", "covers", "sleeve", "charger", "chargers", "adapter", "protector",
+    "strap", "band", "stand", "mount", "battery", "skin", "holder", "dock",
+}
+
+# Tokens that can follow a model keyword ("iphone 15 pro max", "air force 1")
+MODEL_SUFFIXES = {"pro", "max", "plus", "ultra", "mini", "air", "se", "fe", "series", "slim"}
+
+BRANDS = {
+    "nike", "adidas", "puma", "reebok", "new balance", "asics", "converse", "vans", "zara",
+    "apple", "samsung", "sony", "lg", "dell", "hp", "lenovo", "asus", "acer", "msi",
+    "microsoft", "google", "xiaomi", "huawei", "oneplus", "bose", "jbl", "sennheiser",
+    "canon", "nikon", "logitech", "razer", "nintendo", "garmin", "levis", "gucci",
+}
+
+# phrase -> category (English)
+CATEGORIES = {
+    "gaming": "gaming", "gamer": "gaming", "jeu": "gaming", "jeux": "gaming",
+    "soiree": "evening", "evening": "evening", "cocktail": "evening",
+    "sans fil": "wireless", "wireless": "wireless",
+    "running": "running", "course": "running",
+    "business": "business", "bureau": "office", "office": "office",
+    "mariage": "wedding", "wedding": "wedding",
+}
+
+# phrase -> feature (English)
+FEATURES = {
+    "bluetooth": "bluetooth", "etanche": "waterproof", "waterproof": "waterproof",
+    "4k": "4k", "oled": "oled", "5g": "5g", "ssd": "ssd", "usb c": "usb-c",
+    "reduction de bruit": "noise cancelling", "noise cancelling": "noise cancelling",
+    "rouge": "red", "red": "red", "noir": "black", "noire": "black", "black": "black",
+    "blanc": "white", "blanche": "white", "white": "white", "bleu": "blue", "bleue": "blue", "blue": "blue",
+    "vert": "green", "verte": "green", "green": "green", "rose": "pink", "pink": "pink",
+    "gris": "grey", "grise": "grey", "grey": "grey", "gray": "grey", "beige": "beige",
+    "marron": "brown", "brown": "brown", "jaune": "yellow", "yellow": "yellow",
+    "cuir": "leather", "leather": "leather",
+}
+
+CONDITIONS = {
+    "neuf": "new", "neuve": "new", "new": "new",
+    "occasion": "used", "usage": "used", "usagee": "used", "used": "used",
+    "seconde main": "used", "second hand": "used", "pre owned": "used",
+    "reconditionne": "refurbished", "reconditionnee": "refurbished", "refurbished": "refurbished",
+}
+
+STYLES = {
+    "casual": "casual", "decontracte": "casual", "decontractee": "casual",
+    "formel": "formal", "formelle": "formal", "formal": "formal", "elegant": "formal", "elegante": "formal",
+    "sport": "sport", "sportif": "sport", "sportive": "sport",
+    "vintage": "vintage", "moderne": "modern", "modern": "modern",
+    "classique": "classic", "classic": "classic",
+}
+
+# French names/adjectives for the countries of SerperDevClient.COUNTRY_CODES
+COUNTRY_ALIASES = {
+    "etats unis": "usa", "americain": "usa", "american": "usa",
+    "canadien": "canada", "canadienne": "canada", "canadian": "canada",
+    "royaume uni": "uk", "angleterre": "uk", "allemagne": "germany", "espagne": "spain",
+    "italie": "italy", "japon": "japan", "chine": "china", "inde": "india",
+    "bresil": "brazil", "mexique": "mexico", "australie": "australia",
+}
+
+# city -> country (delivery_location + location)
+CITIES = {
+    "montreal": "canada", "toronto": "canada", "vancouver": "canada", "quebec": "canada",
+    "ottawa": "canada", "calgary": "canada", "laval": "canada",
+    "paris": "france", "lyon": "france", "marseille": "france", "toulouse": "france", "lille": "france",
+    "new york": "usa", "los angeles": "usa", "chicago": "usa", "miami": "usa",
+    "london": "uk", "londres": "uk",
+}
+
+# Availability/delivery words: neutral once a country or city was found
+AVAILABILITY_WORDS = {
+    "available", "disponible", "dispo", "order", "commander", "acheter", "buy",
+    "deliver", "delivery", "livrer", "livraison", "livre", "ship", "shipping", "expedier",
+    "from", "depuis", "vers", "a", "au", "en", "dans", "at",
+}
+
+NEGATIONS = {"sans", "without", "pas", "not", "no", "sauf", "except"}
+
+_NUM = r"(\d+(?:\.\d+)?)"
+_CUR = r"(€|\$|euros?|eur|usd|dollards?|dollars?)"
+_BETWEEN_RE = re.compile(
+    rf"\b(?:entre|between)\s+(\$)?\s*{_NUM}\s*{_CUR}?\s*(?:et|and|a|to|-)\s*(\$)?\s*{_NUM}\s*{_CUR}?"
+)
+_MAX_RE = re.compile(
+    rf"(?:\b(?:under|below|less than|cheaper than|moins de|moins que|sous|max|maximum|jusqu'?a|pas plus de|budget de|budget|up to)|<)\s*(\$)?\s*{_NUM}\s*{_CUR}?"
+)
+_MIN_RE = re.compile(
+    rf"(?:\b(?:over|above|more than|plus de|au moins|min|minimum|a partir de|starting at)|>)\s*(\$)?\s*{_NUM}\s*{_CUR}?"
+)
+_AMOUNT_RE = re.compile(rf"(\$)\s*{_NUM}|{_NUM}\s*{_CUR}")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _build_lexicon() -> Dict[Tuple[str, ...], Tuple[str, Any]]:
+    """Merge all lexicons into phrase tuple -> (kind, value)."""
+    lexicon: Dict[Tuple[str, ...], Tuple[str, Any]] = {}
+    tables = [
+        ("feature", FEATURES), ("category", CATEGORIES), ("condition", CONDITIONS),
+        ("style", STYLES), ("product", PRODUCT_TYPES), ("model", MODEL_KEYWORDS),
+        ("city", {city: (city, country) for city, country in CITIES.items()}),
+        ("country", COUNTRY_ALIASES),
+        ("country", {country: country for country in SerperDevClient.COUNTRY_CODES}),
+        ("brand", {brand: brand for brand in BRANDS}),
+    ]
+    for kind, table in tables:
+        for phrase, value in table.items():
+            lexicon[tuple(_WORD_RE.findall(phrase))] = (kind, value)
+    return lexicon
+
+
+_LEXICON = _build_lexicon()
+_MAX_PHRASE_LEN = max(len(phrase) for phrase in _LEXICON)
+
+
+class RuleBasedQueryParser:
+    """
+    Deterministic query parser (regexes + lexicons).
+    parse() returns a structured query with a confidence score; callers use the
+    LLM when the confidence is below their threshold.
+    """
+    
+    # Confidence penalties (one unexplained word must bring a query below the 0.8 fast path threshold)
+    UNKNOWN_TOKEN_PENALTY = 0.25
+    MULTIPLE_PRODUCTS_PENALTY = 0.3
+    NEGATION_PENALTY = 0.4
+    BARE_AMOUNT_PENALTY = 0.1
+    
+    def __init__(self):
+        """Initialize the parser."""
+        # Statistics
+        self.parsed = 0
+        self.fast_path_hits = 0
+        self.llm_fallbacks = 0
+    
+    def parse(self, user_message: str) -> Tuple[Dict[str, Any], float]:
+        """
+        Parse a user message.
+        
+        Args:
+            user_message: The user's message/query
+        
+        Returns:
+            Tuple of (structured query dictionary, confidence between 0 and 1)
+        """
+        self.parsed += 1
+        text = normalize_numbers(fold_text(user_message))
+        confidence = 1.0
+        
+        # 1. Prices (removed from the text once parsed)
+        prices, text, bare_amount = self._extract_prices(text)
+        if bare_amount:
+            confidence -= self.BARE_AMOUNT_PENALTY
+        
+        # 2. Lexicon matches (longest phrase first)
+        tokens = _WORD_RE.findall(text)
+        found: Dict[str, List[Any]] = {}
+        leftovers: List[str] = []
+        model_phrase: Optional[str] = None
+        i = 0
+        while i < len(tokens):
+            match = self._match_phrase(tokens, i)
+            if match is None:
+                leftovers.append(tokens[i])
+                i += 1
+                continue
+            length, kind, value = match
+            if kind == "model":
+                # Keep the model designation ("iphone 15 pro", "air force 1")
+                end = i + length
+                while end < len(tokens) and (tokens[end].isdigit() or tokens[end] in MODEL_SUFFIXES or re.fullmatch(r"[a-z]?\d+[a-z]?", tokens[end])):
+                    end += 1
+                model_phrase = " ".join(tokens[i:end])
+                length = end - i
+            found.setdefault(kind, []).append(value)
+            i += length
+        
+        # 3. Resolve fields
+        product_type = None
+        noun = None
+        brand = found.get("brand", [None])[0]
+        if "model" in found:
+            product_type, implied_brand = found["model"][0]
+            brand = brand or implied_brand
+        if "product" in found:
+            product_type, noun = found["product"][0]
+            if len({p for p, _ in found["product"]}) > 1:
+                confidence -= self.MULTIPLE_PRODUCTS_PENALTY
+        
+        location = None
+        delivery_location = None
+        if "city" in found:
+            delivery_location = " ".join(city for city, _ in found["city"])
+            location = found["city"][0][1]
+        if "country" in found:
+            # Several countries (e.g., "canada ou usa"): searched together, see SerperDevClient._get_country_codes
+            location = "/".join(dict.fromkeys(found["country"]))
+        
+        # 4. Unexplained words lower the confidence
+        unknown = []
+        for token in leftovers:
+            if token in STOPWORDS:
+                continue
+            if token in AVAILABILITY_WORDS and (location or delivery_location):
+                continue
+            if token in NEGATIONS:
+                confidence -= self.NEGATION_PENALTY
+                continue
+            unknown.append(token)
+        confidence -= self.UNKNOWN_TOKEN_PENALTY * len(unknown)
+        
+        if not product_type or any(token in ACCESSORY_WORDS for token in unknown):
+            confidence = 0.0
+        
+        category = found.get("category", [None])[0]
+        features = list(dict.fromkeys(found.get("feature", [])))
+        
+        structured_query = {
+            "product_type": product_type or "",
+            "category": category,
+            "max_price": prices.get("max_price"),
+            "min_price": prices.get("min_price"),
+            "brand": brand,
+            "features": features,
+            "query_text": self._build_query_text(
+                brand, category, model_phrase, noun or product_type, features + unknown, prices, user_message
+            ),
+            "location": location,
+            "delivery_location": delivery_location,
+            "condition": found.get("condition", [None])[0],
+            "style": found.get("style", [None])[0]
+        }
+        
+        return structured_query, round(max(0.0, min(1.0, confidence)), 2)
+    
+    def record(self, fast_path_hit: bool):
+        """
+        Record whether a parse result was used (fast path) or the LLM was called.
+        
+        Args:
+            fast_path_hit: True if the parse result was confident enough to be used
+        """
+        if fast_path_hit:
+            self.fast_path_hits += 1
+        else:
+            self.llm_fallbacks += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get fast path statistics.
+        
+        Returns:
+            Dictionary with parse count, fast path hits, LLM fallbacks and hit rate
+        """
+        total = self.fast_path_hits + self.llm_fallbacks
+        return {
+            "parsed": self.parsed,
+            "fast_path_hits": self.fast_path_hits,
+            "llm_fallbacks": self.llm_fallbacks,
+            "hit_rate": round(self.fast_path_hits / total, 3) if total else None
+        }
+    
+    def _match_phrase(self, tokens: List[str], start: int) -> Optional[Tuple[int, str, Any]]:
+        """Longest lexicon phrase starting at tokens[start], as (length, kind, value)."""
+        for length in range(min(_MAX_PHRASE_LEN, len(tokens) - start), 0, -1):
+            entry = _LEXICON.get(tuple(tokens[start:start + length]))
+            if entry is not None:
+                return length, entry[0], entry[1]
+        return None
+    
+    def _extract_prices(self, text: str) -> Tuple[Dict[str, Any], str, bool]:
+        """
+        Extract price constraints (converted to euros) and remove them from the text.
+        
+        Args:
+            text: Folded, number-normalized message
+        
+        Returns:
+            Tuple of (prices dict, remaining text, True if a bare amount was read as a maximum)
+        """
+        prices: Dict[str, Any] = {}
+        
+        match = _BETWEEN_RE.search(text)
+        if match:
+            low_dollar, low, low_cur, high_dollar, high, high_cur = match.groups()
+            is_dollar = self._is_dollar(low_dollar or high_dollar, high_cur or low_cur)
+            prices["min_price"] = self._to_euros(float(low), is_dollar)
+            prices["max_price"] = self._to_euros(float(high), is_dollar)
+            prices["display"] = ("between", (float(low), float(high)), is_dollar)
+            return prices, text[:match.start()] + " " + text[match.end():], False
+        
+        for field, regex in (("max_price", _MAX_RE), ("min_price", _MIN_RE)):
+            match = regex.search(text)
+            if match:
+                dollar_sign, amount, currency = match.groups()
+                is_dollar = self._is_dollar(dollar_sign, currency)
+                prices[field] = self._to_euros(float(amount), is_dollar)
+                prices.setdefault("display", ("under" if field == "max_price" else "over", float(amount), is_dollar))
+                text = text[:match.start()] + " " + text[match.end():]
+        if prices:
+            return prices, text, False
+        
+        # "nike shoes 100$": a bare amount with a currency is read as a budget
+        match = _AMOUNT_RE.search(text)
+        if match:
+            dollar_sign, amount_a, amount_b, currency = match.groups()
+            amount = float(amount_a or amount_b)
+            is_dollar = self._is_dollar(dollar_sign, currency)
+            prices["max_price"] = self._to_euros(amount, is_dollar)
+            prices["display"] = ("under", amount, is_dollar)
+            return prices, text[:match.start()] + " " + text[match.end():], True
+        
+        return prices, text, False
+    
+    @staticmethod
+    def _is_dollar(dollar_sign: Optional[str], currency: Optional[str]) -> bool:
+        """True if the amount is in dollars."""
+        return bool(dollar_sign) or (currency or "") in ("$", "usd") or (currency or "").startswith("dollar")
+    
+    @staticmethod
+    def _to_euros(amount: float, is_dollar: bool) -> float:
+        """Convert to euros (1 USD = 0.92 EUR, rounded like the LLM prompt asks)."""
+        if is_dollar:
+            return float(round(amount * USD_TO_EUR))
+        return amount
+    
+    def _build_query_text(
+        self,
+        brand: Optional[str],
+        category: Optional[str],
+        model_phrase: Optional[str],
+        noun: Optional[str],
+        extra_terms: List[str],
+        prices: Dict[str, Any],
+        user_message: str
+    ) -> str:
+        """
+        Build the English search query ("nike shoes under 100 dollars", "iphone 15").
+        
+        Returns:
+            Query text (the original message if nothing was recognized)
+        """
+        parts = []
+        if model_phrase:
+            parts.append(model_phrase)
+        else:
+            if brand:
+                parts.append(brand)
+            if category and (not noun or category not in noun):
+                parts.append(category)
+            if noun:
+                parts.append(noun)
+        parts.extend(extra_terms)
+        
+        if not parts:
+            return user_message
+        
+        display = prices.get("display")
+        if display:
+            kind, amount, is_dollar = display
+            unit = "dollars" if is_dollar else "euros"
+            if kind == "between":
+                parts.append(f"between {amount[0]:g} and {amount[1]:g} {unit}")
+            else:
+                parts.append(f"{kind} {amount:g} {unit}")
+        
+        return " ".join(parts)
+
+
+# Global parser (shared statistics)
+_query_parser: Optional[RuleBasedQueryParser] = None
+
+
+def get_query_parser() -> RuleBasedQueryParser:
+    """
+    Get the shared rule-based parser.
+    
+    Returns:
+        RuleBasedQueryParser instance
+    """
+    global _query_parser
+    if _query_parser is None:
+        _query_parser = RuleBasedQueryParser()
+    return _query_parser
+
+
+def get_query_parser_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get fast path statistics.
+    
+    Returns:
+        Dictionary with statistics, or None if the parser was never used
+    """
+    return _query_parser.stats() if _query_parser is not None else None
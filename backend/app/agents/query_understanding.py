@@ -5,15 +5,17 @@ Extracts structured information from user queries.
 
 from typing import Dict, Any, Optional
 from app.infrastructure.llm import get_llm_provider
+from app.agents.query_parser import RuleBasedQueryParser, get_query_parser
 from app.core.config import settings
 
 
 class QueryUnderstandingAgent:
     """Agent that understands user queries and extracts structured information."""
     
-    def __init__(self, llm_provider=None):
-        """Initialize the agent with an LLM provider."""
+    def __init__(self, llm_provider=None, query_parser: Optional[RuleBasedQueryParser] = None):
+        """Initialize the agent with an LLM provider and the rule-based fast path parser."""
         self.llm = llm_provider or get_llm_provider()
+        self.query_parser = query_parser or get_query_parser()
         self.system_prompt = """You are a shopping assistant that understands user product queries.
 Extract structured information from user messages and return it as JSON.
 
@@ -25,7 +27,7 @@ Key information to extract:
 - brand: Brand name (if mentioned)
 - features: List of important features mentioned
 - query_text: Optimized search query in ENGLISH for product search (translate to English, keep product terms)
-- location: Country or region in lowercase (e.g., "canada", "france", "usa", "uk", "australia") - extract if user mentions a country/region
+- location: Country or region in lowercase (e.g., "canada", "france", "usa", "uk", "australia") - extract if user mentions a country/region; several countries separated by "/" (e.g., "canada/usa") if the user wants more than one market
 - delivery_location: City, neighborhood, or specific delivery address in lowercase (e.g., "montreal", "toronto", "cote-des-neiges", "paris", "new york") - extract if user mentions where they want delivery or where they are located
 - condition: Product condition in English (e.g., "new", "used", "refurbished") - extract if user mentions "neuf", "occasion", "usagé", "reconditionné", "new", "used", "refurbished"
 - style: Product style in English (e.g., "casual", "formal", "sport", "vintage", "modern", "classic") - extract if user mentions style preferences
@@ -60,6 +62,75 @@ Return ONLY valid JSON with these fields. Use null for missing information."""
                 "query_text": str
             }
         """
+        fast_result = self._fast_parse(user_message)
+        if fast_result is not None:
+            return fast_result
+        
+        prompt = self._build_prompt(user_message)
+        
+        try:
+            result = self.llm.generate_json(prompt, system_prompt=self.system_prompt)
+            return self._to_structured_query(result, user_message)
+        except Exception as e:
+            # Fallback: return basic structure with original query
+            return self._fallback_query(user_message)
+    
+    async def aunderstand(self, user_message: str) -> Dict[str, Any]:
+        """
+        Async version of understand(): does not block the event loop while the LLM answers.
+        
+        Args:
+            user_message: The user's message/query
+        
+        Returns:
+            Dictionary with extracted information (same shape as understand())
+        """
+        fast_result = self._fast_parse(user_message)
+        if fast_result is not None:
+            return fast_result
+        
+        prompt = self._build_prompt(user_message)
+        
+        try:
+            result = await self.llm.agenerate_json(prompt, system_prompt=self.system_prompt)
+            return self._to_structured_query(result, user_message)
+        except Exception as e:
+            # Fallback: return basic structure with original query
+            return self._fallback_query(user_message)
+    
+    def _fast_parse(self, user_message: str) -> Optional[Dict[str, Any]]:
+        """
+        Try the rule-based parser (no LLM call).
+        
+        Args:
+            user_message: The user's message/query
+        
+        Returns:
+            Structured query dictionary if the parser is confident enough, None otherwise
+        """
+        if not settings.query_fast_path_enabled:
+            return None
+        
+        try:
+            structured_query, confidence = self.query_parser.parse(user_message)
+        except Exception as e:
+            print(f"Warning: Rule-based query parser failed: {e}")
+            return None
+        
+        fast_path_hit = confidence >= settings.query_fast_path_threshold
+        self.query_parser.record(fast_path_hit)
+        return structured_query if fast_path_hit else None
+    
+    def _build_prompt(self, user_message: str) -> str:
+        """
+        Build the extraction prompt for a user message.
+        
+        Args:
+            user_message: The user's message/query
+        
+        Returns:
+            Prompt string
+        """
         prompt = f"""Analyze this user query and extract product information:
 
 User query: "{user_message}"
@@ -72,7 +143,7 @@ Return JSON with:
 - brand: brand name (null if not mentioned)
 - features: list of features mentioned
 - query_text: optimized search query in ENGLISH for product search (translate to English)
-- location: country or region in lowercase (e.g., "canada", "france", "usa", "uk") - extract if mentioned
+- location: country or region in lowercase (e.g., "canada", "france", "usa", "uk") - extract if mentioned; several countries separated by "/" (e.g., "canada/usa")
 - delivery_location: city, neighborhood, or delivery address in lowercase (e.g., "montreal", "cote-des-neiges", "toronto downtown") - extract if user mentions where they want delivery
 - condition: product condition in ENGLISH (e.g., "new", "used", "refurbished") - extract if mentioned
 - style: product style in ENGLISH (e.g., "casual", "formal", "sport", "vintage") - extract if mentioned
@@ -88,40 +159,57 @@ Examples:
 - "sneakers occasion casual" → product_type: "shoes", category: "sneakers", query_text: "casual sneakers", condition: "used", style: "casual"
 - "laptop gaming reconditionné" → product_type: "laptop", category: "gaming", query_text: "gaming laptop", condition: "refurbished", style: null
 """
-
-        try:
-            result = self.llm.generate_json(prompt, system_prompt=self.system_prompt)
+        return prompt
+    
+    def _to_structured_query(self, result: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+        """
+        Normalize the LLM JSON output into the structured query dictionary.
             
-            # Ensure all required fields exist with defaults
-            structured_query = {
-                "product_type": result.get("product_type", ""),
-                "category": result.get("category"),
-                "max_price": result.get("max_price"),
-                "min_price": result.get("min_price"),
-                "brand": result.get("brand"),
-                "features": result.get("features", []),
-                "query_text": result.get("query_text", user_message),
-                "location": result.get("location"),
-                "delivery_location": result.get("delivery_location"),
-                "condition": result.get("condition"),
-                "style": result.get("style")
-            }
+        Args:
+            result: Parsed JSON returned by the LLM
+            user_message: The user's message/query (default query_text)
             
-            return structured_query
+        Returns:
+            Dictionary with all structured query fields
+        """
+        # Ensure all required fields exist with defaults
+        structured_query = {
+            "product_type": result.get("product_type", ""),
+            "category": result.get("category"),
+            "max_price": result.get("max_price"),
+            "min_price": result.get("min_price"),
+            "brand": result.get("brand"),
+            "features": result.get("features", []),
+            "query_text": result.get("query_text", user_message),
+            "location": result.get("location"),
+            "delivery_location": result.get("delivery_location"),
+            "condition": result.get("condition"),
+            "style": result.get("style")
+        }
             
-        except Exception as e:
-            # Fallback: return basic structure with original query
-            return {
-                "product_type": "",
-                "category": None,
-                "max_price": None,
-                "min_price": None,
-                "brand": None,
-                "features": [],
-                "query_text": user_message,
-                "location": None,
-                "delivery_location": None,
-                "condition": None,
-                "style": None
-            }
+        return structured_query
+    
+    def _fallback_query(self, user_message: str) -> Dict[str, Any]:
+        """
+        Build a basic structured query when the LLM fails.
+        
+        Args:
+            user_message: The user's message/query
+        
+        Returns:
+            Dictionary with all structured query fields
+        """
+        return {
+            "product_type": "",
+            "category": None,
+            "max_price": None,
+            "min_price": None,
+            "brand": None,
+            "features": [],
+            "query_text": user_message,
+            "location": None,
+            "delivery_location": None,
+            "condition": None,
+            "style": None
+        }
 
@@ -3,9 +3,13 @@ Chat endpoint for intelligent product search.
 Uses LangGraph workflow to orchestrate agents.
 """
 
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import ChatRequest, ChatResponse
+import json
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from app.models.schemas import ChatRequest, ChatResponse, ProductMessageResponse
 from app.workflows.shopping_workflow import ShoppingWorkflow
+from app.workflows.product_message_store import product_message_store
 
 router = APIRouter()
 
@@ -27,10 +31,13 @@ async def chat(request: ChatRequest):
     }
     
     Returns structured query information and product results.
+    In background product message mode, product_message is a template and
+    product_message_pending is true: fetch the final message with
+    GET /chat/{session_id}/message/{turn_id}.
     """
     try:
-        # Run the workflow with session_id
-        result = workflow.run(request.message, session_id=request.session_id)
+        # Run the workflow with session_id (async: slow LLM/SerperDev calls don't block other requests)
+        result = await workflow.arun(request.message, session_id=request.session_id)
         
         # Get session_id from result
         session_id = result.get("session_id")
@@ -79,6 +86,8 @@ async def chat(request: ChatRequest):
             price_comparison=result.get("price_comparison"),
             conversational_response=result.get("conversational_response"),
             product_message=result.get("product_message"),
+            turn_id=result.get("turn_id"),
+            product_message_pending=result.get("product_message_pending", False),
             error=None
         )
         
@@ -99,3 +108,78 @@ async def chat(request: ChatRequest):
             error=f"Error processing chat: {str(e)}"
         )
 
+
+def _format_sse(event: str, data) -> str:
+    """
+    Format one Server-Sent Event.
+    
+    Args:
+        event: Event name
+        data: Event payload (JSON-encodable, may contain Pydantic models)
+    
+    Returns:
+        SSE frame
+    """
+    payload = json.dumps(jsonable_encoder(data), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming version of /chat using Server-Sent Events.
+    Each workflow stage is pushed as soon as it completes, so products are
+    shown before the product message is generated.
+    
+    Events (in order): session, conversation_delta* + conversation | structured_query, products,
+    price_comparison, message_delta* + product_message, then done. Delta events carry LLM tokens
+    as they are generated. In background product message mode, product_message carries the
+    template and product_message_final the LLM message. An error event may be sent at any point.
+    
+    Example request:
+    {
+        "message": "Je veux un laptop gaming sous 1500€",
+        "session_id": "optional-session-id"
+    }
+    """
+    async def event_stream():
+        try:
+            async for event, data in workflow.astream(request.message, session_id=request.session_id):
+                yield _format_sse(event, data)
+        except Exception as e:
+            # Headers are already sent: report the error as an event
+            yield _format_sse("error", {"error": f"Error processing chat: {str(e)}"})
+            yield _format_sse("done", {"session_id": request.session_id, "error": str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+        }
+    )
+
+
+@router.get("/chat/{session_id}/message/{turn_id}", response_model=ProductMessageResponse)
+async def get_product_message(
+    session_id: str,
+    turn_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Seconds to wait for the message if it is still pending")
+):
+    """
+    Get the product message generated in the background for a chat turn.
+    
+    Args:
+        session_id: Session ID returned by /chat
+        turn_id: Turn ID returned by /chat
+        wait: Long-poll duration in seconds (0 = return immediately)
+    
+    Returns:
+        Status (pending, ready, failed) and message
+    """
+    entry = await product_message_store.wait(session_id, turn_id, timeout=wait)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Message introuvable pour ce tour de conversation")
+    
+    return ProductMessageResponse(**entry)
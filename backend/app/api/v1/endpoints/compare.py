@@ -0,0 +1,41 @@
+import asyncio
+from fastapi import APIRouter, HTTPException
+from app.models.schemas import CompareRequest, CompareResponse
+from app.agents.price_comparator import PriceComparatorAgent
+
+router = APIRouter()
+
+# Shared comparator (reused across requests)
+comparator = PriceComparatorAgent()
+
+
+@router.post("/compare", response_model=CompareResponse)
+async def compare_prices(request: CompareRequest):
+    """
+    Compare prices of many product lists at once (e.g., offline repricing of cached searches).
+    
+    Example request:
+    {
+        "product_lists": [
+            [
+                {"name": "Sony WH-1000XM5", "price": "$399.99", "link": "https://www.bestbuy.com/...", "platform": "Best Buy"},
+                {"name": "Sony WH-1000XM5 Headphones", "price": "$348.00", "link": "https://www.amazon.com/...", "platform": "Amazon"}
+            ]
+        ],
+        "include_clusters": false
+    }
+    """
+    try:
+        # Statistics are CPU-bound: keep the event loop free
+        results = await asyncio.to_thread(comparator.compare_many, request.product_lists, request.include_clusters)
+        
+        return CompareResponse(
+            results=results,
+            total=len(results)
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error comparing prices: {str(e)}")
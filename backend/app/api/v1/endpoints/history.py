@@ -5,7 +5,7 @@ History endpoint to retrieve conversation and search history.
 from fastapi import APIRouter, Query
 from typing import Optional, List, Dict, Any
 from app.infrastructure.repositories.sqlite_repository import SQLiteRepository
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.models.schemas import Product
 
 router = APIRouter()
@@ -35,7 +35,7 @@ async def get_conversation_history(
         # Get all conversations (we'll group them in frontend)
         # Get more to have enough for grouping
         all_conversations = []
-        with get_db() as conn:
+        with get_read_db() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT * FROM conversations
@@ -50,7 +50,8 @@ async def get_conversation_history(
 @router.get("/history/searches")
 async def get_search_history(
     session_id: Optional[str] = Query(None, description="Session ID to filter searches"),
-    limit: int = Query(50, ge=1, le=100, description="Maximum number of searches to return")
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of searches to return"),
+    q: Optional[str] = Query(None, description="Full-text filter on the query text")
 ) -> List[Dict[str, Any]]:
     """
     Get search history.
@@ -58,11 +59,12 @@ async def get_search_history(
     Args:
         session_id: Optional session ID to filter searches
         limit: Maximum number of searches to return
+        q: Optional full-text filter on the query text (e.g., "casque sony")
         
     Returns:
         List of search dictionaries
     """
-    return repository.get_search_history(session_id, limit)
+    return repository.get_search_history(session_id, limit, text=q)
 
 
 @router.get("/history/conversation/{session_id}/products")
@@ -78,50 +80,7 @@ async def get_conversation_products(
         limit: Maximum number of products to return
         
     Returns:
-        List of product dictionaries with search_query
+        List of product dictionaries with search_query (the session's query that found them) and rank
     """
-    with get_db() as conn:
-        cursor = conn.cursor()
-        # Get searches for this session to get query_texts
-        cursor.execute("""
-            SELECT DISTINCT query_text 
-            FROM searches 
-            WHERE session_id = ?
-        """, (session_id,))
-        search_rows = cursor.fetchall()
-        query_texts = [row["query_text"] for row in search_rows if row["query_text"]]
-        
-        # Get products that match any of the search queries
-        products = []
-        if query_texts:
-            # Build query with multiple LIKE conditions
-            placeholders = ','.join(['?' for _ in query_texts])
-            cursor.execute(f"""
-                SELECT DISTINCT p.* 
-                FROM products p
-                WHERE p.search_query IS NOT NULL
-                AND (
-                    {' OR '.join(['p.search_query LIKE ?' for _ in query_texts])}
-                )
-                ORDER BY p.cached_at DESC
-                LIMIT ?
-            """, [f'%{q}%' for q in query_texts] + [limit])
-            
-            rows = cursor.fetchall()
-            for row in rows:
-                try:
-                    product_dict = {
-                        "name": row["name"],
-                        "description": row["description"] or "",
-                        "price": row["price"],
-                        "link": row["link"],
-                        "platform": row["platform"],
-                        "image": row["image"],
-                        "search_query": row["search_query"]  # Include search_query for matching
-                    }
-                    products.append(product_dict)
-                except Exception as e:
-                    print(f"Warning: Could not parse product: {e}")
-                    continue
-        
-        return products
+    # One indexed join: the session's searches and the products linked to them
+    return repository.get_session_products(session_id, limit)
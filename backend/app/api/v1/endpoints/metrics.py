@@ -0,0 +1,64 @@
+"""
+Metrics endpoint exposing runtime statistics (connection pools, caches, ...).
+"""
+
+import asyncio
+from fastapi import APIRouter
+from typing import Dict, Any
+from app.infrastructure.llm.http_pool import get_pool_stats
+from app.infrastructure.external_apis.serperdev_client import shopping_fill_history
+from app.infrastructure.external_apis.rate_limiter import serper_rate_limiter
+from app.infrastructure.external_apis.search_cache import get_search_cache_stats
+from app.infrastructure.product_sources import get_product_source_stats
+from app.infrastructure.cache.single_flight import single_flight
+from app.workflows.result_pool import session_result_pool
+from app.infrastructure.llm.cache import get_llm_cache_stats
+from app.infrastructure.cache.query_cache import get_query_cache_stats
+from app.agents.query_parser import get_query_parser_stats
+from app.workflows.product_message_store import product_message_store
+from app.core.database import get_db_pool_stats
+from app.infrastructure.repositories.write_behind import persistence_writer
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics() -> Dict[str, Any]:
+    """
+    Runtime metrics for ops.
+    
+    Returns:
+        Dictionary with:
+        - llm_pools: per base URL open connections, requests, new connections and reuse ratio
+          (LLM providers and SerperDev)
+        - serper: concurrent /shopping + /search statistics
+        - serper_rate_limit: token bucket level, credits used/left today, degrade mode,
+          granted/rejected requests per priority and 429s
+        - product_sources: per-source latency, errors and deadline timeouts of the
+          multi-source product search
+        - search_cache: search result cache hits (fresh, stale, negative), misses and refreshes
+        - single_flight: upstream calls and requests collapsed into them, per kind of call
+        - result_pool: products pooled per session for "show me more", hits and prefetches
+        - llm_cache: response cache sizes and per-agent hit/miss counters
+        - query_cache: normalized-query cache hit/miss counters
+        - query_fast_path: rule-based parser hits vs LLM fallbacks
+        - product_messages: background product message generation
+        - database: SQLite journal mode and read-write/read-only connection pools
+          (checkouts, connections opened, reuse ratio, waits)
+        - persistence: write-behind queue depth, group commit batches and commit latency
+    """
+    return {
+        "llm_pools": get_pool_stats(),
+        "serper": shopping_fill_history.stats(),
+        "serper_rate_limit": serper_rate_limiter.stats(),
+        "product_sources": get_product_source_stats(),
+        "search_cache": get_search_cache_stats(),
+        "single_flight": single_flight.stats(),
+        "result_pool": session_result_pool.stats(),
+        "llm_cache": get_llm_cache_stats(),
+        "query_cache": get_query_cache_stats(),
+        "query_fast_path": get_query_parser_stats(),
+        "product_messages": product_message_store.stats(),
+        "database": await asyncio.to_thread(get_db_pool_stats),
+        "persistence": persistence_writer.stats()
+    }
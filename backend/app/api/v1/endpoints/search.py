@@ -1,9 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from app.models.schemas import SearchRequest, SearchResponse
 from app.infrastructure.external_apis.serperdev_client import SerperDevClient
+from app.infrastructure.external_apis.search_cache import with_search_cache
 
 router = APIRouter()
 
+# Shared client (reused across requests)
+client = with_search_cache(SerperDevClient())
+
 
 @router.post("/search", response_model=SearchResponse)
 async def search_products(request: SearchRequest):
@@ -16,8 +20,7 @@ async def search_products(request: SearchRequest):
     }
     """
     try:
-        client = SerperDevClient()
-        products = client.search_products(request.query, num_results=20)
+        products = await client.asearch_products(request.query, num_results=20)
         
         return SearchResponse(
             query=request.query,
@@ -1,10 +1,12 @@
 from fastapi import APIRouter
-from .endpoints import health, search, chat, history
+from .endpoints import health, search, compare, chat, history, metrics
 
 router = APIRouter()
 
 router.include_router(health.router, tags=["health"])
 router.include_router(search.router, tags=["search"])
+router.include_router(compare.router, tags=["compare"])
 router.include_router(chat.router, tags=["chat"])
 router.include_router(history.router, tags=["history"])
+router.include_router(metrics.router, tags=["metrics"])
 
@@ -25,9 +25,40 @@ class Settings(BaseSettings):
     
     # Database
     database_dir: str = "data"  # Directory for SQLite database
+    sqlite_pool_size: int = 4  # Pooled read-write connections (SQLite allows one writer at a time)
+    sqlite_read_pool_size: int = 8  # Pooled read-only connections (history endpoints)
+    sqlite_pool_timeout: float = 10.0  # Seconds to wait for a free pooled connection
+    sqlite_wal: bool = True  # Write-ahead log: readers and the writer do not block each other
+    sqlite_synchronous: str = "NORMAL"  # OFF, NORMAL (safe with WAL, no fsync per commit), FULL, EXTRA
+    sqlite_cache_size: int = -20000  # Page cache per connection (negative = KiB, i.e. ~20 MB)
+    sqlite_mmap_size: int = 268435456  # Memory-mapped I/O size in bytes (0 = disabled)
+    sqlite_busy_timeout: int = 5000  # Milliseconds to wait for a lock before "database is locked"
+    
+    # Write-behind persistence (conversations, searches, cached products)
+    persistence_write_behind: bool = True  # Queue writes for a background writer thread instead of writing on the response path
+    persistence_queue_size: int = 10000  # Maximum queued records (backpressure above)
+    persistence_batch_size: int = 200  # Maximum records committed in one transaction
+    persistence_flush_interval: float = 0.05  # Seconds a record may wait for others to share its commit
+    persistence_enqueue_timeout: float = 1.0  # Seconds a request waits for room in a full queue before writing itself
+    persistence_shutdown_timeout: float = 10.0  # Seconds to wait for the queue to drain at shutdown
     
     # SerperDev API
     serper_api_key: str = ""
+    serper_timeout: float = 10.0
+    serper_pool_max_connections: int = 20
+    serper_speculative_search: str = "auto"  # Fire /search with /shopping: always, auto (when /shopping is often short), never
+    serper_speculation_threshold: float = 0.3  # "auto": speculate when /shopping came back short this often (0-1)
+    serper_max_countries: int = 3  # Countries searched concurrently for a multi-country location (e.g., "canada/usa")
+    serper_country_quota: int = 0  # Results guaranteed to each country of a multi-country search (0 = equal share)
+    
+    # SerperDev rate limiter (token bucket + daily credit budget, shared by all clients)
+    serper_rate_limit_enabled: bool = True
+    serper_requests_per_second: float = 5.0
+    serper_burst: int = 10  # Bucket size
+    serper_max_wait: float = 2.0  # Seconds a user search waits for a token (background requests never wait)
+    serper_background_reserve: int = 3  # Tokens background requests (prefetch, cache refresh) leave to user searches
+    serper_daily_credit_budget: int = 0  # Credits per UTC day (0 = no budget)
+    serper_budget_degrade_ratio: float = 0.9  # Share of the budget after which background requests stop (cached results served as is)
     
     # eBay Browse API
     ebay_client_id: str = ""
@@ -36,6 +67,15 @@ class Settings(BaseSettings):
     # Best Buy API
     bestbuy_api_key: str = ""
     
+    # eBay Browse / Best Buy base URLs (e.g. local stub servers)
+    ebay_api_base_url: str = "https://api.ebay.com"
+    bestbuy_api_base_url: str = "https://api.bestbuy.com"
+    
+    # Multi-source product search (sources without credentials are skipped)
+    product_sources: str = "serper,ebay,bestbuy"  # Comma-separated, in merge priority order
+    product_search_deadline: float = 6.0  # Seconds; results arrived by then are merged, slower sources are dropped
+    product_search_max_abandoned: int = 4  # Sync path: a source with this many requests still running past the deadline is skipped
+    
     # LLM Provider Configuration
     llm_provider: str = "ollama"  # Options: ollama, deepseek, openai, anthropic
     ollama_base_url: str = "http://localhost:11434"
@@ -45,6 +85,66 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     anthropic_api_key: str = ""
     
+    # LLM HTTP connection pool (one keep-alive pool per provider base URL)
+    llm_pool_max_connections: int = 20
+    llm_pool_max_keepalive: int = 10
+    llm_pool_keepalive_expiry: float = 60.0  # Seconds an idle connection stays open
+    llm_connect_timeout: float = 5.0
+    llm_read_timeout: float = 60.0
+    llm_pool_timeout: float = 0.0  # Seconds a request waits for a free pooled connection (0 = read timeout)
+    llm_http2: bool = True  # Used only if the 'h2' package is installed
+    
+    # LLM response cache (in-memory LRU + SQLite table cache_entries)
+    llm_cache_enabled: bool = True
+    llm_cache_max_memory_entries: int = 1000
+    llm_cache_max_persisted_entries: int = 20000
+    llm_cache_default_ttl: float = 86400.0  # Seconds
+    llm_cache_ttl_conversation: float = 86400.0  # Conversation classification (per message + history)
+    llm_cache_ttl_query: float = 604800.0  # Query understanding (message -> StructuredQuery)
+    
+    # Normalized-query cache (canonicalized message -> StructuredQuery)
+    query_cache_enabled: bool = True
+    query_cache_ttl: float = 2592000.0  # Seconds (30 days)
+    query_cache_max_memory_entries: int = 5000
+    query_cache_max_persisted_entries: int = 50000
+    query_cache_warm_limit: int = 5000  # History rows loaded at startup
+    
+    # Search result cache (Serper results keyed by search query, country and count)
+    search_cache_enabled: bool = True
+    search_cache_ttl: float = 3600.0  # Seconds a result is fresh
+    search_cache_stale_ttl: float = 86400.0  # Seconds a stale result is still served while it is refreshed
+    search_cache_negative_ttl: float = 300.0  # Empty results
+    search_cache_error_ttl: float = 30.0  # Failed searches
+    search_cache_max_memory_entries: int = 2000
+    search_cache_max_persisted_entries: int = 20000
+    
+    # Single-flight coalescing: identical in-flight searches/LLM calls share one upstream call
+    single_flight_enabled: bool = True
+    
+    # Session result pool: over-fetched products not shown yet, answered on "show me more"
+    result_pool_enabled: bool = True
+    result_pool_page_size: int = 20  # Extra results requested by each background prefetch
+    result_pool_max_depth: int = 100  # Maximum results requested for one search (SerperDev num)
+    result_pool_low_watermark: int = 10  # Prefetch the next page when fewer products are pooled
+    
+    # Cross-platform duplicate clustering (price comparison per item)
+    product_cluster_threshold: float = 0.5  # Minimum title similarity (0-1, MinHash estimate) of two listings of the same item
+    
+    # Price comparison statistics
+    price_outlier_threshold: float = 3.5  # Modified z-score (log prices) above which a listing is an outlier, e.g. "$1" accessories (0 = disabled)
+    
+    # Rule-based query parser (fast path before the LLM)
+    query_fast_path_enabled: bool = True
+    query_fast_path_threshold: float = 0.8  # Minimum confidence (0-1) to skip the LLM
+    
+    # Combined mode: one LLM call classifies ambiguous messages AND extracts the structured query
+    combined_understanding_enabled: bool = False
+    
+    # Product message: "inline" (LLM message before responding) or "background"
+    # (template message right away, LLM message fetched later via GET /chat/{session_id}/message/{turn_id})
+    product_message_mode: str = "inline"
+    product_message_stream_timeout: float = 30.0  # Max wait for the background message on /chat/stream
+    
     model_config = SettingsConfigDict(
         env_file=str(ENV_FILE),
         case_sensitive=False,
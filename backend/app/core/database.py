@@ -1,10 +1,14 @@
 """
 SQLite database setup and connection management.
+Connections are pooled and kept open; the database runs in WAL mode so readers
+(history endpoints, read-only pool) and the writer do not block each other.
 """
 
 import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from contextlib import contextmanager
 
 from app.core.config import settings
@@ -13,30 +17,238 @@ from app.core.config import settings
 DB_PATH = Path(settings.database_dir) / "buybuddy.db"
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# PRAGMA synchronous modes, indexed by the level the pragma reports
+_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
 
-def get_db_connection() -> sqlite3.Connection:
+# Full-text indexed columns per table (FTS5 tables "<table>_fts", see _init_fts)
+FTS_TABLES = {
+    "products": ("name", "description", "search_query"),
+    "searches": ("query_text",),
+}
+
+# Set by init_database(): False if SQLite has no FTS5 module
+FTS_AVAILABLE = False
+
+
+def get_db_connection(read_only: bool = False) -> sqlite3.Connection:
     """
-    Get a database connection.
+    Open a new database connection with the configured pragmas.
+    
+    Args:
+        read_only: Open the file read-only (history endpoints); writes raise sqlite3.OperationalError
+    
+    Returns:
+        Connection (rows are sqlite3.Row)
     """
-    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+    if read_only:
+        conn = sqlite3.connect(f"{DB_PATH.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
     conn.row_factory = sqlite3.Row  # Enable column access by name
+    
+    synchronous = settings.sqlite_synchronous.upper()
+    if synchronous not in _SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid SQLITE_SYNCHRONOUS: {settings.sqlite_synchronous}")
+    conn.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout)}")
+    if not read_only and settings.sqlite_wal:
+        # Persistent: readers no longer block the writer (and vice versa)
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA synchronous = {synchronous}")
+    conn.execute(f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
 
+class SQLiteConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections.
+    Connections are opened on demand (up to max_connections), handed to one thread at a time
+    and kept open afterwards, so repository calls no longer pay for connect + pragmas.
+    """
+    
+    def __init__(self, max_connections: int, read_only: bool = False, timeout: Optional[float] = None):
+        """
+        Initialize the pool (connections are opened lazily).
+        
+        Args:
+            max_connections: Maximum number of open connections
+            read_only: Open read-only connections
+            timeout: Seconds to wait for a free connection (default: settings.sqlite_pool_timeout)
+        """
+        self.max_connections = max(1, max_connections)
+        self.read_only = read_only
+        self.timeout = settings.sqlite_pool_timeout if timeout is None else timeout
+        
+        self._idle: List[sqlite3.Connection] = []
+        self._open = 0
+        self._condition = threading.Condition()
+        
+        # Statistics
+        self.checkouts = 0
+        self.connections_opened = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.discarded = 0
+    
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection (returned to the pool on exit).
+        
+        Raises:
+            TimeoutError: If no connection is free within the pool timeout
+        """
+        conn = self._acquire()
+        healthy = True
+        try:
+            yield conn
+        except Exception:
+            healthy = self._rollback(conn)
+            raise
+        finally:
+            self._release(conn, healthy)
+    
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, open a new one, or wait for one to be returned."""
+        with self._condition:
+            self.checkouts += 1
+            if not self._idle and self._open >= self.max_connections:
+                self.waits += 1
+                started = time.perf_counter()
+                available = self._condition.wait_for(
+                    lambda: self._idle or self._open < self.max_connections,
+                    timeout=self.timeout
+                )
+                self.wait_time += time.perf_counter() - started
+                if not available:
+                    raise TimeoutError(f"No SQLite connection available after {self.timeout}s")
+            if self._idle:
+                # LIFO: the most recently used connection has the warmest page cache
+                return self._idle.pop()
+            self._open += 1
+        
+        try:
+            conn = get_db_connection(read_only=self.read_only)
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.connections_opened += 1
+        return conn
+    
+    def _release(self, conn: sqlite3.Connection, healthy: bool):
+        """Return a connection to the pool (closed if it is unusable)."""
+        with self._condition:
+            if healthy:
+                self._idle.append(conn)
+            else:
+                self._open -= 1
+                self.discarded += 1
+            self._condition.notify()
+        if not healthy:
+            conn.close()
+    
+    @staticmethod
+    def _rollback(conn: sqlite3.Connection) -> bool:
+        """Roll back a failed transaction; False if the connection is unusable."""
+        try:
+            conn.rollback()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def close_all(self):
+        """Close idle connections (application shutdown)."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            conn.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+        
+        Returns:
+            Dictionary with open/idle connections, checkouts, connections opened,
+            reuse ratio and waits for a free connection
+        """
+        with self._condition:
+            return {
+                "read_only": self.read_only,
+                "max_connections": self.max_connections,
+                "open": self._open,
+                "idle": len(self._idle),
+                "checkouts": self.checkouts,
+                "connections_opened": self.connections_opened,
+                "reuse_ratio": round(1 - self.connections_opened / self.checkouts, 3) if self.checkouts else None,
+                "waits": self.waits,
+                "avg_wait_ms": round(self.wait_time / self.waits * 1000, 2) if self.waits else 0.0,
+                "discarded": self.discarded
+            }
+
+
+# Shared pools: read-write (repositories, caches) and read-only (history endpoints)
+db_pool = SQLiteConnectionPool(settings.sqlite_pool_size)
+read_db_pool = SQLiteConnectionPool(settings.sqlite_read_pool_size, read_only=True)
+
+
 @contextmanager
 def get_db():
     """
-    Context manager for database connections.
+    Context manager for a pooled read-write connection (commit on success, rollback on error).
     """
-    conn = get_db_connection()
-    try:
+    with db_pool.connection() as conn:
         yield conn
         conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+
+
+@contextmanager
+def get_read_db():
+    """
+    Context manager for a pooled read-only connection.
+    """
+    with read_db_pool.connection() as conn:
+        yield conn
+
+
+def close_db_pools():
+    """Close pooled connections (application shutdown)."""
+    db_pool.close_all()
+    read_db_pool.close_all()
+
+
+def get_db_pool_stats() -> Dict[str, Any]:
+    """
+    Get database pool statistics.
+    The journal and synchronous modes are read from a pooled connection, not from settings:
+    WAL may have been refused (e.g., network file system) and is kept by the file once set.
+    
+    Returns:
+        Dictionary with the journal mode and the read-write/read-only pool statistics
+    """
+    try:
+        with get_read_db() as conn:
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+        synchronous = _SYNCHRONOUS_MODES[synchronous]
+    except Exception as e:
+        print(f"Warning: Could not read database pragmas: {e}")
+        journal_mode = synchronous = None
+    
+    return {
+        "path": str(DB_PATH),
+        "journal_mode": journal_mode,
+        "synchronous": synchronous,
+        "pools": {
+            "read_write": db_pool.stats(),
+            "read_only": read_db_pool.stats()
+        }
+    }
 
 
 def init_database():
@@ -54,10 +266,14 @@ def init_database():
                 user_message TEXT NOT NULL,
                 assistant_response TEXT,
                 structured_query TEXT,  -- JSON string
+                turn_id TEXT,  -- Workflow turn (background product messages are saved under it)
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        conversation_columns = {row[1] for row in cursor.execute("PRAGMA table_info(conversations)")}
+        if "turn_id" not in conversation_columns:
+            cursor.execute("ALTER TABLE conversations ADD COLUMN turn_id TEXT")
         
         # Table: products (cache)
         cursor.execute("""
@@ -88,18 +304,132 @@ def init_database():
             )
         """)
         
+        # Table: search_results (products returned by each search)
+        search_results_exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_results'"
+        ).fetchone()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS search_results (
+                search_id INTEGER NOT NULL REFERENCES searches(id) ON DELETE CASCADE,
+                product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+                rank INTEGER NOT NULL,  -- Position in the search results (0 = first)
+                PRIMARY KEY (search_id, product_id)
+            ) WITHOUT ROWID
+        """)
+        
+        # Table: cache_entries (LLM responses, search results, ... - see app.infrastructure.cache)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,  -- JSON string
+                stored_at REAL NOT NULL,  -- Unix timestamp
+                expires_at REAL NOT NULL,  -- Unix timestamp
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        
         # Indexes for performance
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversations_session ON conversations(session_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations(timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversations_turn ON conversations(turn_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_link ON products(link)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_search_query ON products(search_query)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_searches_session ON searches(session_id)")
+        # Session history: searches of a session, most recent first (replaces idx_searches_session)
+        cursor.execute("DROP INDEX IF EXISTS idx_searches_session")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_searches_session_timestamp ON searches(session_id, timestamp)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_searches_timestamp ON searches(timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_results_product ON search_results(product_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries(namespace, expires_at)")
+        
+        if not search_results_exists:
+            _backfill_search_results(cursor)
+        
+        _init_fts(cursor)
         
         conn.commit()
         print(f"Database initialized at: {DB_PATH}")
 
 
+def _backfill_search_results(cursor: sqlite3.Cursor):
+    """
+    Link existing searches to the cached products they found (migration to search_results).
+    Before search_results, a product only kept the text of the last query that found it:
+    a search is linked to the products whose search_query is exactly its query text, only
+    when no other search ran that query (otherwise which one found them is unknown and the
+    older searches stay unlinked).
+    """
+    cursor.execute("""
+        INSERT OR IGNORE INTO search_results (search_id, product_id, rank)
+        SELECT s.id, p.id, ROW_NUMBER() OVER (PARTITION BY s.id ORDER BY p.id) - 1
+        FROM searches s
+        JOIN products p ON p.search_query = s.query_text
+        WHERE s.query_text IN (
+            SELECT query_text FROM searches
+            GROUP BY query_text
+            HAVING COUNT(*) = 1
+        )
+    """)
+    if cursor.rowcount > 0:
+        print(f"Linked {cursor.rowcount} cached products to past searches")
+
+
+def _init_fts(cursor: sqlite3.Cursor):
+    """
+    Create the FTS5 indexes (products: name, description, search_query; searches: query_text).
+    They are external-content tables kept in sync by triggers; existing rows are indexed on creation.
+    Sets FTS_AVAILABLE (False if SQLite was built without FTS5: repositories fall back to LIKE).
+    """
+    global FTS_AVAILABLE
+    
+    for table, columns in FTS_TABLES.items():
+        fts_table = f"{table}_fts"
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+        ).fetchone()
+        try:
+            # remove_diacritics: "ecouteurs" matches "écouteurs"
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    {", ".join(columns)},
+                    content='{table}',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"Warning: FTS5 unavailable, full-text lookups use LIKE: {e}")
+            FTS_AVAILABLE = False
+            return
+        
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        column_list = ", ".join(columns)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+        """)
+        # Only indexed columns: refreshing cached_at does not touch the index
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+        
+        if not exists:
+            # Index the rows written before the FTS table existed
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+    
+    FTS_AVAILABLE = True
+
+
 # Initialize database on import
 init_database()
 
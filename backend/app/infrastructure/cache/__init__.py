@@ -0,0 +1,18 @@
+"""
+Caching layer (in-memory LRU + SQLite persistence).
+"""
+
+from .two_tier_cache import TwoTierCache, CacheEntry
+from .query_cache import QueryCache, canonicalize_query, get_query_cache, get_query_cache_stats
+from .single_flight import SingleFlight, single_flight
+
+__all__ = [
+    "TwoTierCache",
+    "CacheEntry",
+    "QueryCache",
+    "canonicalize_query",
+    "get_query_cache",
+    "get_query_cache_stats",
+    "SingleFlight",
+    "single_flight",
+]
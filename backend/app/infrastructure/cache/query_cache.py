@@ -0,0 +1,281 @@
+"""
+Normalized-query cache: canonicalized user message -> validated StructuredQuery.
+Messages that only differ by case, accents, punctuation, spacing, filler words,
+number/currency formatting or (when safe) word order share one entry, so the
+QueryUnderstandingAgent LLM call is skipped for them.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.infrastructure.cache.two_tier_cache import TwoTierCache
+from app.models.schemas import StructuredQuery
+
+
+# Filler words that never change the extracted query (FR + EN)
+STOPWORDS = {
+    # French
+    "le", "la", "les", "l", "un", "une", "des", "de", "du", "d", "au", "aux", "en", "et",
+    "ou", "je", "j", "me", "m", "moi", "mon", "ma", "mes", "veux", "voudrais",
+    "cherche", "recherche", "rechercher", "trouve", "trouver", "trouvez", "acheter",
+    "besoin", "ai", "svp", "stp", "sil", "plait", "vous", "peux", "pouvez", "aide", "aider",
+    "qui", "que", "quel", "quelle", "est", "bon", "bonne",
+    # English
+    "the", "a", "an", "to", "i", "me", "my", "want", "looking", "look", "need",
+    "find", "search", "buy", "please", "some", "of", "and", "or", "in", "can",
+    "you", "help", "am", "im", "get", "would", "like", "that", "is",
+}
+
+# Words whose position matters (comparators, negations, relations): token order is kept when present.
+# They must not be STOPWORDS (stopwords are dropped before the order check).
+# Relations tell the product from what it goes with: "coque pour iphone" is not "iphone avec coque".
+ORDER_SENSITIVE = {
+    "sans", "pas", "non", "ni", "without", "not", "no", "but",
+    "pour", "avec", "for", "with",
+    "sous", "moins", "plus", "max", "maximum", "min", "minimum", "entre", "jusqu",
+    "under", "below", "over", "above", "less", "more", "than", "between", "up",
+}
+
+CURRENCY_WORDS = {
+    "€": "eur", "eur": "eur", "euro": "eur", "euros": "eur",
+    "$": "usd", "usd": "usd", "dollar": "usd", "dollars": "usd", "dollard": "usd", "dollards": "usd",
+}
+
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "ß": "ss", "’": "'", " ": " ", " ": " "})
+_THOUSANDS_RE = re.compile(r"(?<=\d)[\s.,'](?=\d{3}(?!\d))")
+_DECIMAL_COMMA_RE = re.compile(r"(?<=\d),(?=\d{1,2}(?!\d))")
+_TRAILING_ZEROS_RE = re.compile(r"\b(\d+)\.0+\b")
+_KILO_RE = re.compile(r"\b(\d+(?:\.\d+)?)\s?k\b(?=\s*(?:€|\$|eur|usd|dollar))")  # "1.5k€", not "4k"
+_CURRENCY_SYMBOL_RE = re.compile(r"([€$])")
+_TOKEN_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+
+# Cache namespace, versioned with canonicalize_query(): keys built by an older version are not served
+# (v2: relational words are kept, "coque pour iphone" and "iphone avec coque" no longer share a key;
+#  v3: "for" is no longer a stopword, "case for iphone" and "iphone for case" no longer share a key)
+NAMESPACE = "structured_query_v3"
+
+
+def fold_text(text: str) -> str:
+    """Lowercase and strip accents (Unicode compatibility folding)."""
+    text = unicodedata.normalize("NFKD", text.translate(_LIGATURES).casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def normalize_numbers(text: str) -> str:
+    """Normalize number formatting: "1 500,00" / "1,500.00" / "1.5k" -> "1500"."""
+    text = _THOUSANDS_RE.sub("", text)
+    text = _DECIMAL_COMMA_RE.sub(".", text)
+    text = _KILO_RE.sub(lambda m: f"{float(m.group(1)) * 1000:g}", text)
+    return _TRAILING_ZEROS_RE.sub(r"\1", text)
+
+
+def canonicalize_query(message: str) -> str:
+    """
+    Canonicalize a user message for cache lookups.
+    
+    Args:
+        message: Raw user message
+    
+    Returns:
+        Canonical form (empty string if nothing meaningful is left)
+    """
+    text = normalize_numbers(fold_text(message))
+    # Split currency symbols from amounts ("1500€" -> "1500 €")
+    text = _CURRENCY_SYMBOL_RE.sub(r" \1 ", text)
+    
+    tokens: List[str] = []
+    for raw_token in re.findall(r"[€$]|[a-z0-9.]+", text):
+        if raw_token in CURRENCY_WORDS:
+            tokens.append(CURRENCY_WORDS[raw_token])
+            continue
+        for token in _TOKEN_RE.findall(raw_token):
+            if token not in STOPWORDS:
+                tokens.append(token)
+    
+    # Currency before the amount ("$100") means the same as after it ("100 dollars")
+    for i in range(len(tokens) - 1):
+        if tokens[i] in ("eur", "usd") and tokens[i + 1][0].isdigit():
+            tokens[i], tokens[i + 1] = tokens[i + 1], tokens[i]
+    
+    # Sorting is only safe when no token depends on its neighbours (amounts, comparators, negations)
+    if not any(token[0].isdigit() or token in ORDER_SENSITIVE for token in tokens):
+        tokens = sorted(set(tokens))
+    
+    return " ".join(tokens)
+
+
+class QueryCache:
+    """
+    Cache of validated StructuredQuery dictionaries keyed by canonicalized message.
+    Entries come from successful LLM extractions and from the history tables (pre-warm).
+    """
+    
+    def __init__(self, cache: Optional[TwoTierCache] = None, ttl: Optional[float] = None):
+        """
+        Initialize the query cache.
+        
+        Args:
+            cache: Backing cache (default: namespace NAMESPACE)
+            ttl: Time-to-live in seconds (default: settings.query_cache_ttl)
+        """
+        self.ttl = ttl or settings.query_cache_ttl
+        self.cache = cache or TwoTierCache(
+            namespace=NAMESPACE,
+            default_ttl=self.ttl,
+            max_memory_entries=settings.query_cache_max_memory_entries,
+            max_persisted_entries=settings.query_cache_max_persisted_entries
+        )
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.warmed = 0
+    
+    def _validate(self, structured_query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Validate a structured query before caching it.
+        Fallback queries (no product_type) are not cached.
+        
+        Returns:
+            Normalized dictionary, or None if invalid
+        """
+        try:
+            validated = StructuredQuery(**structured_query)
+        except Exception:
+            return None
+        if not validated.product_type:
+            return None
+        return validated.model_dump()
+    
+    def get(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached structured query for a message.
+        
+        Args:
+            message: Raw user message
+        
+        Returns:
+            Structured query dictionary (a copy) or None on miss
+        """
+        key = canonicalize_query(message)
+        cached = self.cache.get(key) if key else None
+        return self._record(cached)
+    
+    async def aget(self, message: str) -> Optional[Dict[str, Any]]:
+        """Async get(): the SQLite lookup runs in a worker thread."""
+        key = canonicalize_query(message)
+        cached = await self.cache.aget(key) if key else None
+        return self._record(cached)
+    
+    def set(self, message: str, structured_query: Dict[str, Any]) -> bool:
+        """
+        Cache a structured query for a message.
+        
+        Args:
+            message: Raw user message
+            structured_query: Structured query dictionary (validated before caching)
+        
+        Returns:
+            True if the entry was cached
+        """
+        key = canonicalize_query(message)
+        validated = self._validate(structured_query)
+        if not key or validated is None:
+            self.rejected += 1
+            return False
+        self.cache.set(key, validated, self.ttl)
+        return True
+    
+    async def aset(self, message: str, structured_query: Dict[str, Any]) -> bool:
+        """Async set(): the SQLite write runs in a worker thread."""
+        key = canonicalize_query(message)
+        validated = self._validate(structured_query)
+        if not key or validated is None:
+            self.rejected += 1
+            return False
+        await self.cache.aset(key, validated, self.ttl)
+        return True
+    
+    def warm_from_history(self, limit: Optional[int] = None) -> int:
+        """
+        Pre-warm the in-memory tier from the structured queries stored in the
+        searches and conversations tables.
+        
+        Args:
+            limit: Maximum number of rows to load (default: settings.query_cache_warm_limit)
+        
+        Returns:
+            Number of entries loaded
+        """
+        from app.infrastructure.repositories.sqlite_repository import SQLiteRepository
+        
+        rows = SQLiteRepository().get_structured_query_history(limit or settings.query_cache_warm_limit)
+        
+        loaded = 0
+        # Oldest first, so the most recent queries end up at the hot end of the LRU
+        for message, structured_query in reversed(rows):
+            key = canonicalize_query(message)
+            validated = self._validate(structured_query)
+            if key and validated is not None:
+                self.cache.set(key, validated, self.ttl, persist=False)
+                loaded += 1
+        
+        self.warmed += loaded
+        return loaded
+    
+    def _record(self, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Update hit/miss counters and return a copy of the cached value."""
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {**cached, "features": list(cached.get("features") or [])}
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get query cache statistics.
+        
+        Returns:
+            Dictionary with hits, misses, rejected entries, warmed entries and hit rate
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "rejected": self.rejected,
+            "warmed": self.warmed,
+            "memory_entries": self.cache.stats()["memory_entries"]
+        }
+
+
+# Global query cache
+_query_cache: Optional[QueryCache] = None
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """
+    Get the shared query cache (None if disabled in settings).
+    
+    Returns:
+        QueryCache instance or None
+    """
+    global _query_cache
+    if not settings.query_cache_enabled:
+        return None
+    if _query_cache is None:
+        _query_cache = QueryCache()
+    return _query_cache
+
+
+def get_query_cache_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get query cache statistics.
+    
+    Returns:
+        Dictionary with statistics, or None if the cache was never used
+    """
+    return _query_cache.stats() if _query_cache is not None else None
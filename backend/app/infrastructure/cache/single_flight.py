@@ -0,0 +1,141 @@
+"""
+Single-flight request coalescing.
+Concurrent calls with the same key share one in-flight upstream call (LLM, SerperDev)
+instead of each calling upstream: the first caller runs it, the others wait for its result.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class _Call:
+    """An in-flight synchronous call shared by concurrent threads."""
+    
+    __slots__ = ("done", "result", "error")
+    
+    def __init__(self):
+        """Initialize the call."""
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls, per namespace (e.g., "research", "query_understanding").
+    Only in-flight calls are shared: once a call completes, the next one runs again
+    (result reuse is the job of the caches).
+    """
+    
+    def __init__(self):
+        """Initialize the coalescing layer."""
+        self._calls: Dict[Tuple[str, str], _Call] = {}
+        self._futures: Dict[Tuple[int, str, str], asyncio.Future] = {}  # (event loop id, namespace, key)
+        self._lock = threading.Lock()
+        
+        # Statistics per namespace
+        self.leaders: Dict[str, int] = {}
+        self.collapsed: Dict[str, int] = {}
+    
+    def do(self, namespace: str, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn(), or wait for the identical call already running in another thread.
+        
+        Args:
+            namespace: Kind of call (metrics are kept per namespace)
+            key: Call key (e.g., normalized query + country)
+            fn: Function performing the upstream call
+        
+        Returns:
+            fn() result (exceptions are raised to every caller)
+        """
+        if not settings.single_flight_enabled:
+            return fn()
+        
+        call_key = (namespace, key)
+        with self._lock:
+            call = self._calls.get(call_key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[call_key] = call
+            self._record(namespace, leader)
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(call_key, None)
+            call.done.set()
+    
+    async def ado(self, namespace: str, key: str, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async version of do(): callers on the same event loop share one task.
+        
+        Args:
+            namespace: Kind of call (metrics are kept per namespace)
+            key: Call key (e.g., normalized query + country)
+            coro_fn: Coroutine function performing the upstream call
+        
+        Returns:
+            Coroutine result (exceptions are raised to every caller)
+        """
+        if not settings.single_flight_enabled:
+            return await coro_fn()
+        
+        loop = asyncio.get_running_loop()
+        future_key = (id(loop), namespace, key)
+        with self._lock:
+            future = self._futures.get(future_key)
+            leader = future is None
+            if leader:
+                future = asyncio.ensure_future(coro_fn())
+                self._futures[future_key] = future
+                future.add_done_callback(lambda _: self._futures.pop(future_key, None))
+            self._record(namespace, leader)
+        
+        # shield(): a caller that is cancelled (client disconnected) does not cancel the others
+        return await asyncio.shield(future)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics.
+        
+        Returns:
+            Dictionary with, per namespace, upstream calls made and requests collapsed into them
+        """
+        namespaces = sorted(set(self.leaders) | set(self.collapsed))
+        return {
+            "enabled": settings.single_flight_enabled,
+            "in_flight": len(self._calls) + len(self._futures),
+            "namespaces": {
+                namespace: {
+                    "upstream_calls": self.leaders.get(namespace, 0),
+                    "collapsed": self.collapsed.get(namespace, 0)
+                }
+                for namespace in namespaces
+            },
+            "collapsed": sum(self.collapsed.values())
+        }
+    
+    def _record(self, namespace: str, leader: bool):
+        """Update counters (called with the lock held)."""
+        counters = self.leaders if leader else self.collapsed
+        counters[namespace] = counters.get(namespace, 0) + 1
+
+
+# Global coalescing layer shared by workflow nodes
+single_flight = SingleFlight()
@@ -0,0 +1,270 @@
+"""
+Two-tier cache: in-memory LRU in front of the SQLite cache_entries table.
+Values must be JSON-serializable.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.database import get_db, get_read_db
+
+
+class CacheEntry:
+    """A cached value with its storage and expiry timestamps (epoch seconds)."""
+    
+    __slots__ = ("value", "stored_at", "expires_at")
+    
+    def __init__(self, value: Any, stored_at: float, expires_at: float):
+        """Initialize the entry."""
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+    
+    @property
+    def age(self) -> float:
+        """Seconds since the value was stored."""
+        return time.time() - self.stored_at
+    
+    @property
+    def expired(self) -> bool:
+        """True once the entry is past its TTL."""
+        return time.time() >= self.expires_at
+
+
+class TwoTierCache:
+    """
+    In-memory LRU (hot entries) backed by SQLite (survives restarts, shared by workers).
+    Each cache uses its own namespace in the cache_entries table.
+    """
+    
+    # Purge expired/excess persisted rows every N writes
+    CLEANUP_EVERY = 200
+    
+    def __init__(
+        self,
+        namespace: str,
+        default_ttl: float,
+        max_memory_entries: int = 1000,
+        max_persisted_entries: int = 10000,
+        persist: bool = True
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            namespace: Namespace in the cache_entries table (e.g., "llm")
+            default_ttl: Default time-to-live in seconds
+            max_memory_entries: LRU size cap
+            max_persisted_entries: Row cap in SQLite (oldest rows are evicted)
+            persist: Also store entries in SQLite
+        """
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_persisted_entries = max_persisted_entries
+        self.persist = persist
+        
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        
+        # Statistics
+        self.memory_hits = 0
+        self.persisted_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get_entry(self, key: str, allow_expired: bool = False) -> Optional[CacheEntry]:
+        """
+        Get a cache entry (memory first, then SQLite).
+        
+        Args:
+            key: Cache key
+            allow_expired: Return expired entries instead of treating them as misses
+        
+        Returns:
+            CacheEntry or None on miss
+        """
+        entry = self._get_memory(key, allow_expired)
+        if entry is not None:
+            self.memory_hits += 1
+            return entry
+        
+        entry = self._get_persisted(key, allow_expired) if self.persist else None
+        if entry is not None:
+            self.persisted_hits += 1
+            self._set_memory(key, entry)
+            return entry
+        
+        self.misses += 1
+        return None
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value or None on miss
+        """
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, persist: Optional[bool] = None):
+        """
+        Store a value.
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Time-to-live in seconds (default: default_ttl)
+            persist: Also write to SQLite (default: self.persist)
+        """
+        now = time.time()
+        entry = CacheEntry(value, now, now + (ttl if ttl is not None else self.default_ttl))
+        self._set_memory(key, entry)
+        
+        if self.persist if persist is None else persist:
+            try:
+                self._set_persisted(key, entry)
+            except Exception as e:
+                # The memory tier still works if SQLite is unavailable
+                print(f"Warning: Could not persist cache entry ({self.namespace}): {e}")
+    
+    async def aget_entry(self, key: str, allow_expired: bool = False) -> Optional[CacheEntry]:
+        """Async get_entry(): the SQLite lookup runs in a worker thread."""
+        entry = self._get_memory(key, allow_expired)
+        if entry is not None:
+            self.memory_hits += 1
+            return entry
+        if not self.persist:
+            self.misses += 1
+            return None
+        return await asyncio.to_thread(self.get_entry, key, allow_expired)
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async get(): the SQLite lookup runs in a worker thread."""
+        entry = await self.aget_entry(key)
+        return entry.value if entry is not None else None
+    
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Async set(): the SQLite write runs in a worker thread."""
+        await asyncio.to_thread(self.set, key, value, ttl)
+    
+    def delete(self, key: str):
+        """
+        Remove an entry from both tiers.
+        
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.persist:
+            with get_db() as conn:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                )
+    
+    def clear(self):
+        """Remove every entry of this namespace."""
+        with self._lock:
+            self._memory.clear()
+        if self.persist:
+            with get_db() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counters, hit rate and sizes
+        """
+        hits = self.memory_hits + self.persisted_hits
+        total = hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.max_memory_entries,
+            "memory_hits": self.memory_hits,
+            "persisted_hits": self.persisted_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 3) if total else None,
+            "evictions": self.evictions
+        }
+    
+    def _get_memory(self, key: str, allow_expired: bool) -> Optional[CacheEntry]:
+        """Look up the LRU (moves hits to the most-recent end)."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry.expired and not allow_expired:
+                return None
+            self._memory.move_to_end(key)
+            return entry
+    
+    def _set_memory(self, key: str, entry: CacheEntry):
+        """Insert into the LRU, evicting the least recently used entries."""
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+    
+    def _get_persisted(self, key: str, allow_expired: bool) -> Optional[CacheEntry]:
+        """Look up the SQLite tier."""
+        try:
+            with get_read_db() as conn:
+                row = conn.execute(
+                    "SELECT value, stored_at, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+        except Exception as e:
+            print(f"Warning: Could not read cache entry ({self.namespace}): {e}")
+            return None
+        
+        if row is None:
+            return None
+        
+        entry = CacheEntry(json.loads(row["value"]), row["stored_at"], row["expires_at"])
+        if entry.expired and not allow_expired:
+            return None
+        return entry
+    
+    def _set_persisted(self, key: str, entry: CacheEntry):
+        """Write to the SQLite tier (and periodically purge old rows)."""
+        with get_db() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (self.namespace, key, json.dumps(entry.value, ensure_ascii=False), entry.stored_at, entry.expires_at))
+            
+            self._writes += 1
+            if self._writes % self.CLEANUP_EVERY == 0:
+                self._cleanup(conn)
+    
+    def _cleanup(self, conn):
+        """Delete expired rows and the oldest rows above max_persisted_entries."""
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at < ?",
+            (self.namespace, time.time())
+        )
+        conn.execute("""
+            DELETE FROM cache_entries
+            WHERE namespace = ? AND key IN (
+                SELECT key FROM cache_entries
+                WHERE namespace = ?
+                ORDER BY stored_at DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (self.namespace, self.namespace, self.max_persisted_entries))
@@ -0,0 +1,248 @@
+"""
+Quota-aware rate limiter for the SerperDev API key.
+A token bucket caps requests per second and a daily credit budget caps consumption.
+User-facing searches wait briefly for a token; background requests (result pool
+prefetches, search cache refreshes) never wait, cannot take the last tokens of the
+bucket and stop once the budget is nearly spent (degrade mode: cached results are
+served as they are instead of being refreshed).
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+from app.core.config import settings
+
+
+USER = "user"
+BACKGROUND = "background"
+
+# Priority of the SerperDev requests made in the current context (copied into asyncio tasks)
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("serper_priority", default=USER)
+
+
+@contextmanager
+def background_priority():
+    """Mark the SerperDev requests made inside the block as background requests."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    """Get the priority of the SerperDev requests made in the current context."""
+    return _priority.get()
+
+
+class SerperRateLimitError(Exception):
+    """Raised when a SerperDev request is refused by the rate limiter or the credit budget."""
+
+
+class SerperRateLimiter:
+    """
+    Token bucket (settings.serper_requests_per_second, settings.serper_burst) and daily
+    credit budget (settings.serper_daily_credit_budget, reset at midnight UTC), shared
+    by every SerperDevClient.
+    """
+    
+    def __init__(self):
+        """Initialize the limiter with a full bucket."""
+        self._tokens = float(settings.serper_burst)
+        self._refilled_at = time.monotonic()
+        self._day = self._today()
+        self._credits_used = 0
+        self._lock = threading.Lock()
+        
+        # Statistics per priority
+        self.granted: Dict[str, int] = {USER: 0, BACKGROUND: 0}
+        self.rejected: Dict[str, int] = {USER: 0, BACKGROUND: 0}
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.throttled = 0  # 429 responses from SerperDev
+    
+    @staticmethod
+    def request_cost(num_results: int) -> int:
+        """
+        Credits billed by SerperDev for one request.
+        
+        Args:
+            num_results: Number of results requested (num parameter)
+        
+        Returns:
+            1 credit up to 10 results, 2 credits above
+        """
+        return 1 if num_results <= 10 else 2
+    
+    def acquire(self, cost: int = 1, priority: Optional[str] = None):
+        """
+        Take a token and `cost` credits, waiting up to settings.serper_max_wait for a token
+        (user requests only).
+        
+        Args:
+            cost: Credits billed for the request
+            priority: USER or BACKGROUND (default: priority of the current context)
+        
+        Raises:
+            SerperRateLimitError: No token in time, or not enough budget left
+        """
+        priority = priority or current_priority()
+        deadline = time.monotonic() + settings.serper_max_wait
+        waited = False
+        while True:
+            delay = self._try_acquire(cost, priority, deadline)
+            if delay is None:
+                break
+            waited = True
+            time.sleep(delay)
+        self._record_wait(waited, deadline)
+    
+    async def aacquire(self, cost: int = 1, priority: Optional[str] = None):
+        """
+        Async version of acquire() (waits without blocking the event loop).
+        
+        Args:
+            cost: Credits billed for the request
+            priority: USER or BACKGROUND (default: priority of the current context)
+        
+        Raises:
+            SerperRateLimitError: No token in time, or not enough budget left
+        """
+        priority = priority or current_priority()
+        deadline = time.monotonic() + settings.serper_max_wait
+        waited = False
+        while True:
+            delay = self._try_acquire(cost, priority, deadline)
+            if delay is None:
+                break
+            waited = True
+            await asyncio.sleep(delay)
+        self._record_wait(waited, deadline)
+    
+    def record_throttled(self):
+        """Record a 429 from SerperDev and empty the bucket so the next requests back off."""
+        with self._lock:
+            self.throttled += 1
+            self._tokens = 0.0
+            self._refilled_at = time.monotonic()
+    
+    @property
+    def degraded(self) -> bool:
+        """True once the spent share of the daily budget reaches settings.serper_budget_degrade_ratio."""
+        budget = settings.serper_daily_credit_budget
+        if not settings.serper_rate_limit_enabled or budget <= 0:
+            return False
+        with self._lock:
+            self._roll_day()
+            return self._credits_used >= budget * settings.serper_budget_degrade_ratio
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get limiter statistics.
+        
+        Returns:
+            Dictionary with the bucket level, credits used and left today, degrade mode
+            and per-priority granted/rejected counters
+        """
+        budget = settings.serper_daily_credit_budget
+        with self._lock:
+            self._refill()
+            self._roll_day()
+            tokens = self._tokens
+            credits_used = self._credits_used
+        return {
+            "enabled": settings.serper_rate_limit_enabled,
+            "requests_per_second": settings.serper_requests_per_second,
+            "tokens": round(tokens, 2),
+            "daily_credit_budget": budget or None,
+            "credits_used_today": credits_used,
+            "credits_remaining_today": max(budget - credits_used, 0) if budget > 0 else None,
+            "degraded": self.degraded,
+            "granted": dict(self.granted),
+            "rejected": dict(self.rejected),
+            "waited": self.waited,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "throttled_429": self.throttled
+        }
+    
+    def _try_acquire(self, cost: int, priority: str, deadline: float) -> Optional[float]:
+        """
+        Try to take a token and the credits.
+        
+        Returns:
+            None if granted, otherwise the delay before retrying
+        
+        Raises:
+            SerperRateLimitError: Refused (budget, background request, or deadline passed)
+        """
+        if not settings.serper_rate_limit_enabled:
+            with self._lock:
+                self._roll_day()
+                self._credits_used += cost
+                self.granted[priority] += 1
+            return None
+        
+        with self._lock:
+            self._refill()
+            self._roll_day()
+            
+            budget = settings.serper_daily_credit_budget
+            if budget > 0:
+                if self._credits_used + cost > budget:
+                    return self._reject(priority, "daily credit budget exhausted")
+                if priority == BACKGROUND and self._credits_used >= budget * settings.serper_budget_degrade_ratio:
+                    return self._reject(priority, "daily credit budget nearly spent, background requests paused")
+            
+            # Background requests leave the last tokens to user-facing searches
+            reserve = settings.serper_background_reserve if priority == BACKGROUND else 0
+            if self._tokens >= 1 + reserve:
+                self._tokens -= 1
+                self._credits_used += cost
+                self.granted[priority] += 1
+                return None
+            
+            delay = (1 + reserve - self._tokens) / settings.serper_requests_per_second
+            if priority == BACKGROUND or time.monotonic() + delay > deadline:
+                return self._reject(priority, "rate limit reached")
+            return delay
+    
+    def _reject(self, priority: str, reason: str):
+        """Count a rejection and raise (lock held)."""
+        self.rejected[priority] += 1
+        raise SerperRateLimitError(f"SerperDev {priority} request refused: {reason}")
+    
+    def _record_wait(self, waited: bool, deadline: float):
+        """Count a request that had to wait for a token."""
+        if waited:
+            self.waited += 1
+            self.wait_seconds += settings.serper_max_wait - max(deadline - time.monotonic(), 0.0)
+    
+    def _refill(self):
+        """Add the tokens earned since the last refill (lock held)."""
+        now = time.monotonic()
+        self._tokens = min(
+            float(settings.serper_burst),
+            self._tokens + (now - self._refilled_at) * settings.serper_requests_per_second
+        )
+        self._refilled_at = now
+    
+    def _roll_day(self):
+        """Reset the credit counter when the UTC day changes (lock held)."""
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._credits_used = 0
+    
+    @staticmethod
+    def _today() -> str:
+        """Current UTC date (budget period)."""
+        return datetime.now(timezone.utc).date().isoformat()
+
+
+# Shared by every SerperDevClient instance (one API key)
+serper_rate_limiter = SerperRateLimiter()
@@ -0,0 +1,356 @@
+"""
+Read-through search result cache in front of SerperDevClient.
+Key: (built search query, gl country code, number of results).
+Fresh entries are served directly; stale entries are served while a background
+task refreshes them; empty results and errors are cached briefly (negative caching).
+Refreshes are background SerperDev requests: they are skipped once the daily credit
+budget is nearly spent, and stale entries are then served as they are. A search
+refused by the rate limiter is never cached: the last known result for the key is
+served instead, even if expired.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import List, Dict, Optional, Any, Set
+from app.models.schemas import Product
+from app.models.normalization import normalize_product, get_product_record
+from app.infrastructure.cache import TwoTierCache, CacheEntry
+from app.infrastructure.external_apis.serperdev_client import SerperDevClient
+from app.infrastructure.external_apis.rate_limiter import (
+    serper_rate_limiter,
+    background_priority,
+    SerperRateLimitError
+)
+from app.core.config import settings
+
+
+def make_search_key(query: str, country_code: str, num_results: int) -> str:
+    """
+    Build the cache key for a search.
+    
+    Args:
+        query: Search query sent to SerperDev
+        country_code: ISO country code (gl parameter), several joined with "+" for multi-country searches
+        num_results: Number of results requested
+    
+    Returns:
+        JSON-encoded key
+    """
+    normalized_query = " ".join(query.lower().split())
+    return json.dumps([normalized_query, country_code, num_results], ensure_ascii=False)
+
+
+class CachedSerperDevClient:
+    """
+    SerperDevClient decorator with a read-through, stale-while-revalidate cache.
+    
+    Each entry stores the products (or the error message) and a "fresh_until"
+    timestamp; the TwoTierCache TTL also covers the stale window, so a stale entry
+    stays readable until fresh_until + search_cache_stale_ttl.
+    """
+    
+    def __init__(self, client: SerperDevClient, cache: TwoTierCache):
+        """
+        Initialize the cached client.
+        
+        Args:
+            client: Wrapped SerperDev client
+            cache: Search result cache
+        """
+        self.client = client
+        self.cache = cache
+        
+        self._refreshing: Set[str] = set()  # Keys with a background refresh in flight
+        self._refresh_lock = threading.Lock()
+        self._background_tasks: Set[asyncio.Task] = set()
+        
+        # Statistics
+        self.hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.refreshes_skipped = 0  # Stale entries served without refresh (credit budget nearly spent)
+        self.fallback_hits = 0  # Expired entries served because the rate limiter refused the search
+    
+    def __getattr__(self, name: str):
+        """Expose the wrapped client's attributes (COUNTRY_CODES, http_pool, ...)."""
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+    
+    def search_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """
+        Search products, answering from the cache when possible.
+        Same signature and behaviour as SerperDevClient.search_products().
+        """
+        key = make_search_key(query, self.client._get_country_key(location), num_results)
+        entry = self.cache.get_entry(key)
+        
+        if entry is not None:
+            if self._is_stale(entry.value):
+                self._start_refresh_thread(key, query, num_results, location)
+            return self._serve(entry.value)
+        
+        self.misses += 1
+        try:
+            products = self.client.search_products(query, num_results=num_results, location=location)
+        except SerperRateLimitError:
+            # A refusal says nothing about the query: serve the last known result, cache nothing
+            fallback = self._fallback_value(self.cache.get_entry(key, allow_expired=True))
+            if fallback is None:
+                raise
+            return self._serve_fallback(fallback)
+        except Exception as e:
+            self._store(key, self._error_value(e))
+            raise
+        
+        self._store(key, self._products_value(products))
+        return products
+    
+    async def asearch_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """
+        Async version of search_products(): stale entries are refreshed by an asyncio task.
+        """
+        key = make_search_key(query, self.client._get_country_key(location), num_results)
+        entry = await self.cache.aget_entry(key)
+        
+        if entry is not None:
+            if self._is_stale(entry.value):
+                self._start_refresh_task(key, query, num_results, location)
+            return self._serve(entry.value)
+        
+        self.misses += 1
+        try:
+            products = await self.client.asearch_products(query, num_results=num_results, location=location)
+        except SerperRateLimitError:
+            # A refusal says nothing about the query: serve the last known result, cache nothing
+            fallback = self._fallback_value(await self.cache.aget_entry(key, allow_expired=True))
+            if fallback is None:
+                raise
+            return self._serve_fallback(fallback)
+        except Exception as e:
+            await asyncio.to_thread(self._store, key, self._error_value(e))
+            raise
+        
+        await asyncio.to_thread(self._store, key, self._products_value(products))
+        return products
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get search cache statistics.
+        
+        Returns:
+            Dictionary with hit/stale/negative/miss counters, refreshes and the cache statistics
+        """
+        served = self.hits + self.stale_hits + self.negative_hits
+        total = served + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": round(served / total, 3) if total else None,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "refreshes_skipped": self.refreshes_skipped,
+            "fallback_hits": self.fallback_hits,
+            "refreshing": len(self._refreshing),
+            "cache": self.cache.stats()
+        }
+    
+    def _serve(self, value: Dict[str, Any]) -> List[Product]:
+        """
+        Turn a cached value into the search result (re-raises cached errors).
+        
+        Args:
+            value: Cached value ({"products": [...]} or {"error": "..."})
+        
+        Returns:
+            List of Product objects
+        """
+        if "error" in value:
+            self.negative_hits += 1
+            raise Exception(value["error"])
+        
+        if not value["products"]:
+            self.negative_hits += 1
+        elif self._is_stale(value):
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return self._to_products(value)
+    
+    def _to_products(self, value: Dict[str, Any]) -> List[Product]:
+        """Rebuild the Product objects of a cached result."""
+        # Re-attach the parsed prices with the currency found at ingest ("$" depends on the country)
+        currencies = value.get("currencies") or [None] * len(value["products"])
+        products = []
+        for product_data, currency in zip(value["products"], currencies):
+            product = Product(**product_data)
+            normalize_product(product, currency)
+            products.append(product)
+        return products
+    
+    def _fallback_value(self, entry: Optional[CacheEntry]) -> Optional[Dict[str, Any]]:
+        """Get the cached products of a (possibly expired) entry, None if it holds no result."""
+        if entry is None or "error" in entry.value or not entry.value["products"]:
+            return None
+        return entry.value
+    
+    def _serve_fallback(self, value: Dict[str, Any]) -> List[Product]:
+        """Serve a (possibly expired) entry in place of a refused search."""
+        self.fallback_hits += 1
+        return self._to_products(value)
+    
+    def _is_stale(self, value: Dict[str, Any]) -> bool:
+        """True if the entry is past its fresh TTL (negative entries are never refreshed)."""
+        return "error" not in value and bool(value["products"]) and time.time() >= value["fresh_until"]
+    
+    def _products_value(self, products: List[Product]) -> Dict[str, Any]:
+        """Build the cached value for a search result (short TTL if empty)."""
+        fresh_for = settings.search_cache_ttl if products else settings.search_cache_negative_ttl
+        return {
+            "products": [product.model_dump() for product in products],
+            "currencies": [get_product_record(product).currency for product in products],
+            "fresh_until": time.time() + fresh_for,
+            "fresh_for": fresh_for
+        }
+    
+    def _error_value(self, error: Exception) -> Dict[str, Any]:
+        """Build the cached value for a failed search."""
+        return {
+            "error": str(error),
+            "fresh_until": time.time() + settings.search_cache_error_ttl,
+            "fresh_for": settings.search_cache_error_ttl
+        }
+    
+    def _store(self, key: str, value: Dict[str, Any]):
+        """Store a value; result entries stay readable for the stale-while-revalidate window."""
+        ttl = value["fresh_for"]
+        if value.get("products"):
+            ttl += settings.search_cache_stale_ttl
+        self.cache.set(key, value, ttl)
+    
+    def _claim_refresh(self, key: str) -> bool:
+        """Mark a key as being refreshed; False if a refresh is already in flight or the budget is nearly spent."""
+        if serper_rate_limiter.degraded:
+            self.refreshes_skipped += 1
+            return False
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+    
+    def _store_refresh(self, key: str, products: List[Product]):
+        """Store refreshed products (an empty refresh keeps the stale entry)."""
+        if products:
+            self._store(key, self._products_value(products))
+    
+    def _start_refresh_thread(self, key: str, query: str, num_results: int, location: Optional[str]):
+        """Refresh a stale entry in a background thread (sync callers)."""
+        if not self._claim_refresh(key):
+            return
+        
+        def refresh():
+            try:
+                with background_priority():
+                    products = self.client.search_products(query, num_results=num_results, location=location)
+                self._store_refresh(key, products)
+            except Exception as e:
+                # Keep serving the stale entry
+                self.refresh_failures += 1
+                print(f"Warning: Search cache refresh failed for {query!r}: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    def _start_refresh_task(self, key: str, query: str, num_results: int, location: Optional[str]):
+        """Refresh a stale entry in a background asyncio task (async callers)."""
+        if not self._claim_refresh(key):
+            return
+        
+        async def refresh():
+            try:
+                with background_priority():
+                    products = await self.client.asearch_products(query, num_results=num_results, location=location)
+                await asyncio.to_thread(self._store_refresh, key, products)
+            except Exception as e:
+                # Keep serving the stale entry
+                self.refresh_failures += 1
+                print(f"Warning: Search cache refresh failed for {query!r}: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        task = asyncio.create_task(refresh())
+        # Keep a reference so the task is not garbage-collected before it finishes
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+
+# Global search result cache shared by every cached client
+_search_cache: Optional[TwoTierCache] = None
+_cached_clients: List[CachedSerperDevClient] = []
+
+
+def get_search_cache() -> TwoTierCache:
+    """
+    Get the shared search result cache (created on first use).
+    
+    Returns:
+        TwoTierCache instance (namespace "search")
+    """
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = TwoTierCache(
+            namespace="search",
+            default_ttl=settings.search_cache_ttl,
+            max_memory_entries=settings.search_cache_max_memory_entries,
+            max_persisted_entries=settings.search_cache_max_persisted_entries
+        )
+    return _search_cache
+
+
+def with_search_cache(client: SerperDevClient):
+    """
+    Wrap a SerperDev client with the shared search cache (no-op if disabled in settings).
+    
+    Args:
+        client: Client to wrap
+    
+    Returns:
+        CachedSerperDevClient, or the client itself if caching is disabled
+    """
+    if not settings.search_cache_enabled or isinstance(client, CachedSerperDevClient):
+        return client
+    
+    cached = CachedSerperDevClient(client, get_search_cache())
+    _cached_clients.append(cached)
+    return cached
+
+
+def get_search_cache_stats() -> Dict[str, Any]:
+    """
+    Get search cache statistics.
+    
+    Returns:
+        Dictionary with counters summed over every cached client and the shared cache statistics
+    """
+    counters = [
+        "hits", "stale_hits", "negative_hits", "misses", "fallback_hits",
+        "refreshes", "refresh_failures", "refreshes_skipped"
+    ]
+    totals = {name: sum(getattr(client, name) for client in _cached_clients) for name in counters}
+    return {
+        "enabled": settings.search_cache_enabled,
+        **totals,
+        "cache": _search_cache.stats() if _search_cache is not None else None
+    }
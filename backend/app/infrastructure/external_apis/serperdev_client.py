@@ -1,7 +1,88 @@
-import requests
-from typing import List, Dict, Optional
+import asyncio
+import contextvars
+import math
+import re
+import threading
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Union
 from app.core.config import settings
 from app.models.schemas import Product
+from app.models.normalization import normalize_products, platform_from_domain, get_domain
+from app.infrastructure.llm.http_pool import get_http_pool
+from app.infrastructure.external_apis.rate_limiter import serper_rate_limiter, SerperRateLimitError
+
+
+class ShoppingFillHistory:
+    """
+    Tracks how often /shopping alone fills the requested number of results, per country,
+    to decide whether /search should be fired speculatively at the same time.
+    """
+    
+    # Weight of the latest observation in the moving average
+    ALPHA = 0.2
+    
+    def __init__(self):
+        """Initialize the history."""
+        self._short_rate: Dict[str, float] = {}  # country code -> EWMA of "shopping came back short"
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.searches = 0
+        self.speculative_searches = 0
+        self.organic_cancelled = 0
+        self.organic_followups = 0
+    
+    def should_speculate(self, country_code: str) -> bool:
+        """
+        Decide whether to fire /search together with /shopping.
+        
+        Args:
+            country_code: ISO country code (gl parameter)
+        
+        Returns:
+            True to fire both requests at once
+        """
+        mode = settings.serper_speculative_search
+        if mode == "always":
+            return True
+        if mode != "auto":
+            return False
+        short_rate = self._short_rate.get(country_code)
+        return short_rate is not None and short_rate >= settings.serper_speculation_threshold
+    
+    def record(self, country_code: str, shopping_was_short: bool):
+        """
+        Record whether /shopping came back short for a country.
+        
+        Args:
+            country_code: ISO country code
+            shopping_was_short: True if /shopping returned fewer than num_results products
+        """
+        value = 1.0 if shopping_was_short else 0.0
+        with self._lock:
+            previous = self._short_rate.get(country_code)
+            self._short_rate[country_code] = value if previous is None else previous + self.ALPHA * (value - previous)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get speculation statistics.
+        
+        Returns:
+            Dictionary with search counts and the per-country short rate
+        """
+        return {
+            "mode": settings.serper_speculative_search,
+            "searches": self.searches,
+            "speculative_searches": self.speculative_searches,
+            "organic_cancelled": self.organic_cancelled,
+            "organic_followups": self.organic_followups,
+            "shopping_short_rate": {code: round(rate, 3) for code, rate in self._short_rate.items()}
+        }
+
+
+# Shared by every SerperDevClient instance
+shopping_fill_history = ShoppingFillHistory()
 
 
 class SerperDevClient:
@@ -24,14 +105,37 @@ class SerperDevClient:
         "india": "in",
         "brazil": "br",
         "mexico": "mx",
+        "belgium": "be",
+        "belgique": "be",
+        "switzerland": "ch",
+        "suisse": "ch",
+        "netherlands": "nl",
+        "etats-unis": "us",
+        "états-unis": "us",
     }
     
+    # Separators between countries in a multi-country location (e.g., "canada/usa", "france et belgique")
+    COUNTRY_SEPARATORS = re.compile(r"\s*(?:[,;/&+|]|\band\b|\bet\b|\bor\b|\bou\b)\s*")
+    
+    # Threads issuing the per-country requests of sync multi-country searches
+    _country_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="serper-country")
+    
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.serper_api_key
         self.base_url = "https://google.serper.dev/search"
         self.shopping_url = "https://google.serper.dev/shopping"
+        # Shared keep-alive pool: no new TCP/TLS handshake per search
+        self.http_pool = get_http_pool(
+            "https://google.serper.dev",
+            max_connections=settings.serper_pool_max_connections,
+            connect_timeout=settings.serper_timeout,
+            read_timeout=settings.serper_timeout
+        )
+        # Shared token bucket and daily credit budget for the API key
+        self.rate_limiter = serper_rate_limiter
     
-    def _get_country_code(self, location: Optional[str] = None) -> str:
+    @classmethod
+    def _get_country_code(cls, location: Optional[str] = None) -> str:
         """
         Convert location name to ISO country code for SerperDev API.
         
@@ -41,84 +145,229 @@ class SerperDevClient:
         Returns:
             ISO country code (e.g., "ca", "fr") or "us" as default
         """
-        if not location:
-            return "us"  # Default to US
+        # If no match, default to US
+        return cls._match_country_code(location) or "us"
+    
+    @classmethod
+    def _match_country_code(cls, location: Optional[str] = None) -> Optional[str]:
+        """
+        Find the ISO country code of a location name.
         
-        location_lower = location.lower().strip()
+        Args:
+            location: Country name (e.g., "canada", "france")
+        
+        Returns:
+            ISO country code, or None if no country matches
+        """
+        location_lower = (location or "").lower().strip()
+        if not location_lower:
+            return None
         
         # Direct match
-        if location_lower in self.COUNTRY_CODES:
-            return self.COUNTRY_CODES[location_lower]
+        if location_lower in cls.COUNTRY_CODES:
+            return cls.COUNTRY_CODES[location_lower]
         
         # Check if location contains a country name
-        for country, code in self.COUNTRY_CODES.items():
+        for country, code in cls.COUNTRY_CODES.items():
             if country in location_lower or location_lower in country:
                 return code
         
-        # If no match, default to US
-        return "us"
+        return None
     
-    def search_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+    @classmethod
+    def _get_country_codes(cls, location: Union[str, List[str], None] = None) -> List[str]:
         """
-        Search products using SerperDev API.
+        Convert a location naming one or several countries to ISO country codes.
         
         Args:
-            query: Search query (e.g., "laptop gaming under 1500 dollars")
-            num_results: Number of results to return (default: 10)
-            location: Country or region (e.g., "canada", "france") - will set gl parameter
-            
+            location: Country name, several names (e.g., "canada/usa", "france, belgium") or a list of names
+        
         Returns:
-            List of Product objects
+            Distinct country codes in the order given (at most settings.serper_max_countries),
+            ["us"] if no country is recognized
         """
+        if not location:
+            return ["us"]
+        
+        names = location if isinstance(location, (list, tuple)) else cls.COUNTRY_SEPARATORS.split(location)
+        codes = []
+        for name in names:
+            # Parts that are not countries (e.g., a city) are skipped
+            code = cls._match_country_code(name)
+            if code and code not in codes:
+                codes.append(code)
+        
+        return codes[:max(settings.serper_max_countries, 1)] or ["us"]
+    
+    @classmethod
+    def _get_country_key(cls, location: Union[str, List[str], None] = None) -> str:
+        """Country part of cache and coalescing keys: country codes joined with "+" (e.g., "ca+us")."""
+        return "+".join(cls._get_country_codes(location))
+    
+    def _build_headers(self) -> Dict[str, str]:
+        """Build SerperDev request headers (validates the API key)."""
         if not self.api_key or self.api_key == "":
             raise ValueError("SerperDev API key is required. Set SERPER_API_KEY in .env")
         
-        headers = {
+        return {
             "X-API-KEY": self.api_key,
             "Content-Type": "application/json"
         }
+    
+    def _parse_shopping_results(self, data: Dict, products: List[Product], dedupe: bool = False) -> None:
+        """
+        Append products from the "shopping" array of a SerperDev response.
+        
+        Args:
+            data: Parsed SerperDev JSON response
+            products: List to append products to
+            dedupe: Skip items whose link or title is already in products
+        """
+        # Links and titles already found, kept in sets (one lookup per item instead of a scan)
+        links = {p.link for p in products} if dedupe else set()
+        titles = {p.name for p in products} if dedupe else set()
         
-        # Get country code for geographic targeting
-        country_code = self._get_country_code(location)
+        # SerperDev returns shopping results in "shopping" array (these have prices!)
+        for item in data.get("shopping", []):
+            # Check if we already have this product (by link or title)
+            if dedupe and (item.get("link") in links or item.get("title") in titles):
+                continue
+            
+            # Use "source" field for platform if available, otherwise extract from link
+            platform = item.get("source", "")
+            if not platform:
+                platform = self._extract_platform(item.get("link", ""))
+            
+            product = Product(
+                name=item.get("title", ""),
+                price=item.get("price", ""),  # Price is directly in "price" field
+                description=item.get("snippet", ""),
+                link=item.get("link", ""),
+                platform=platform,
+                image=item.get("imageUrl", "") if "imageUrl" in item else None
+            )
+            products.append(product)
+            if dedupe:
+                links.add(product.link)
+                titles.add(product.name)
+    
+    def _parse_organic_results(self, data: Dict, products: List[Product], num_results: int) -> None:
+        """
+        Append products from the "organic" array of a SerperDev response until num_results is reached.
+        
+        Args:
+            data: Parsed SerperDev JSON response
+            products: List to append products to
+            num_results: Target number of products
+        """
+        if len(products) >= num_results:
+            return
+        
+        links = {p.link for p in products}
+        for item in data.get("organic", []):
+            # Check if we already have this product
+            if item.get("link") not in links:
+                product = Product(
+                    name=item.get("title", ""),
+                    description=item.get("snippet", ""),
+                    link=item.get("link", ""),
+                    platform=self._extract_platform(item.get("link", "")),
+                    image=item.get("imageUrl") if "imageUrl" in item else None
+                )
+                products.append(product)
+                links.add(product.link)
+                if len(products) >= num_results:
+                    break
+    
+    def _build_payloads(self, query: str, num_results: int, country_code: str, found: int = 0):
+        """
+        Build the shopping and regular search payloads.
+        
+        Args:
+            query: Search query
+            num_results: Number of results requested
+            country_code: ISO country code (gl parameter)
+            found: Number of products already found (reduces the regular search size)
+        
+        Returns:
+            Tuple (shopping_payload, search_payload)
+        """
+        shopping_payload = {
+            "q": query,
+            "num": num_results,
+            "gl": country_code,  # Geographic location (country code)
+            "hl": "en"
+        }
+        search_payload = {
+            "q": f"{query} shopping buy",
+            "num": num_results - found,
+            "gl": country_code,  # Use same country code
+            "hl": "en"
+        }
+        return shopping_payload, search_payload
+    
+    def search_products(
+        self,
+        query: str,
+        num_results: int = 10,
+        location: Union[str, List[str], None] = None
+    ) -> List[Product]:
+        """
+        Search products using SerperDev API.
+        When the location names several countries, one search per country is issued
+        concurrently and the results are merged (see _merge_countries).
+        
+        Args:
+            query: Search query (e.g., "laptop gaming under 1500 dollars")
+            num_results: Number of results to return (default: 10)
+            location: Country or region (e.g., "canada", "france") - will set gl parameter;
+                several countries as a list or a string (e.g., "canada/usa")
+            
+        Returns:
+            List of Product objects
+        """
+        headers = self._build_headers()
         
+        # Get country codes for geographic targeting
+        country_codes = self._get_country_codes(location)
+        if len(country_codes) == 1:
+            return self._search_country(query, num_results, country_codes[0], headers)
+        
+        # Each thread runs in a copy of the caller's context (keeps the SerperDev request priority)
+        futures = [
+            self._country_executor.submit(
+                contextvars.copy_context().run, self._search_country, query, num_results, code, headers
+            )
+            for code in country_codes
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return self._merge_countries(results, num_results)
+    
+    def _search_country(self, query: str, num_results: int, country_code: str, headers: Dict[str, str]) -> List[Product]:
+        """
+        Search products in one country (/shopping, then /search for the missing results).
+        
+        Args:
+            query: Search query
+            num_results: Number of results to return
+            country_code: ISO country code (gl parameter)
+            headers: Request headers
+        
+        Returns:
+            List of Product objects
+        """
         products = []
         
         # Try Shopping endpoint first (better for products with prices)
         try:
-            shopping_payload = {
-                "q": query,
-                "num": num_results,
-                "gl": country_code,  # Geographic location (country code)
-                "hl": "en"
-            }
-            
-            shopping_response = requests.post(
-                self.shopping_url, 
-                json=shopping_payload, 
-                headers=headers,
-                timeout=10
-            )
-            shopping_response.raise_for_status()
-            shopping_data = shopping_response.json()
+            shopping_payload, _ = self._build_payloads(query, num_results, country_code)
             
-            # Parse shopping results (these have prices!)
-            # SerperDev shopping endpoint returns results in "shopping" array
-            if "shopping" in shopping_data:
-                for item in shopping_data["shopping"]:
-                    # Use "source" field for platform if available, otherwise extract from link
-                    platform = item.get("source", "")
-                    if not platform:
-                        platform = self._extract_platform(item.get("link", ""))
-                    
-                    product = Product(
-                        name=item.get("title", ""),
-                        price=item.get("price", ""),  # Price is directly in "price" field
-                        description=item.get("snippet", ""),
-                        link=item.get("link", ""),
-                        platform=platform,
-                        image=item.get("imageUrl", "") if "imageUrl" in item else None
-                    )
-                    products.append(product)
+            self._parse_shopping_results(self._post(self.shopping_url, shopping_payload, headers), products)
         except Exception as e:
             # If shopping endpoint fails, fall back to regular search
             pass
@@ -126,88 +375,206 @@ class SerperDevClient:
         # If we don't have enough results, try regular search
         if len(products) < num_results:
             try:
-                search_payload = {
-                    "q": f"{query} shopping buy",
-                    "num": num_results - len(products),
-                    "gl": country_code,  # Use same country code
-                    "hl": "en"
-                }
-                
-                search_response = requests.post(
-                    self.base_url, 
-                    json=search_payload, 
-                    headers=headers,
-                    timeout=10
-                )
-                search_response.raise_for_status()
-                search_data = search_response.json()
+                _, search_payload = self._build_payloads(query, num_results, country_code, found=len(products))
                 
-                # Parse shopping results from regular search
-                if "shopping" in search_data:
-                    for item in search_data["shopping"]:
-                        # Check if we already have this product (by link or title)
-                        if not any(p.link == item.get("link") or p.name == item.get("title") for p in products):
-                            platform = item.get("source", "")
-                            if not platform:
-                                platform = self._extract_platform(item.get("link", ""))
-                            
-                            product = Product(
-                                name=item.get("title", ""),
-                                price=item.get("price", ""),
-                                description=item.get("snippet", ""),
-                                link=item.get("link", ""),
-                                platform=platform,
-                                image=item.get("imageUrl", "") if "imageUrl" in item else None
-                            )
-                            products.append(product)
+                search_data = self._post(self.base_url, search_payload, headers)
                 
-                # Parse organic results if we still need more
-                if len(products) < num_results and "organic" in search_data:
-                    for item in search_data["organic"]:
-                        # Check if we already have this product
-                        if not any(p.link == item.get("link") for p in products):
-                            product = Product(
-                                name=item.get("title", ""),
-                                description=item.get("snippet", ""),
-                                link=item.get("link", ""),
-                                platform=self._extract_platform(item.get("link", "")),
-                                image=item.get("imageUrl") if "imageUrl" in item else None
-                            )
-                            products.append(product)
-                            if len(products) >= num_results:
-                                break
+                # Parse shopping results from regular search, then organic results if we still need more
+                self._parse_shopping_results(search_data, products, dedupe=True)
+                self._parse_organic_results(search_data, products, num_results)
+            except SerperRateLimitError:
+                # Refused before reaching SerperDev: callers tell it from a failed search
+                raise
             except Exception as e:
                 raise Exception(f"Error searching products: {str(e)}")
         
-        return products[:num_results]  # Limit to requested number
+        # Limit to requested number, then parse prices/platforms once for every consumer
+        return normalize_products(products[:num_results], country_code)
+    
+    def _post(self, url: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict:
+        """
+        POST a search request on the pooled client, once the rate limiter grants it.
+        
+        Args:
+            url: Endpoint URL
+            payload: JSON payload
+            headers: Request headers
+        
+        Returns:
+            Parsed JSON response
+        """
+        self.rate_limiter.acquire(self.rate_limiter.request_cost(payload["num"]))
+        response = self.http_pool.client.post(url, json=payload, headers=headers)
+        self._check_response(response)
+        return response.json()
+    
+    async def _apost(self, url: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict:
+        """
+        POST a search request on the pooled async client, once the rate limiter grants it.
+        
+        Args:
+            url: Endpoint URL
+            payload: JSON payload
+            headers: Request headers
+        
+        Returns:
+            Parsed JSON response
+        """
+        await self.rate_limiter.aacquire(self.rate_limiter.request_cost(payload["num"]))
+        response = await self.http_pool.async_client.post(url, json=payload, headers=headers)
+        self._check_response(response)
+        return response.json()
+    
+    def _check_response(self, response: httpx.Response):
+        """Raise for HTTP errors; a 429 also makes the rate limiter back off."""
+        if response.status_code == 429:
+            self.rate_limiter.record_throttled()
+        response.raise_for_status()
+    
+    async def asearch_products(
+        self,
+        query: str,
+        num_results: int = 10,
+        location: Union[str, List[str], None] = None
+    ) -> List[Product]:
+        """
+        Search products using SerperDev API without blocking the event loop.
+        Same results as search_products(), but when /shopping often comes back short
+        for this country (settings.serper_speculative_search), /search is fired at the
+        same time instead of after it, and cancelled if /shopping alone is enough.
+        
+        Args:
+            query: Search query (e.g., "laptop gaming under 1500 dollars")
+            num_results: Number of results to return (default: 10)
+            location: Country or region (e.g., "canada", "france") - will set gl parameter;
+                several countries as a list or a string (e.g., "canada/usa")
+        
+        Returns:
+            List of Product objects
+        """
+        headers = self._build_headers()
+        country_codes = self._get_country_codes(location)
+        if len(country_codes) == 1:
+            return await self._asearch_country(query, num_results, country_codes[0], headers)
+        
+        results = await asyncio.gather(
+            *(self._asearch_country(query, num_results, code, headers) for code in country_codes),
+            return_exceptions=True
+        )
+        return self._merge_countries(list(results), num_results)
+    
+    async def _asearch_country(self, query: str, num_results: int, country_code: str, headers: Dict[str, str]) -> List[Product]:
+        """
+        Async version of _search_country(), with speculative /search (see asearch_products).
+        
+        Args:
+            query: Search query
+            num_results: Number of results to return
+            country_code: ISO country code (gl parameter)
+            headers: Request headers
+        
+        Returns:
+            List of Product objects
+        """
+        shopping_payload, search_payload = self._build_payloads(query, num_results, country_code)
+        
+        history = shopping_fill_history
+        history.searches += 1
+        speculative = history.should_speculate(country_code)
+        
+        shopping_task = asyncio.create_task(self._apost(self.shopping_url, shopping_payload, headers))
+        search_task = None
+        if speculative:
+            history.speculative_searches += 1
+            search_task = asyncio.create_task(self._apost(self.base_url, search_payload, headers))
+        
+        products = []
+        
+        try:
+            # Shopping results come first (they have prices), whichever response arrives first
+            try:
+                self._parse_shopping_results(await shopping_task, products)
+            except Exception as e:
+                # If shopping endpoint fails, fall back to regular search
+                pass
+            
+            history.record(country_code, len(products) < num_results)
+                    
+            if len(products) >= num_results:
+                if search_task is not None and not search_task.done():
+                    search_task.cancel()
+                    history.organic_cancelled += 1
+                return normalize_products(products[:num_results], country_code)
+            
+            # Not speculative: regular search only for the missing results
+            if search_task is None:
+                history.organic_followups += 1
+                _, search_payload = self._build_payloads(query, num_results, country_code, found=len(products))
+                search_task = asyncio.create_task(self._apost(self.base_url, search_payload, headers))
+            
+            try:
+                search_data = await search_task
+            except SerperRateLimitError:
+                # Refused before reaching SerperDev: callers tell it from a failed search
+                raise
+            except Exception as e:
+                raise Exception(f"Error searching products: {str(e)}")
+            
+            self._parse_shopping_results(search_data, products, dedupe=True)
+            self._parse_organic_results(search_data, products, num_results)
+        finally:
+            # Caller cancelled or an error occurred: don't leave requests running
+            for task in (shopping_task, search_task):
+                if task is not None and not task.done():
+                    task.cancel()
+        
+        return normalize_products(products[:num_results], country_code)  # Limit to requested number
+    
+    def _merge_countries(self, results: List[Any], num_results: int) -> List[Product]:
+        """
+        Merge per-country results, deduplicated by link.
+        Each country first gets up to its quota (settings.serper_country_quota, or an
+        equal share of num_results), round-robin in country order; the remaining
+        places go to the countries that have more results.
+        
+        Args:
+            results: Products (or the exception raised) per country, in country order
+            num_results: Number of results to return
+        
+        Returns:
+            List of Product objects
+        """
+        queues = [list(result) for result in results if not isinstance(result, BaseException)]
+        if not queues:
+            errors = [result for result in results if isinstance(result, BaseException)]
+            raise errors[0]
+        
+        quota = settings.serper_country_quota or math.ceil(num_results / len(results))
+        taken = [0] * len(queues)
+        merged: List[Product] = []
+        seen = set()
+        
+        # First pass within quotas, then without
+        for limit in (quota, num_results):
+            progress = True
+            while len(merged) < num_results and progress:
+                progress = False
+                for index, queue in enumerate(queues):
+                    if taken[index] >= limit:
+                        continue
+                    while queue:
+                        product = queue.pop(0)
+                        if product.link not in seen:
+                            seen.add(product.link)
+                            merged.append(product)
+                            taken[index] += 1
+                            progress = True
+                            break
+                    if len(merged) >= num_results:
+                        break
+        
+        return merged
     
     def _extract_platform(self, url: str) -> str:
         """Extract platform name from URL."""
-        if not url:
-            return "Unknown"
-        
-        url_lower = url.lower()
-        
-        if "amazon" in url_lower:
-            return "Amazon"
-        elif "ebay" in url_lower:
-            return "eBay"
-        elif "walmart" in url_lower:
-            return "Walmart"
-        elif "bestbuy" in url_lower:
-            return "Best Buy"
-        elif "target" in url_lower:
-            return "Target"
-        elif "newegg" in url_lower:
-            return "Newegg"
-        else:
-            # Extract domain name
-            try:
-                from urllib.parse import urlparse
-                domain = urlparse(url).netloc
-                # Remove www. and get main domain
-                domain = domain.replace("www.", "").split(".")[0]
-                return domain.capitalize()
-            except:
-                return "Unknown"
-
+        return platform_from_domain(get_domain(url)) if url else "Unknown"
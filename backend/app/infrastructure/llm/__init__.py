@@ -7,6 +7,8 @@ from app.infrastructure.llm.factory import get_llm_provider
 from app.infrastructure.llm.ollama_provider import OllamaProvider
 from app.infrastructure.llm.deepseek_provider import DeepSeekProvider
 from app.infrastructure.llm.openai_provider import OpenAIProvider
+from app.infrastructure.llm.http_pool import HTTPConnectionPool, get_http_pool, get_pool_stats
+from app.infrastructure.llm.cache import CachedLLMProvider, with_response_cache, get_llm_cache_stats
 
 __all__ = [
     "LLMProvider",
@@ -14,5 +16,11 @@ __all__ = [
     "OllamaProvider",
     "DeepSeekProvider",
     "OpenAIProvider",
+    "HTTPConnectionPool",
+    "get_http_pool",
+    "get_pool_stats",
+    "CachedLLMProvider",
+    "with_response_cache",
+    "get_llm_cache_stats",
 ]
 
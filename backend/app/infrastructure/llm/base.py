@@ -3,8 +3,9 @@ Base class for LLM providers.
 All LLM providers must implement this interface.
 """
 
+import json
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
 
 
 class LLMProvider(ABC):
@@ -39,4 +40,103 @@ class LLMProvider(ABC):
             Parsed JSON response as dictionary
         """
         pass
-
+    
+    @abstractmethod
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """
+        Generate a response from the LLM without blocking the event loop.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+        
+        Returns:
+            Generated text response
+        """
+        pass
+    
+    @abstractmethod
+    async def agenerate_json(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Generate a JSON response from the LLM without blocking the event loop.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            **kwargs: Additional parameters
+        
+        Returns:
+            Parsed JSON response as dictionary
+        """
+        pass
+    
+    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        """
+        Generate a response from the LLM, yielding text chunks as they are produced.
+        Providers override this to stream tokens; the default yields the full completion at once.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+        
+        Yields:
+            Text chunks (concatenated they form the full response)
+        """
+        yield await self.agenerate(prompt, system_prompt, **kwargs)
+    
+    @staticmethod
+    async def _aiter_chat_completion_deltas(response) -> AsyncIterator[str]:
+        """
+        Parse an OpenAI-style streaming response (SSE "data:" lines) incrementally.
+        
+        Args:
+            response: Streaming httpx response
+        
+        Yields:
+            Content deltas
+        """
+        async for line in response.aiter_lines():
+            line = line.strip()
+            if not line.startswith("data:"):
+                continue
+            
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            
+            for choice in chunk.get("choices", []):
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    yield content
+    
+    @staticmethod
+    def _parse_json_response(response_text: str) -> Dict[str, Any]:
+        """
+        Parse a JSON response, removing markdown code fences if present.
+        
+        Args:
+            response_text: Raw text returned by the LLM
+        
+        Returns:
+            Parsed JSON response as dictionary
+        """
+        response_text = response_text.strip()
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]
+        if response_text.startswith("```"):
+            response_text = response_text[3:]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]
+        response_text = response_text.strip()
+        
+        try:
+            return json.loads(response_text)
+        except json.JSONDecodeError as e:
+            raise Exception(f"Failed to parse JSON response: {str(e)}\nResponse: {response_text}")
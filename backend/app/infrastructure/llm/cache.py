@@ -0,0 +1,246 @@
+"""
+Persistent LLM response cache.
+Wraps an LLMProvider so identical deterministic calls (same provider, model,
+system prompt, prompt and parameters) are answered from the cache.
+"""
+
+import hashlib
+import json
+from typing import Optional, Dict, Any, AsyncIterator
+from app.infrastructure.llm.base import LLMProvider
+from app.infrastructure.cache import TwoTierCache
+from app.core.config import settings
+
+
+def make_cache_key(provider: LLMProvider, method: str, prompt: str, system_prompt: Optional[str], params: Dict[str, Any]) -> str:
+    """
+    Build the cache key for an LLM call.
+    
+    Args:
+        provider: Provider answering the call
+        method: "text" or "json"
+        prompt: User prompt
+        system_prompt: System prompt
+        params: Generation parameters (model, temperature, ...)
+    
+    Returns:
+        SHA-256 hex digest
+    """
+    key_data = {
+        "provider": type(provider).__name__,
+        "model": getattr(provider, "model", None),
+        "base_url": getattr(provider, "base_url", None),
+        "method": method,
+        "system_prompt": system_prompt or "",
+        "prompt": prompt,
+        "params": params
+    }
+    raw = json.dumps(key_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CachedLLMProvider(LLMProvider):
+    """
+    LLMProvider decorator with a read-through response cache.
+    
+    Calls are cached only when they are deterministic enough to reuse:
+    passing use_cache=False, or a non-zero temperature, skips the cache.
+    """
+    
+    def __init__(self, provider: LLMProvider, cache: TwoTierCache, name: str, ttl: Optional[float] = None):
+        """
+        Initialize the cached provider.
+        
+        Args:
+            provider: Wrapped provider
+            cache: Shared response cache
+            name: Name used in metrics (e.g., the agent name)
+            ttl: Time-to-live of this agent's entries (default: cache.default_ttl)
+        """
+        self.provider = provider
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+    
+    def __getattr__(self, name: str):
+        """Expose the wrapped provider's attributes (model, http_pool, ...)."""
+        if name == "provider":
+            raise AttributeError(name)
+        return getattr(self.provider, name)
+    
+    def _cache_key(self, method: str, prompt: str, system_prompt: Optional[str], kwargs: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the cache key for a call, or None if the call must not be cached.
+        Pops the use_cache flag from kwargs.
+        """
+        use_cache = kwargs.pop("use_cache", True)
+        if not use_cache or kwargs.get("temperature", 0) not in (0, 0.0, None):
+            self.bypassed += 1
+            return None
+        return make_cache_key(self.provider, method, prompt, system_prompt, kwargs)
+    
+    def _record(self, hit: bool):
+        """Update hit/miss counters."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+    
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text, answering from the cache when possible."""
+        key = self._cache_key("text", prompt, system_prompt, kwargs)
+        if key is None:
+            return self.provider.generate(prompt, system_prompt, **kwargs)
+        
+        cached = self.cache.get(key)
+        self._record(cached is not None)
+        if cached is not None:
+            return cached
+        
+        result = self.provider.generate(prompt, system_prompt, **kwargs)
+        self.cache.set(key, result, self.ttl)
+        return result
+    
+    def generate_json(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Generate JSON, answering from the cache when possible."""
+        key = self._cache_key("json", prompt, system_prompt, kwargs)
+        if key is None:
+            return self.provider.generate_json(prompt, system_prompt, **kwargs)
+        
+        cached = self.cache.get(key)
+        self._record(cached is not None)
+        if cached is not None:
+            return cached
+        
+        result = self.provider.generate_json(prompt, system_prompt, **kwargs)
+        self.cache.set(key, result, self.ttl)
+        return result
+    
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Async generate(), answering from the cache when possible."""
+        key = self._cache_key("text", prompt, system_prompt, kwargs)
+        if key is None:
+            return await self.provider.agenerate(prompt, system_prompt, **kwargs)
+        
+        cached = await self.cache.aget(key)
+        self._record(cached is not None)
+        if cached is not None:
+            return cached
+        
+        result = await self.provider.agenerate(prompt, system_prompt, **kwargs)
+        await self.cache.aset(key, result, self.ttl)
+        return result
+    
+    async def agenerate_json(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Async generate_json(), answering from the cache when possible."""
+        key = self._cache_key("json", prompt, system_prompt, kwargs)
+        if key is None:
+            return await self.provider.agenerate_json(prompt, system_prompt, **kwargs)
+        
+        cached = await self.cache.aget(key)
+        self._record(cached is not None)
+        if cached is not None:
+            return cached
+        
+        result = await self.provider.agenerate_json(prompt, system_prompt, **kwargs)
+        await self.cache.aset(key, result, self.ttl)
+        return result
+    
+    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream text; a cache hit is yielded as a single chunk."""
+        key = self._cache_key("text", prompt, system_prompt, kwargs)
+        if key is None:
+            async for chunk in self.provider.generate_stream(prompt, system_prompt, **kwargs):
+                yield chunk
+            return
+        
+        cached = await self.cache.aget(key)
+        self._record(cached is not None)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        async for chunk in self.provider.generate_stream(prompt, system_prompt, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        # Only complete streams are stored
+        await self.cache.aset(key, "".join(chunks), self.ttl)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics for this provider.
+        
+        Returns:
+            Dictionary with hits, misses, bypassed calls and hit rate
+        """
+        total = self.hits + self.misses
+        return {
+            "ttl": self.ttl if self.ttl is not None else self.cache.default_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / total, 3) if total else None
+        }
+
+
+# Global response cache shared by every cached provider
+_llm_cache: Optional[TwoTierCache] = None
+_cached_providers: Dict[str, CachedLLMProvider] = {}
+
+
+def get_llm_cache() -> TwoTierCache:
+    """
+    Get the shared LLM response cache (created on first use).
+    
+    Returns:
+        TwoTierCache instance (namespace "llm")
+    """
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = TwoTierCache(
+            namespace="llm",
+            default_ttl=settings.llm_cache_default_ttl,
+            max_memory_entries=settings.llm_cache_max_memory_entries,
+            max_persisted_entries=settings.llm_cache_max_persisted_entries
+        )
+    return _llm_cache
+
+
+def with_response_cache(provider: LLMProvider, name: str, ttl: Optional[float] = None) -> LLMProvider:
+    """
+    Wrap a provider with the shared response cache (no-op if disabled in settings).
+    
+    Args:
+        provider: Provider to wrap
+        name: Name used in metrics (e.g., "query_understanding")
+        ttl: Time-to-live of this agent's entries in seconds
+    
+    Returns:
+        CachedLLMProvider, or the provider itself if caching is disabled
+    """
+    if not settings.llm_cache_enabled or isinstance(provider, CachedLLMProvider):
+        return provider
+    
+    cached = CachedLLMProvider(provider, get_llm_cache(), name=name, ttl=ttl)
+    _cached_providers[name] = cached
+    return cached
+
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    """
+    Get LLM cache statistics.
+    
+    Returns:
+        Dictionary with the shared cache statistics and per-agent counters
+    """
+    return {
+        "enabled": settings.llm_cache_enabled,
+        "cache": _llm_cache.stats() if _llm_cache is not None else None,
+        "agents": {name: provider.stats() for name, provider in list(_cached_providers.items())}
+    }
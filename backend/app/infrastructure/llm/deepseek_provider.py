@@ -2,10 +2,10 @@
 DeepSeek LLM Provider
 """
 
-import json
-import requests
-from typing import Optional, Dict, Any
+import httpx
+from typing import Optional, Dict, Any, Tuple, AsyncIterator
 from app.infrastructure.llm.base import LLMProvider
+from app.infrastructure.llm.http_pool import get_http_pool
 from app.core.config import settings
 
 
@@ -16,12 +16,14 @@ class DeepSeekProvider(LLMProvider):
         self.api_key = api_key or settings.deepseek_api_key
         self.base_url = base_url or settings.deepseek_base_url
         self.api_url = f"{self.base_url}/v1/chat/completions"
+        # Shared keep-alive pool: no new TCP/TLS handshake per call
+        self.http_pool = get_http_pool(self.base_url)
         
         if not self.api_key:
             raise ValueError("DeepSeek API key is required. Set DEEPSEEK_API_KEY in .env")
     
-    def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
-        """Generate text using DeepSeek."""
+    def _build_request(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Build the chat completions payload and headers."""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -38,12 +40,18 @@ class DeepSeekProvider(LLMProvider):
             "Content-Type": "application/json"
         }
         
+        return payload, headers
+    
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text using DeepSeek."""
+        payload, headers = self._build_request(prompt, system_prompt, **kwargs)
+        
         try:
-            response = requests.post(self.api_url, json=payload, headers=headers, timeout=60)
+            response = self.http_pool.client.post(self.api_url, json=payload, headers=headers)
             response.raise_for_status()
             data = response.json()
             return data["choices"][0]["message"]["content"]
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise Exception(f"DeepSeek API error: {str(e)}")
     
     def generate_json(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
@@ -52,18 +60,37 @@ class DeepSeekProvider(LLMProvider):
         
         response_text = self.generate(prompt, json_system_prompt, **kwargs)
         
-        # Clean response
-        response_text = response_text.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+        return self._parse_json_response(response_text)
+    
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text using DeepSeek without blocking the event loop."""
+        payload, headers = self._build_request(prompt, system_prompt, **kwargs)
         
         try:
-            return json.loads(response_text)
-        except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse JSON response: {str(e)}\nResponse: {response_text}")
-
+            response = await self.http_pool.async_client.post(self.api_url, json=payload, headers=headers)
+            response.raise_for_status()
+            data = response.json()
+            return data["choices"][0]["message"]["content"]
+        except httpx.HTTPError as e:
+            raise Exception(f"DeepSeek API error: {str(e)}")
+    
+    async def agenerate_json(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Generate JSON response using DeepSeek without blocking the event loop."""
+        json_system_prompt = (system_prompt or "") + "\n\nRespond ONLY with valid JSON, no other text."
+        
+        response_text = await self.agenerate(prompt, json_system_prompt, **kwargs)
+        
+        return self._parse_json_response(response_text)
+    
+    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream text deltas from DeepSeek (server-sent events, parsed line by line)."""
+        payload, headers = self._build_request(prompt, system_prompt, **kwargs)
+        payload["stream"] = True
+        
+        try:
+            async with self.http_pool.async_client.stream("POST", self.api_url, json=payload, headers=headers) as response:
+                response.raise_for_status()
+                async for delta in self._aiter_chat_completion_deltas(response):
+                    yield delta
+        except httpx.HTTPError as e:
+            raise Exception(f"DeepSeek API error: {str(e)}")
@@ -0,0 +1,239 @@
+"""
+Shared keep-alive HTTP connection pools for LLM providers.
+One pool per base URL, reused by every request so TCP/TLS handshakes stay off the hot path.
+"""
+
+import asyncio
+import importlib.util
+import threading
+from typing import Dict, Any, Optional
+
+import httpx
+
+from app.core.config import settings
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional 'h2' package (pip install httpx[http2])."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class HTTPConnectionPool:
+    """
+    Keep-alive connection pool for one base URL.
+    Provides a sync client (generate) and an async client (agenerate / generate_stream)
+    and counts new connections vs requests to measure reuse.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        pool_timeout: Optional[float] = None,
+        http2: Optional[bool] = None
+    ):
+        """
+        Initialize the pool (clients are created lazily).
+        
+        Args:
+            base_url: Base URL served by this pool (e.g., "https://api.openai.com")
+            max_connections: Maximum number of open connections
+            max_keepalive_connections: Maximum number of idle keep-alive connections
+            keepalive_expiry: Seconds an idle connection is kept open
+            connect_timeout: TCP/TLS connect timeout in seconds
+            read_timeout: Read timeout in seconds (time between two received chunks)
+            pool_timeout: Seconds a request waits for a free connection when max_connections
+                are busy (default: settings.llm_pool_timeout, or the read timeout)
+            http2: Use HTTP/2 when the server and the 'h2' package support it
+        """
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.llm_pool_max_connections,
+            max_keepalive_connections=max_keepalive_connections or settings.llm_pool_max_keepalive,
+            keepalive_expiry=keepalive_expiry if keepalive_expiry is not None else settings.llm_pool_keepalive_expiry
+        )
+        read_timeout = read_timeout or settings.llm_read_timeout
+        # Waiting for a busy pool is waiting for another request to finish, not for a connect
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout or settings.llm_connect_timeout,
+            read=read_timeout,
+            write=connect_timeout or settings.llm_connect_timeout,
+            pool=pool_timeout or settings.llm_pool_timeout or read_timeout
+        )
+        self.http2 = (settings.llm_http2 if http2 is None else http2) and _http2_available()
+        
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop = None
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.async_clients_replaced = 0
+    
+    @property
+    def client(self) -> httpx.Client:
+        """Sync client sharing this pool's limits and timeouts."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        limits=self.limits,
+                        timeout=self.timeout,
+                        http2=self.http2,
+                        event_hooks={"request": [self._on_request]}
+                    )
+        return self._client
+    
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Async client sharing this pool's limits and timeouts (one per event loop)."""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            with self._lock:
+                if self._async_client is None or self._async_loop is not loop:
+                    # Connections are bound to the loop that opened them
+                    previous, previous_loop = self._async_client, self._async_loop
+                    self._async_client = httpx.AsyncClient(
+                        limits=self.limits,
+                        timeout=self.timeout,
+                        http2=self.http2,
+                        event_hooks={"request": [self._on_async_request]}
+                    )
+                    self._async_loop = loop
+                    if previous is not None:
+                        self._retire_async_client(previous, previous_loop)
+        return self._async_client
+    
+    def _retire_async_client(self, client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        """
+        Close an async client replaced after an event loop change.
+        
+        Args:
+            client: Replaced client
+            loop: Event loop its connections belong to
+        """
+        self.async_clients_replaced += 1
+        if loop.is_closed():
+            # aclose() can no longer run; the loop's transports close their sockets when collected
+            return
+        # Close it on its own loop (another thread, or whenever that loop runs again)
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    
+    def _record(self, event_name: str):
+        """Count connection events reported by httpcore."""
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+    
+    def _on_request(self, request: httpx.Request):
+        """Sync request hook: count the request and trace connection setup."""
+        self.requests += 1
+        
+        def trace(event_name: str, info: Dict[str, Any]):
+            self._record(event_name)
+        
+        request.extensions["trace"] = trace
+    
+    async def _on_async_request(self, request: httpx.Request):
+        """Async request hook: count the request and trace connection setup."""
+        self.requests += 1
+        
+        async def trace(event_name: str, info: Dict[str, Any]):
+            self._record(event_name)
+        
+        request.extensions["trace"] = trace
+    
+    def _open_connections(self, client) -> int:
+        """Number of open connections held by a client's transport."""
+        if client is None:
+            return 0
+        try:
+            connections = client._transport._pool.connections
+            return sum(1 for connection in connections if not connection.is_closed())
+        except AttributeError:
+            return 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+        
+        Returns:
+            Dictionary with open connections, request/connection counters and reuse ratio
+        """
+        reuse_ratio = 1 - (self.connections_opened / self.requests) if self.requests else None
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "open_connections": self._open_connections(self._client) + self._open_connections(self._async_client),
+            "max_connections": self.limits.max_connections,
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "async_clients_replaced": self.async_clients_replaced,
+            "reuse_ratio": round(max(reuse_ratio, 0.0), 3) if reuse_ratio is not None else None
+        }
+    
+    async def aclose(self):
+        """Close both clients and their connections."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._async_client is not None:
+            try:
+                await self._async_client.aclose()
+            except RuntimeError:
+                # Client belongs to another (closed) event loop
+                pass
+            self._async_client = None
+
+
+# Global pools, one per base URL
+_pools: Dict[str, HTTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_http_pool(base_url: str, **options) -> HTTPConnectionPool:
+    """
+    Get the shared connection pool for a base URL (created on first use).
+    
+    Args:
+        base_url: Base URL (e.g., settings.ollama_base_url)
+        **options: HTTPConnectionPool options, used when the pool is created
+    
+    Returns:
+        HTTPConnectionPool instance
+    """
+    key = base_url.rstrip("/")
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = HTTPConnectionPool(key, **options)
+                _pools[key] = pool
+    return pool
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get statistics for every pool.
+    
+    Returns:
+        Dictionary base_url -> pool statistics
+    """
+    return {base_url: pool.stats() for base_url, pool in list(_pools.items())}
+
+
+async def aclose_http_pools():
+    """Close every pool (called on application shutdown)."""
+    for pool in list(_pools.values()):
+        await pool.aclose()
+    _pools.clear()
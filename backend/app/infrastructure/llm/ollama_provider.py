@@ -3,9 +3,10 @@ Ollama LLM Provider
 """
 
 import json
-import requests
-from typing import Optional, Dict, Any
+import httpx
+from typing import Optional, Dict, Any, AsyncIterator
 from app.infrastructure.llm.base import LLMProvider
+from app.infrastructure.llm.http_pool import get_http_pool
 from app.core.config import settings
 
 
@@ -16,26 +17,32 @@ class OllamaProvider(LLMProvider):
         self.base_url = base_url or settings.ollama_base_url
         self.model = model or settings.ollama_model
         self.api_url = f"{self.base_url}/api/generate"
+        # Shared keep-alive pool: no new TCP connection per call
+        self.http_pool = get_http_pool(self.base_url)
     
-    def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
-        """Generate text using Ollama."""
+    def _build_payload(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Build the /api/generate payload."""
         full_prompt = prompt
         if system_prompt:
             full_prompt = f"{system_prompt}\n\n{prompt}"
         
-        payload = {
+        return {
             "model": self.model,
             "prompt": full_prompt,
             "stream": False,
             **kwargs
         }
+    
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text using Ollama."""
+        payload = self._build_payload(prompt, system_prompt, **kwargs)
         
         try:
-            response = requests.post(self.api_url, json=payload, timeout=60)
+            response = self.http_pool.client.post(self.api_url, json=payload)
             response.raise_for_status()
             data = response.json()
             return data.get("response", "")
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise Exception(f"Ollama API error: {str(e)}")
     
     def generate_json(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
@@ -45,17 +52,45 @@ class OllamaProvider(LLMProvider):
         response_text = self.generate(json_prompt, system_prompt, **kwargs)
         
         # Clean response (remove markdown code blocks if present)
-        response_text = response_text.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+        return self._parse_json_response(response_text)
+    
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text using Ollama without blocking the event loop."""
+        payload = self._build_payload(prompt, system_prompt, **kwargs)
         
         try:
-            return json.loads(response_text)
-        except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse JSON response: {str(e)}\nResponse: {response_text}")
-
+            response = await self.http_pool.async_client.post(self.api_url, json=payload)
+            response.raise_for_status()
+            data = response.json()
+            return data.get("response", "")
+        except httpx.HTTPError as e:
+            raise Exception(f"Ollama API error: {str(e)}")
+    
+    async def agenerate_json(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Generate JSON response using Ollama without blocking the event loop."""
+        json_prompt = f"{prompt}\n\nRespond ONLY with valid JSON, no other text."
+        
+        response_text = await self.agenerate(json_prompt, system_prompt, **kwargs)
+        
+        return self._parse_json_response(response_text)
+    
+    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream text chunks from Ollama (NDJSON, one object per line)."""
+        payload = self._build_payload(prompt, system_prompt, **kwargs)
+        payload["stream"] = True
+        
+        try:
+            async with self.http_pool.async_client.stream("POST", self.api_url, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise Exception(f"Ollama API error: {chunk['error']}")
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+        except httpx.HTTPError as e:
+            raise Exception(f"Ollama API error: {str(e)}")
@@ -2,10 +2,10 @@
 OpenAI LLM Provider
 """
 
-import json
-import requests
-from typing import Optional, Dict, Any
+import httpx
+from typing import Optional, Dict, Any, Tuple, AsyncIterator
 from app.infrastructure.llm.base import LLMProvider
+from app.infrastructure.llm.http_pool import get_http_pool
 from app.core.config import settings
 
 
@@ -15,12 +15,14 @@ class OpenAIProvider(LLMProvider):
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.openai_api_key
         self.api_url = "https://api.openai.com/v1/chat/completions"
+        # Shared keep-alive pool: no new TCP/TLS handshake per call
+        self.http_pool = get_http_pool("https://api.openai.com")
         
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY in .env")
     
-    def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
-        """Generate text using OpenAI."""
+    def _build_request(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Build the chat completions payload and headers."""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -37,12 +39,18 @@ class OpenAIProvider(LLMProvider):
             "Content-Type": "application/json"
         }
         
+        return payload, headers
+    
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text using OpenAI."""
+        payload, headers = self._build_request(prompt, system_prompt, **kwargs)
+        
         try:
-            response = requests.post(self.api_url, json=payload, headers=headers, timeout=60)
+            response = self.http_pool.client.post(self.api_url, json=payload, headers=headers)
             response.raise_for_status()
             data = response.json()
             return data["choices"][0]["message"]["content"]
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise Exception(f"OpenAI API error: {str(e)}")
     
     def generate_json(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
@@ -54,18 +62,40 @@ class OpenAIProvider(LLMProvider):
         
         response_text = self.generate(prompt, json_system_prompt, **kwargs_with_json)
         
-        # Clean response
-        response_text = response_text.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
+        return self._parse_json_response(response_text)
+    
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Generate text using OpenAI without blocking the event loop."""
+        payload, headers = self._build_request(prompt, system_prompt, **kwargs)
         
         try:
-            return json.loads(response_text)
-        except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse JSON response: {str(e)}\nResponse: {response_text}")
-
+            response = await self.http_pool.async_client.post(self.api_url, json=payload, headers=headers)
+            response.raise_for_status()
+            data = response.json()
+            return data["choices"][0]["message"]["content"]
+        except httpx.HTTPError as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+    
+    async def agenerate_json(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Generate JSON response using OpenAI without blocking the event loop."""
+        json_system_prompt = (system_prompt or "") + "\n\nRespond ONLY with valid JSON, no other text."
+        
+        # Use response_format for JSON mode if available
+        kwargs_with_json = {**kwargs, "response_format": {"type": "json_object"}}
+        
+        response_text = await self.agenerate(prompt, json_system_prompt, **kwargs_with_json)
+        
+        return self._parse_json_response(response_text)
+    
+    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream text deltas from OpenAI (server-sent events, parsed line by line)."""
+        payload, headers = self._build_request(prompt, system_prompt, **kwargs)
+        payload["stream"] = True
+        
+        try:
+            async with self.http_pool.async_client.stream("POST", self.api_url, json=payload, headers=headers) as response:
+                response.raise_for_status()
+                async for delta in self._aiter_chat_completion_deltas(response):
+                    yield delta
+        except httpx.HTTPError as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
@@ -0,0 +1,20 @@
+"""
+Product Sources Module
+"""
+
+from app.infrastructure.product_sources.base import ProductSource
+from app.infrastructure.product_sources.serper_source import SerperSource
+from app.infrastructure.product_sources.ebay_source import EbaySource
+from app.infrastructure.product_sources.bestbuy_source import BestBuySource
+from app.infrastructure.product_sources.fan_out import ProductSearchFanOut
+from app.infrastructure.product_sources.factory import get_product_search, get_product_source_stats
+
+__all__ = [
+    "ProductSource",
+    "SerperSource",
+    "EbaySource",
+    "BestBuySource",
+    "ProductSearchFanOut",
+    "get_product_search",
+    "get_product_source_stats",
+]
@@ -0,0 +1,50 @@
+"""
+Base class for product sources.
+All product sources (SerperDev, eBay Browse, Best Buy, ...) must implement this interface.
+"""
+
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from app.models.schemas import Product
+
+
+class ProductSource(ABC):
+    """Base class for all product sources."""
+    
+    # Short source name used in settings.product_sources and metrics
+    name: str = ""
+    
+    @property
+    def enabled(self) -> bool:
+        """True if the source is configured (credentials present)."""
+        return True
+    
+    @abstractmethod
+    def search_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """
+        Search products.
+        
+        Args:
+            query: Search query
+            num_results: Number of results to return
+            location: Country or region (e.g., "canada", "france")
+        
+        Returns:
+            List of Product objects
+        """
+        pass
+    
+    @abstractmethod
+    async def asearch_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """
+        Search products without blocking the event loop.
+        
+        Args:
+            query: Search query
+            num_results: Number of results to return
+            location: Country or region (e.g., "canada", "france")
+        
+        Returns:
+            List of Product objects
+        """
+        pass
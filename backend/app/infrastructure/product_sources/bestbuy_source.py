@@ -0,0 +1,125 @@
+"""
+Best Buy Products API product source (United States only).
+"""
+
+import re
+from typing import List, Dict, Optional, Any
+from app.core.config import settings
+from app.models.schemas import Product
+from app.models.normalization import normalize_products
+from app.infrastructure.llm.http_pool import get_http_pool
+from app.infrastructure.external_apis.serperdev_client import SerperDevClient
+from app.infrastructure.product_sources.base import ProductSource
+
+
+class BestBuySource(ProductSource):
+    """Product source backed by the Best Buy Products API (keyword search)."""
+    
+    name = "bestbuy"
+    
+    # The Products API only covers bestbuy.com
+    COUNTRY_CODES = {"us"}
+    
+    SHOW_FIELDS = "sku,name,salePrice,url,image,shortDescription"
+    
+    # Words of the built search query that are not product keywords (every search= term must match)
+    IGNORED_WORDS = {
+        "under", "above", "below", "less", "more", "than", "dollars", "dollar", "euros", "euro",
+        "for", "with", "and", "the", "a", "an", "of", "in", "to", "buy", "cheap", "best", "new", "used"
+    }
+    
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        """
+        Initialize the source.
+        
+        Args:
+            api_key: Best Buy API key (default: settings.bestbuy_api_key)
+            base_url: API base URL (default: settings.bestbuy_api_base_url, e.g. a local stub server)
+        """
+        self.api_key = api_key or settings.bestbuy_api_key
+        self.base_url = (base_url or settings.bestbuy_api_base_url).rstrip("/")
+        self.http_pool = get_http_pool(
+            self.base_url,
+            connect_timeout=settings.product_search_deadline,
+            read_timeout=settings.product_search_deadline
+        )
+    
+    @property
+    def enabled(self) -> bool:
+        """True if a Best Buy API key is configured."""
+        return bool(self.api_key)
+    
+    def search_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """Search products on Best Buy (empty outside the United States)."""
+        url = self._search_url(query)
+        if url is None or self.COUNTRY_CODES.isdisjoint(SerperDevClient._get_country_codes(location)):
+            return []
+        
+        response = self.http_pool.client.get(url, params=self._search_params(num_results))
+        response.raise_for_status()
+        return self._parse_products(response.json())
+    
+    async def asearch_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """Async version of search_products()."""
+        url = self._search_url(query)
+        if url is None or self.COUNTRY_CODES.isdisjoint(SerperDevClient._get_country_codes(location)):
+            return []
+        
+        response = await self.http_pool.async_client.get(url, params=self._search_params(num_results))
+        response.raise_for_status()
+        return self._parse_products(response.json())
+    
+    def _search_url(self, query: str) -> Optional[str]:
+        """
+        Build the keyword search URL: /v1/products(search=word1&search=word2).
+        
+        Args:
+            query: Search query
+        
+        Returns:
+            URL, or None if the query has no searchable word
+        """
+        words = [
+            word for word in re.findall(r"[a-z][\w-]*", query.lower())
+            if word not in self.IGNORED_WORDS
+        ]
+        if not words:
+            return None
+        return self.base_url + "/v1/products(" + "&".join(f"search={word}" for word in words) + ")"
+    
+    def _search_params(self, num_results: int) -> Dict[str, Any]:
+        """Build the query parameters (validates the API key)."""
+        if not self.api_key:
+            raise ValueError("Best Buy API key is required. Set BESTBUY_API_KEY in .env")
+        
+        return {
+            "apiKey": self.api_key,
+            "format": "json",
+            "pageSize": num_results,
+            "show": self.SHOW_FIELDS
+        }
+    
+    def _parse_products(self, data: Dict[str, Any]) -> List[Product]:
+        """
+        Convert a Products API response into products.
+        
+        Args:
+            data: Parsed JSON response
+        
+        Returns:
+            List of Product objects
+        """
+        products = []
+        for item in data.get("products", []):
+            if not item.get("url"):
+                continue
+            sale_price = item.get("salePrice")
+            products.append(Product(
+                name=item.get("name", ""),
+                price=f"${sale_price:.2f}" if isinstance(sale_price, (int, float)) else None,
+                description=item.get("shortDescription"),
+                link=item["url"],
+                platform="Best Buy",
+                image=item.get("image")
+            ))
+        return normalize_products(products, "us")
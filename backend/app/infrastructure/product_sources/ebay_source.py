@@ -0,0 +1,175 @@
+"""
+eBay Browse API product source.
+Uses an application token (OAuth client credentials), cached until it expires.
+"""
+
+import base64
+import threading
+import time
+from typing import List, Dict, Optional, Any
+from app.core.config import settings
+from app.models.schemas import Product
+from app.models.normalization import normalize_product
+from app.infrastructure.llm.http_pool import get_http_pool
+from app.infrastructure.external_apis.serperdev_client import SerperDevClient
+from app.infrastructure.product_sources.base import ProductSource
+
+
+class EbaySource(ProductSource):
+    """Product source backed by the eBay Browse API (item_summary/search)."""
+    
+    name = "ebay"
+    
+    # ISO country code -> eBay marketplace
+    MARKETPLACES = {
+        "us": "EBAY_US",
+        "ca": "EBAY_CA",
+        "gb": "EBAY_GB",
+        "fr": "EBAY_FR",
+        "de": "EBAY_DE",
+        "es": "EBAY_ES",
+        "it": "EBAY_IT",
+        "au": "EBAY_AU",
+    }
+    
+    CURRENCY_SYMBOLS = {"USD": "$", "CAD": "$", "AUD": "$", "EUR": "€", "GBP": "£"}
+    
+    OAUTH_SCOPE = "https://api.ebay.com/oauth/api_scope"
+    
+    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None, base_url: Optional[str] = None):
+        """
+        Initialize the source.
+        
+        Args:
+            client_id: eBay application client ID (default: settings.ebay_client_id)
+            client_secret: eBay application client secret (default: settings.ebay_client_secret)
+            base_url: API base URL (default: settings.ebay_api_base_url, e.g. a local stub server)
+        """
+        self.client_id = client_id or settings.ebay_client_id
+        self.client_secret = client_secret or settings.ebay_client_secret
+        self.base_url = (base_url or settings.ebay_api_base_url).rstrip("/")
+        self.http_pool = get_http_pool(
+            self.base_url,
+            connect_timeout=settings.product_search_deadline,
+            read_timeout=settings.product_search_deadline
+        )
+        
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        """True if eBay credentials are configured."""
+        return bool(self.client_id and self.client_secret)
+    
+    def search_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """Search products on the eBay marketplace of the (first) country of the location (empty if eBay has none)."""
+        marketplace = self.MARKETPLACES.get(SerperDevClient._get_country_codes(location)[0])
+        if marketplace is None:
+            return []
+        
+        with self._token_lock:
+            if not self._token_is_valid():
+                response = self.http_pool.client.post(self.base_url + "/identity/v1/oauth2/token", **self._token_request())
+                response.raise_for_status()
+                self._store_token(response.json())
+            token = self._token
+        
+        response = self.http_pool.client.get(
+            self.base_url + "/buy/browse/v1/item_summary/search",
+            params=self._search_params(query, num_results),
+            headers=self._search_headers(token, marketplace)
+        )
+        response.raise_for_status()
+        return self._parse_items(response.json())
+    
+    async def asearch_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """Async version of search_products()."""
+        marketplace = self.MARKETPLACES.get(SerperDevClient._get_country_codes(location)[0])
+        if marketplace is None:
+            return []
+        
+        if not self._token_is_valid():
+            # Concurrent requests may each fetch a token: harmless, the last one is kept
+            response = await self.http_pool.async_client.post(self.base_url + "/identity/v1/oauth2/token", **self._token_request())
+            response.raise_for_status()
+            self._store_token(response.json())
+        
+        response = await self.http_pool.async_client.get(
+            self.base_url + "/buy/browse/v1/item_summary/search",
+            params=self._search_params(query, num_results),
+            headers=self._search_headers(self._token, marketplace)
+        )
+        response.raise_for_status()
+        return self._parse_items(response.json())
+    
+    def _token_is_valid(self) -> bool:
+        """True if the cached token is still valid for at least a minute."""
+        return self._token is not None and time.time() < self._token_expires_at - 60
+    
+    def _token_request(self) -> Dict[str, Any]:
+        """Build the client credentials token request (httpx post() arguments)."""
+        if not self.enabled:
+            raise ValueError("eBay credentials are required. Set EBAY_CLIENT_ID and EBAY_CLIENT_SECRET in .env")
+        
+        credentials = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+        return {
+            "data": {"grant_type": "client_credentials", "scope": self.OAUTH_SCOPE},
+            "headers": {
+                "Authorization": f"Basic {credentials}",
+                "Content-Type": "application/x-www-form-urlencoded"
+            }
+        }
+    
+    def _store_token(self, data: Dict[str, Any]):
+        """Cache the token returned by the token endpoint."""
+        self._token = data["access_token"]
+        self._token_expires_at = time.time() + float(data.get("expires_in", 7200))
+    
+    def _search_params(self, query: str, num_results: int) -> Dict[str, Any]:
+        """Build the item_summary/search query parameters."""
+        return {"q": query, "limit": num_results}
+    
+    def _search_headers(self, token: str, marketplace: str) -> Dict[str, str]:
+        """Build the item_summary/search headers."""
+        return {
+            "Authorization": f"Bearer {token}",
+            "X-EBAY-C-MARKETPLACE-ID": marketplace
+        }
+    
+    def _parse_items(self, data: Dict[str, Any]) -> List[Product]:
+        """
+        Convert an item_summary/search response into products.
+        
+        Args:
+            data: Parsed JSON response
+        
+        Returns:
+            List of Product objects
+        """
+        products = []
+        for item in data.get("itemSummaries", []):
+            if not item.get("itemWebUrl"):
+                continue
+            product = Product(
+                name=item.get("title", ""),
+                price=self._format_price(item.get("price")),
+                description=item.get("shortDescription") or item.get("condition"),
+                link=item["itemWebUrl"],
+                platform="eBay",
+                image=(item.get("image") or {}).get("imageUrl")
+            )
+            # eBay gives the ISO currency: "$" is resolved with it
+            normalize_product(product, (item.get("price") or {}).get("currency"))
+            products.append(product)
+        return products
+    
+    def _format_price(self, price: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Format an eBay price ({"value": "12.34", "currency": "USD"}) like SerperDev prices."""
+        if not price or not price.get("value"):
+            return None
+        symbol = self.CURRENCY_SYMBOLS.get(price.get("currency", ""))
+        if symbol:
+            return f"{symbol}{price['value']}"
+        return f"{price['value']} {price.get('currency', '')}".strip()
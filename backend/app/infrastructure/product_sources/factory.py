@@ -0,0 +1,56 @@
+"""
+Factory building the multi-source product search from settings.
+"""
+
+from typing import List, Dict, Any
+from app.core.config import settings
+from app.infrastructure.product_sources.base import ProductSource
+from app.infrastructure.product_sources.serper_source import SerperSource
+from app.infrastructure.product_sources.ebay_source import EbaySource
+from app.infrastructure.product_sources.bestbuy_source import BestBuySource
+from app.infrastructure.product_sources.fan_out import ProductSearchFanOut
+
+
+# Fan-outs built by get_product_search(), for metrics
+_fan_outs: List[ProductSearchFanOut] = []
+
+
+def get_product_search(serper_client) -> ProductSearchFanOut:
+    """
+    Build the multi-source product search listed in settings.product_sources.
+    
+    Args:
+        serper_client: SerperDev client used by the "serper" source (plain or cached)
+    
+    Returns:
+        ProductSearchFanOut over the listed sources, in the listed order
+        (sources without credentials are skipped at search time)
+    """
+    factories = {
+        "serper": lambda: SerperSource(serper_client),
+        "ebay": EbaySource,
+        "bestbuy": BestBuySource,
+    }
+    
+    sources: List[ProductSource] = []
+    for name in settings.product_sources.split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in factories:
+            raise ValueError(f"Unknown product source: {name}. Supported: {', '.join(factories)}")
+        sources.append(factories[name]())
+    
+    fan_out = ProductSearchFanOut(sources)
+    _fan_outs.append(fan_out)
+    return fan_out
+
+
+def get_product_source_stats() -> List[Dict[str, Any]]:
+    """
+    Get statistics of every multi-source product search.
+    
+    Returns:
+        List of fan-out statistics (one per container)
+    """
+    return [fan_out.stats() for fan_out in _fan_outs]
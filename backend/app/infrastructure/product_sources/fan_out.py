@@ -0,0 +1,296 @@
+"""
+Parallel multi-source product search.
+Every enabled source is queried at the same time; at the deadline the results that
+have arrived are merged (round-robin, in source order, deduplicated by link) and the
+sources still running are abandoned, so one slow marketplace never holds up the response.
+Threads cannot be cancelled: on the sync path, a source whose abandoned requests are still
+running is skipped once they reach max_abandoned, so a hung marketplace cannot fill the executor.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Any
+from app.core.config import settings
+from app.models.schemas import Product
+from app.infrastructure.product_sources.base import ProductSource
+
+
+class SourceStats:
+    """Latency, timeout and error counters of one product source."""
+    
+    def __init__(self):
+        """Initialize the counters."""
+        self.requests = 0
+        self.successes = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.abandoned = 0  # Sync requests still running past the deadline
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_error: Optional[str] = None
+    
+    def record(self, latency: float, error: Optional[BaseException] = None):
+        """
+        Record a completed request.
+        
+        Args:
+            latency: Seconds the source took to answer
+            error: Exception raised by the source, if any
+        """
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if error is None:
+            self.successes += 1
+        else:
+            self.errors += 1
+            self.last_error = str(error)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Counters and average latency (completed requests only)."""
+        completed = self.successes + self.errors
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "abandoned": self.abandoned,
+            "avg_latency_ms": round(self.total_latency / completed * 1000, 1) if completed else None,
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+            "last_error": self.last_error
+        }
+
+
+class ProductSearchFanOut:
+    """Queries several product sources concurrently and merges what arrives before the deadline."""
+    
+    def __init__(
+        self,
+        sources: List[ProductSource],
+        deadline: Optional[float] = None,
+        max_workers: int = 16,
+        max_abandoned: Optional[int] = None
+    ):
+        """
+        Initialize the fan-out.
+        
+        Args:
+            sources: Product sources, in merge priority order (disabled sources are skipped)
+            deadline: Seconds to wait for the sources (default: settings.product_search_deadline)
+            max_workers: Threads used by the sync path
+            max_abandoned: Requests of one source that may still run past the deadline before
+                the source is skipped (default: settings.product_search_max_abandoned)
+        """
+        self.sources = sources
+        self.deadline = deadline if deadline is not None else settings.product_search_deadline
+        self.max_abandoned = max_abandoned if max_abandoned is not None else settings.product_search_max_abandoned
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="product-source")
+        self._lock = threading.Lock()
+        self._stats: Dict[str, SourceStats] = {source.name: SourceStats() for source in sources}
+    
+    @property
+    def enabled_sources(self) -> List[ProductSource]:
+        """Sources that are configured."""
+        return [source for source in self.sources if source.enabled]
+    
+    def search_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """
+        Search every enabled source in parallel threads.
+        
+        Args:
+            query: Search query
+            num_results: Number of results to return
+            location: Country or region (e.g., "canada", "france")
+        
+        Returns:
+            Merged list of Product objects
+        
+        Raises:
+            Exception: Every source failed or timed out
+        """
+        sources = self.enabled_sources
+        if len(sources) == 1:
+            # Nothing to merge: no thread hop, the source's own timeouts apply
+            return self._timed(sources[0], query, num_results, location)[:num_results]
+        
+        results: Dict[str, List[Product]] = {}
+        errors: Dict[str, str] = {}
+        futures = {}
+        for source in sources:
+            if not self._claim_slot(source.name):
+                errors[source.name] = f"skipped ({self.max_abandoned} earlier requests still running)"
+                continue
+            # Each thread runs in a copy of the caller's context (keeps the SerperDev request priority)
+            futures[source.name] = self._executor.submit(
+                contextvars.copy_context().run, self._timed, source, query, num_results, location
+            )
+        done, _ = wait(futures.values(), timeout=self.deadline) if futures else (set(), set())
+        
+        for name, future in futures.items():
+            if future not in done:
+                self._record_timeout(name)
+                errors[name] = "timed out"
+                if not future.cancel():
+                    # Already running: the thread finishes on its own, its result is discarded
+                    self._abandon(name, future)
+                continue
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = str(e)
+        
+        return self._merge([source.name for source in sources], results, errors, num_results)
+    
+    async def asearch_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """
+        Async version of search_products(): sources still running at the deadline are cancelled.
+        """
+        sources = self.enabled_sources
+        if len(sources) == 1:
+            return (await self._atimed(sources[0], query, num_results, location))[:num_results]
+        
+        tasks = {
+            source.name: asyncio.create_task(self._atimed(source, query, num_results, location))
+            for source in sources
+        }
+        if tasks:
+            done, pending = await asyncio.wait(tasks.values(), timeout=self.deadline)
+        else:
+            done, pending = set(), set()
+        
+        results: Dict[str, List[Product]] = {}
+        errors: Dict[str, str] = {}
+        for name, task in tasks.items():
+            if task in pending:
+                task.cancel()
+                self._record_timeout(name)
+                errors[name] = "timed out"
+                continue
+            try:
+                results[name] = task.result()
+            except Exception as e:
+                errors[name] = str(e)
+        
+        return self._merge([source.name for source in sources], results, errors, num_results)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get fan-out statistics.
+        
+        Returns:
+            Dictionary with the deadline, enabled sources and per-source counters
+        """
+        with self._lock:
+            per_source = {name: stats.to_dict() for name, stats in self._stats.items()}
+        return {
+            "deadline_s": self.deadline,
+            "max_abandoned": self.max_abandoned,
+            "enabled_sources": [source.name for source in self.enabled_sources],
+            "sources": per_source
+        }
+    
+    def _timed(self, source: ProductSource, query: str, num_results: int, location: Optional[str]) -> List[Product]:
+        """Run a sync source search and record its latency."""
+        self._record_request(source.name)
+        started = time.monotonic()
+        try:
+            products = source.search_products(query, num_results=num_results, location=location)
+        except Exception as e:
+            self._record(source.name, time.monotonic() - started, e)
+            raise
+        self._record(source.name, time.monotonic() - started)
+        return products
+    
+    async def _atimed(self, source: ProductSource, query: str, num_results: int, location: Optional[str]) -> List[Product]:
+        """Run an async source search and record its latency (not recorded if cancelled)."""
+        self._record_request(source.name)
+        started = time.monotonic()
+        try:
+            products = await source.asearch_products(query, num_results=num_results, location=location)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._record(source.name, time.monotonic() - started, e)
+            raise
+        self._record(source.name, time.monotonic() - started)
+        return products
+    
+    def _merge(
+        self,
+        order: List[str],
+        results: Dict[str, List[Product]],
+        errors: Dict[str, str],
+        num_results: int
+    ) -> List[Product]:
+        """
+        Merge the results round-robin in source order, skipping links already taken.
+        
+        Args:
+            order: Source names in priority order
+            results: Products per source that answered in time
+            errors: Error (or "timed out") per source that did not
+            num_results: Number of results to return
+        
+        Returns:
+            Merged list of Product objects
+        
+        Raises:
+            Exception: No source answered
+        """
+        if not results:
+            details = "; ".join(f"{name}: {errors[name]}" for name in order if name in errors) or "no product source enabled"
+            raise Exception(f"every product source failed ({details})")
+        
+        queues = [list(results[name]) for name in order if name in results]
+        merged: List[Product] = []
+        seen = set()
+        while len(merged) < num_results and any(queues):
+            for queue in queues:
+                while queue:
+                    product = queue.pop(0)
+                    if product.link not in seen:
+                        seen.add(product.link)
+                        merged.append(product)
+                        break
+                if len(merged) >= num_results:
+                    break
+        return merged
+    
+    def _record_request(self, name: str):
+        """Count a request to a source."""
+        with self._lock:
+            self._stats[name].requests += 1
+    
+    def _record(self, name: str, latency: float, error: Optional[BaseException] = None):
+        """Record a completed request to a source."""
+        with self._lock:
+            self._stats[name].record(latency, error)
+    
+    def _record_timeout(self, name: str):
+        """Count a source that missed the deadline."""
+        with self._lock:
+            self._stats[name].timeouts += 1
+    
+    def _claim_slot(self, name: str) -> bool:
+        """False (and counted as skipped) if the source has max_abandoned requests still running."""
+        with self._lock:
+            stats = self._stats[name]
+            if stats.abandoned >= self.max_abandoned:
+                stats.skipped += 1
+                return False
+            return True
+    
+    def _abandon(self, name: str, future: Future):
+        """Track a request left running past the deadline until its thread finishes."""
+        with self._lock:
+            self._stats[name].abandoned += 1
+        future.add_done_callback(lambda _: self._release_abandoned(name))
+    
+    def _release_abandoned(self, name: str):
+        """An abandoned request finished."""
+        with self._lock:
+            self._stats[name].abandoned -= 1
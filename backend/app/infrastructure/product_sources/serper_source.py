@@ -0,0 +1,35 @@
+"""
+SerperDev product source (Google Shopping + organic results).
+"""
+
+from typing import List, Optional
+from app.models.schemas import Product
+from app.infrastructure.product_sources.base import ProductSource
+
+
+class SerperSource(ProductSource):
+    """Product source backed by a SerperDev client (plain or behind the search cache)."""
+    
+    name = "serper"
+    
+    def __init__(self, client):
+        """
+        Initialize the source.
+        
+        Args:
+            client: SerperDevClient or CachedSerperDevClient
+        """
+        self.client = client
+    
+    @property
+    def enabled(self) -> bool:
+        """True if a SerperDev API key is configured."""
+        return bool(self.client.api_key)
+    
+    def search_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """Search products with SerperDev."""
+        return self.client.search_products(query, num_results=num_results, location=location)
+    
+    async def asearch_products(self, query: str, num_results: int = 10, location: Optional[str] = None) -> List[Product]:
+        """Search products with SerperDev without blocking the event loop."""
+        return await self.client.asearch_products(query, num_results=num_results, location=location)
@@ -3,6 +3,7 @@ Repository layer for data persistence.
 """
 
 from .sqlite_repository import SQLiteRepository
+from .write_behind import PersistenceWriter, persistence_writer
 
-__all__ = ["SQLiteRepository"]
+__all__ = ["SQLiteRepository", "PersistenceWriter", "persistence_writer"]
 
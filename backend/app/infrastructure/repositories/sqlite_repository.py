@@ -3,25 +3,36 @@ SQLite repository for conversations, products, and searches.
 """
 
 import json
+import re
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from sqlite3 import Row
+from typing import List, Dict, Any, Optional, Tuple
+from sqlite3 import Row, Connection
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, FTS_AVAILABLE
 from app.models.schemas import Product, StructuredQuery
 
 
+# Words of a full-text query (FTS5 operators and quotes are dropped)
+_FTS_WORD_PATTERN = re.compile(r"\w+")
+
+
 class SQLiteRepository:
     """
     Repository for SQLite operations.
     """
     
+    # Links looked up per query when upserting products
+    LOOKUP_CHUNK_SIZE = 500
+    
     def save_conversation(
         self,
         session_id: str,
         user_message: str,
         assistant_response: Optional[str] = None,
-        structured_query: Optional[StructuredQuery] = None
+        structured_query: Optional[StructuredQuery] = None,
+        turn_id: Optional[str] = None,
+        conn: Optional[Connection] = None
     ) -> int:
         """
         Save a conversation to the database.
@@ -31,21 +42,48 @@ class SQLiteRepository:
             user_message: User's message
             assistant_response: Assistant's response text
             structured_query: Structured query object
+            turn_id: Workflow turn ID (to update the response later, see update_assistant_response)
+            conn: Connection of an ongoing transaction (default: a pooled connection, committed on return)
             
         Returns:
             ID of the saved conversation
         """
-        with get_db() as conn:
+        with self._write_connection(conn) as conn:
             cursor = conn.cursor()
             structured_query_json = json.dumps(structured_query.model_dump()) if structured_query else None
             
             cursor.execute("""
-                INSERT INTO conversations (session_id, user_message, assistant_response, structured_query)
-                VALUES (?, ?, ?, ?)
-            """, (session_id, user_message, assistant_response, structured_query_json))
+                INSERT INTO conversations (session_id, user_message, assistant_response, structured_query, turn_id)
+                VALUES (?, ?, ?, ?, ?)
+            """, (session_id, user_message, assistant_response, structured_query_json, turn_id))
             
             return cursor.lastrowid
     
+    def update_assistant_response(
+        self,
+        turn_id: str,
+        assistant_response: str,
+        conn: Optional[Connection] = None
+    ) -> int:
+        """
+        Replace the saved response of a turn (e.g., the template product message by the LLM one).
+        
+        Args:
+            turn_id: Workflow turn ID given to save_conversation
+            assistant_response: New assistant response text
+            conn: Connection of an ongoing transaction (default: a pooled connection, committed on return)
+            
+        Returns:
+            Number of conversations updated
+        """
+        with self._write_connection(conn) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE conversations SET assistant_response = ? WHERE turn_id = ?",
+                (assistant_response, turn_id)
+            )
+            return cursor.rowcount
+    
     def get_conversation_history(
         self,
         session_id: str,
@@ -61,7 +99,7 @@ class SQLiteRepository:
         Returns:
             List of conversation dictionaries
         """
-        with get_db() as conn:
+        with get_read_db() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT * FROM conversations
@@ -78,7 +116,8 @@ class SQLiteRepository:
         session_id: Optional[str],
         query_text: str,
         structured_query: Optional[StructuredQuery] = None,
-        num_results: int = 0
+        num_results: int = 0,
+        conn: Optional[Connection] = None
     ) -> int:
         """
         Save a search to the database.
@@ -88,11 +127,12 @@ class SQLiteRepository:
             query_text: Search query text
             structured_query: Structured query object
             num_results: Number of results found
+            conn: Connection of an ongoing transaction (default: a pooled connection, committed on return)
             
         Returns:
             ID of the saved search
         """
-        with get_db() as conn:
+        with self._write_connection(conn) as conn:
             cursor = conn.cursor()
             structured_query_json = json.dumps(structured_query.model_dump()) if structured_query else None
             
@@ -103,10 +143,37 @@ class SQLiteRepository:
             
             return cursor.lastrowid
     
+    def save_search_results(
+        self,
+        session_id: Optional[str],
+        query_text: str,
+        products: List[Product],
+        structured_query: Optional[StructuredQuery] = None,
+        conn: Optional[Connection] = None
+    ) -> int:
+        """
+        Save a search, cache its products and link them to it, in one transaction.
+        
+        Args:
+            session_id: Session identifier
+            query_text: Search query text
+            products: Products found, in result order
+            structured_query: Structured query object
+            conn: Connection of an ongoing transaction (default: a pooled connection, committed on return)
+        
+        Returns:
+            ID of the saved search
+        """
+        with self._write_connection(conn) as conn:
+            search_id = self.save_search(session_id, query_text, structured_query, len(products), conn=conn)
+            self.upsert_products(products, query_text, conn=conn, search_id=search_id)
+            return search_id
+    
     def get_search_history(
         self,
         session_id: Optional[str] = None,
-        limit: int = 50
+        limit: int = 50,
+        text: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Get search history.
@@ -114,26 +181,34 @@ class SQLiteRepository:
         Args:
             session_id: Optional session identifier to filter
             limit: Maximum number of searches to return
+            text: Optional full-text filter on the query text (e.g., "casque sony")
             
         Returns:
-            List of search dictionaries
+            List of search dictionaries, most recent first
         """
-        with get_db() as conn:
+        conditions = []
+        params: List[Any] = []
+        if session_id:
+            conditions.append("s.session_id = ?")
+            params.append(session_id)
+        
+        match = self._fts_query([text]) if text else None
+        if match and FTS_AVAILABLE:
+            conditions.append("s.id IN (SELECT rowid FROM searches_fts WHERE searches_fts MATCH ?)")
+            params.append(match)
+        elif text:
+            conditions.append("s.query_text LIKE ?")
+            params.append(f"%{text}%")
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with get_read_db() as conn:
             cursor = conn.cursor()
-            
-            if session_id:
-                cursor.execute("""
-                    SELECT * FROM searches
-                    WHERE session_id = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """, (session_id, limit))
-            else:
-                cursor.execute("""
-                    SELECT * FROM searches
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """, (limit,))
+            cursor.execute(f"""
+                SELECT s.* FROM searches s
+                {where}
+                ORDER BY s.timestamp DESC
+                LIMIT ?
+            """, params + [limit])
             
             rows = cursor.fetchall()
             return [self._row_to_dict(row) for row in rows]
@@ -141,44 +216,140 @@ class SQLiteRepository:
     def cache_products(
         self,
         products: List[Product],
-        search_query: str
+        search_query: str,
+        conn: Optional[Connection] = None
     ) -> int:
         """
-        Cache products in the database.
+        Cache products in the database (see upsert_products).
         
         Args:
             products: List of products to cache
             search_query: The query that found these products
+            conn: Connection of an ongoing transaction (default: a pooled connection, committed on return)
             
         Returns:
             Number of products cached
         """
-        cached_count = 0
-        with get_db() as conn:
-            cursor = conn.cursor()
+        counts = self.upsert_products(products, search_query, conn=conn)
+        return counts["inserted"] + counts["updated"] + counts["unchanged"]
+    
+    def upsert_products(
+        self,
+        products: List[Product],
+        search_query: str,
+        conn: Optional[Connection] = None,
+        search_id: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        Insert new products and update known ones (same link) in bulk.
+        Known rows keep their id and created_at: only changed fields and cached_at are written,
+        unlike INSERT OR REPLACE, which deletes and reinserts the row and all its index entries.
+        
+        Args:
+            products: Products to cache (the last one wins when a link appears twice)
+            search_query: The query that found these products
+            conn: Connection of an ongoing transaction (default: a pooled connection, committed on return)
+            search_id: Search that found these products (linked in search_results, in result order)
+        
+        Returns:
+            {"inserted": int, "updated": int, "unchanged": int}
+        """
+        rows = {
+            product.link: (
+                product.name,
+                product.description,
+                product.price,
+                product.link,
+                product.platform,
+                product.image,
+                search_query
+            )
+            for product in products
+        }
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        if not rows:
+            return counts
+        
+        with self._write_connection(conn) as conn:
+            existing = self._get_product_rows(conn, list(rows))
             
-            for product in products:
-                try:
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO products 
-                        (name, description, price, link, platform, image, search_query)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        product.name,
-                        product.description,
-                        product.price,
-                        product.link,
-                        product.platform,
-                        product.image,
-                        search_query
-                    ))
-                    cached_count += 1
-                except Exception as e:
-                    # Skip if product already exists (unique constraint on link)
-                    print(f"Warning: Could not cache product {product.link}: {e}")
-                    continue
+            changed = []
+            unchanged = []
+            for link, row in rows.items():
+                current = existing.get(link)
+                if current is None:
+                    counts["inserted"] += 1
+                    changed.append(row)
+                elif current != row:
+                    counts["updated"] += 1
+                    changed.append(row)
+                else:
+                    counts["unchanged"] += 1
+                    unchanged.append((link,))
+            
+            # ON CONFLICT also covers rows inserted by a concurrent writer since the lookup
+            conn.executemany("""
+                INSERT INTO products (name, description, price, link, platform, image, search_query)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET
+                    name = excluded.name,
+                    description = excluded.description,
+                    price = excluded.price,
+                    platform = excluded.platform,
+                    image = excluded.image,
+                    search_query = excluded.search_query,
+                    cached_at = CURRENT_TIMESTAMP
+            """, changed)
+            conn.executemany("UPDATE products SET cached_at = CURRENT_TIMESTAMP WHERE link = ?", unchanged)
+            
+            if search_id is not None:
+                product_ids = self._get_product_ids(conn, list(rows))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO search_results (search_id, product_id, rank) VALUES (?, ?, ?)",
+                    [
+                        (search_id, product_ids[link], rank)
+                        for rank, link in enumerate(rows)
+                        if link in product_ids
+                    ]
+                )
         
-        return cached_count
+        return counts
+    
+    def _get_product_ids(self, conn: Connection, links: List[str]) -> Dict[str, int]:
+        """
+        Get product ids by link, in chunks (SQLite limits bound parameters).
+        
+        Returns:
+            {link: id}
+        """
+        product_ids = {}
+        for start in range(0, len(links), self.LOOKUP_CHUNK_SIZE):
+            chunk = links[start:start + self.LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(f"SELECT id, link FROM products WHERE link IN ({placeholders})", chunk)
+            for row in cursor.fetchall():
+                product_ids[row["link"]] = row["id"]
+        return product_ids
+    
+    def _get_product_rows(self, conn: Connection, links: List[str]) -> Dict[str, Tuple]:
+        """
+        Get the cached fields of products by link, in chunks (SQLite limits bound parameters).
+        
+        Returns:
+            {link: (name, description, price, link, platform, image, search_query)}
+        """
+        existing = {}
+        for start in range(0, len(links), self.LOOKUP_CHUNK_SIZE):
+            chunk = links[start:start + self.LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(f"""
+                SELECT name, description, price, link, platform, image, search_query
+                FROM products
+                WHERE link IN ({placeholders})
+            """, chunk)
+            for row in cursor.fetchall():
+                existing[row["link"]] = tuple(row)
+        return existing
     
     def get_cached_products(
         self,
@@ -186,7 +357,7 @@ class SQLiteRepository:
         limit: int = 10
     ) -> List[Product]:
         """
-        Get cached products for a search query.
+        Get cached products for a search query (full-text match on the query that found them).
         
         Args:
             search_query: Search query text
@@ -195,14 +366,25 @@ class SQLiteRepository:
         Returns:
             List of Product objects
         """
-        with get_db() as conn:
+        with get_read_db() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM products
-                WHERE search_query LIKE ?
-                ORDER BY cached_at DESC
-                LIMIT ?
-            """, (f"%{search_query}%", limit))
+            match = self._fts_query([search_query], column="search_query")
+            if match and FTS_AVAILABLE:
+                # Indexed lookup, best BM25 match first
+                cursor.execute("""
+                    SELECT p.* FROM products_fts f
+                    JOIN products p ON p.id = f.rowid
+                    WHERE products_fts MATCH ?
+                    ORDER BY f.rank, p.cached_at DESC
+                    LIMIT ?
+                """, (match, limit))
+            else:
+                cursor.execute("""
+                    SELECT * FROM products
+                    WHERE search_query LIKE ?
+                    ORDER BY cached_at DESC
+                    LIMIT ?
+                """, (f"%{search_query}%", limit))
             
             rows = cursor.fetchall()
             products = []
@@ -223,6 +405,128 @@ class SQLiteRepository:
             
             return products
     
+    def get_session_products(
+        self,
+        session_id: str,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the products found by a session's searches (search_results join).
+        A product found by several searches is listed once per search.
+        
+        Args:
+            session_id: Session identifier
+            limit: Maximum number of products to return
+        
+        Returns:
+            List of product dictionaries with the query that found them (search_query) and their rank,
+            most recent search first
+        """
+        with get_read_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT p.name, p.description, p.price, p.link, p.platform, p.image,
+                       s.query_text AS search_query, r.rank
+                FROM searches s
+                JOIN search_results r ON r.search_id = s.id
+                JOIN products p ON p.id = r.product_id
+                WHERE s.session_id = ?
+                ORDER BY s.timestamp DESC, s.id DESC, r.rank
+                LIMIT ?
+            """, (session_id, limit))
+            
+            return [
+                {
+                    "name": row["name"],
+                    "description": row["description"] or "",
+                    "price": row["price"],
+                    "link": row["link"],
+                    "platform": row["platform"],
+                    "image": row["image"],
+                    "search_query": row["search_query"],
+                    "rank": row["rank"]
+                }
+                for row in cursor.fetchall()
+            ]
+    
+    def get_structured_query_history(self, limit: int = 5000) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Get (text, structured query) pairs from the searches and conversations tables.
+        Conversation turns that reused the previous turn's query (negative feedback)
+        are skipped, since their message does not describe the query.
+        
+        Args:
+            limit: Maximum number of pairs to return
+        
+        Returns:
+            List of (message, structured query dictionary), most recent first
+        """
+        with get_read_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT text, structured_query FROM (
+                    SELECT c.user_message AS text, c.structured_query, c.timestamp
+                    FROM conversations c
+                    WHERE c.structured_query IS NOT NULL
+                    AND NOT EXISTS (
+                        SELECT 1 FROM conversations p
+                        WHERE p.session_id = c.session_id
+                        AND p.id < c.id
+                        AND p.structured_query = c.structured_query
+                    )
+                    UNION ALL
+                    SELECT s.query_text AS text, s.structured_query, s.timestamp
+                    FROM searches s
+                    WHERE s.structured_query IS NOT NULL
+                )
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (limit,))
+            
+            history = []
+            for row in cursor.fetchall():
+                try:
+                    history.append((row["text"], json.loads(row["structured_query"])))
+                except (TypeError, ValueError):
+                    continue
+            
+            return history
+    
+    @staticmethod
+    def _fts_query(texts: List[str], column: Optional[str] = None) -> Optional[str]:
+        """
+        Build an FTS5 query matching any of the texts as a phrase, the last word as a prefix
+        (like the former LIKE '%text%': "laptop gam" matches "laptop gaming").
+        
+        Args:
+            texts: Texts to match
+            column: Restrict the match to this FTS column
+        
+        Returns:
+            FTS5 MATCH expression, or None if no text has a word
+        """
+        phrases = []
+        for text in texts:
+            words = _FTS_WORD_PATTERN.findall(text or "")
+            if words:
+                phrases.append(f'"{" ".join(words)}" *')
+        if not phrases:
+            return None
+        
+        expression = " OR ".join(dict.fromkeys(phrases))
+        return f"{column} : ({expression})" if column else expression
+    
+    @contextmanager
+    def _write_connection(self, conn: Optional[Connection] = None):
+        """
+        Use the caller's connection (write-behind batch) or a pooled one committed on exit.
+        """
+        if conn is not None:
+            yield conn
+        else:
+            with get_db() as pooled_conn:
+                yield pooled_conn
+    
     def _row_to_dict(self, row: Row) -> Dict[str, Any]:
         """
         Convert a SQLite row to a dictionary.
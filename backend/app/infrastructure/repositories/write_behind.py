@@ -0,0 +1,249 @@
+"""
+Write-behind persistence for conversations, searches and cached products.
+Requests enqueue their writes and return; a dedicated writer thread groups queued
+writes into one SQLite transaction every flush_interval seconds or max_batch records,
+so responses no longer wait for three commits.
+"""
+
+import queue
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.config import settings
+from app.core.database import get_db
+from app.infrastructure.repositories.sqlite_repository import SQLiteRepository
+
+
+# Repository write methods that can be queued
+_WRITE_METHODS = {
+    "save_conversation", "update_assistant_response", "save_search", "save_search_results", "cache_products"
+}
+
+# Writes updating rows inserted by earlier records: never written ahead of the queue
+_ORDERED_METHODS = {"update_assistant_response"}
+
+# Queue item that stops the writer thread
+_STOP = object()
+
+
+class PersistenceWriter:
+    """
+    Bounded write queue drained by one writer thread (group commit).
+    When the queue is full, enqueue() waits up to enqueue_timeout (backpressure),
+    then writes synchronously so that no record is ever dropped (updates of queued rows,
+    _ORDERED_METHODS, wait for room instead: written first, they would match no row).
+    """
+    
+    def __init__(
+        self,
+        repository: Optional[SQLiteRepository] = None,
+        max_queue: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        enqueue_timeout: Optional[float] = None
+    ):
+        """
+        Initialize the writer (the thread starts on the first enqueue).
+        
+        Args:
+            repository: Repository executing the writes (default: SQLiteRepository())
+            max_queue: Maximum number of queued records (default: settings.persistence_queue_size)
+            max_batch: Maximum records per transaction (default: settings.persistence_batch_size)
+            flush_interval: Seconds a record may wait for more records to share its transaction
+                (default: settings.persistence_flush_interval)
+            enqueue_timeout: Seconds enqueue() waits for room in a full queue
+                (default: settings.persistence_enqueue_timeout)
+        """
+        self.repository = repository or SQLiteRepository()
+        self.max_queue = max_queue or settings.persistence_queue_size
+        self.max_batch = max_batch or settings.persistence_batch_size
+        self.flush_interval = settings.persistence_flush_interval if flush_interval is None else flush_interval
+        self.enqueue_timeout = settings.persistence_enqueue_timeout if enqueue_timeout is None else enqueue_timeout
+        
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Records enqueued but not committed yet (flush() waits for 0)
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+        self._closed = False
+        
+        # Statistics
+        self.enqueued = 0
+        self.committed = 0
+        self.failed = 0
+        self.batches = 0
+        self.batched_records = 0
+        self.overflow_writes = 0
+        self.backpressure_waits = 0
+        self.commit_time = 0.0
+        self.max_commit_time = 0.0
+        self.max_depth = 0
+    
+    def enqueue(self, method: str, **kwargs):
+        """
+        Queue a repository write (e.g., enqueue("save_search", session_id=..., query_text=...)).
+        
+        Args:
+            method: Repository write method (see _WRITE_METHODS)
+            **kwargs: Method arguments
+        """
+        if method not in _WRITE_METHODS:
+            raise ValueError(f"Not a queueable write: {method}")
+        
+        record = (method, kwargs)
+        if self._closed:
+            self._write_now(record)
+            return
+        
+        self._ensure_thread()
+        with self._lock:
+            self._pending += 1
+        try:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.backpressure_waits += 1
+                timeout = None if method in _ORDERED_METHODS else self.enqueue_timeout
+                self._queue.put(record, timeout=timeout)
+        except queue.Full:
+            # Writer is far behind: the caller pays for its own write
+            self._done(1)
+            self.overflow_writes += 1
+            self._write_now(record)
+            return
+        
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued record is committed.
+        
+        Args:
+            timeout: Maximum wait in seconds (None = no limit)
+        
+        Returns:
+            True if the queue was drained
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Drain the queue and stop the writer thread (application shutdown).
+        Writes enqueued afterwards are executed synchronously.
+        
+        Args:
+            timeout: Maximum wait in seconds for the queue to drain
+        
+        Returns:
+            True if the queue was drained
+        """
+        drained = self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        return drained
+    
+    def _ensure_thread(self):
+        """Start the writer thread on first use."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+                    self._thread.start()
+    
+    def _run(self):
+        """Writer loop: wait for a record, gather more for up to flush_interval, commit them together."""
+        while True:
+            record = self._queue.get()
+            if record is _STOP:
+                return
+            
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    record = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stop = True
+                    break
+                batch.append(record)
+            
+            self._commit(batch)
+            if stop:
+                return
+    
+    def _commit(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Write a batch in one transaction (record by record if the transaction fails)."""
+        started = time.perf_counter()
+        try:
+            with get_db() as conn:
+                for method, kwargs in batch:
+                    getattr(self.repository, method)(conn=conn, **kwargs)
+            self.committed += len(batch)
+        except Exception as e:
+            print(f"Warning: Write-behind batch of {len(batch)} failed, retrying one by one: {e}")
+            # One bad record must not lose the others
+            for record in batch:
+                self._write_now(record)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.batches += 1
+            self.batched_records += len(batch)
+            self.commit_time += elapsed
+            self.max_commit_time = max(self.max_commit_time, elapsed)
+            self._done(len(batch))
+    
+    def _write_now(self, record: Tuple[str, Dict[str, Any]]):
+        """Write a single record in its own transaction."""
+        method, kwargs = record
+        try:
+            getattr(self.repository, method)(**kwargs)
+            self.committed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Warning: Failed to save to database ({method}): {e}")
+    
+    def _done(self, count: int):
+        """Mark records as committed (or given up) and wake flush()."""
+        with self._idle:
+            self._pending -= count
+            if self._pending == 0:
+                self._idle.notify_all()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get write-behind statistics.
+        
+        Returns:
+            Dictionary with queue depth, records enqueued/committed/failed, batches,
+            average batch size, commit latency and backpressure counters
+        """
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "max_depth": self.max_depth,
+            "pending": self._pending,
+            "enqueued": self.enqueued,
+            "committed": self.committed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_records / self.batches, 2) if self.batches else None,
+            "avg_commit_ms": round(self.commit_time / self.batches * 1000, 2) if self.batches else None,
+            "max_commit_ms": round(self.max_commit_time * 1000, 2),
+            "backpressure_waits": self.backpressure_waits,
+            "overflow_writes": self.overflow_writes
+        }
+
+
+# Shared writer (one writer thread per process)
+persistence_writer = PersistenceWriter()
@@ -0,0 +1,191 @@
+"""
+Cross-platform duplicate product clustering.
+Listings of the same item on different platforms (Amazon, Walmart, ...) have near-identical
+titles: titles are reduced to character shingles, MinHash signatures are bucketed with
+LSH bands, and only listings sharing a bucket are compared (near-linear in the number of
+products). Candidates are confirmed by signature similarity and by their brand and
+model tokens (e.g., "wh1000xm5"), so two models of the same brand stay apart.
+"""
+
+import re
+import unicodedata
+import zlib
+from typing import List, Dict, Optional, Set
+from app.models.schemas import Product
+
+
+# Words that do not identify a product
+_NOISE_WORDS = {
+    "the", "a", "an", "and", "or", "for", "with", "of", "in", "on", "to", "by", "from",
+    "new", "brand", "sale", "free", "shipping", "fast", "delivery", "official", "genuine",
+    "le", "la", "les", "de", "des", "du", "pour", "avec", "et", "en", "neuf", "nouveau",
+}
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*")
+_SEPARATORS_PATTERN = re.compile(r"[-/]")
+_HAS_DIGIT_PATTERN = re.compile(r"\d")
+_HAS_LETTER_PATTERN = re.compile(r"[a-z]")
+# Capacities and sizes ("256gb", "65w", "4k") mix letters and digits but do not identify a model
+_QUANTITY_PATTERN = re.compile(r"^\d+(?:gb|tb|mb|mah|wh|w|hz|khz|mhz|ghz|mm|cm|m|in|inch|k|p|g|kg|ml|l|v)$")
+# Variants of a model line ("iPhone 15" vs "iPhone 15 Pro"): listings must name the same ones
+_VARIANT_WORDS = {"pro", "max", "plus", "ultra", "mini", "lite", "air", "fe", "se"}
+
+# Mersenne prime modulus of the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+
+class ProductFingerprint:
+    """Normalized title, brand, model and variant tokens and shingles of a listing."""
+    
+    __slots__ = ("title", "words", "brand", "models", "variants", "shingles")
+    
+    def __init__(self, product: Product):
+        """
+        Build the fingerprint of a product.
+        
+        Args:
+            product: Product listing
+        """
+        text = unicodedata.normalize("NFKD", product.name or "").encode("ascii", "ignore").decode().lower()
+        words = [word for word in _WORD_PATTERN.findall(text) if word not in _NOISE_WORDS]
+        
+        self.title = " ".join(words)
+        self.words = set(words)
+        # The brand usually leads the title ("Sony WH-1000XM5 ...")
+        self.brand: Optional[str] = next((word for word in words if not _HAS_DIGIT_PATTERN.search(word)), None)
+        # Model tokens mix letters and digits; separators are dropped ("WH-1000XM5" == "WH1000XM5")
+        self.models: Set[str] = {
+            _SEPARATORS_PATTERN.sub("", word) for word in words
+            if _HAS_DIGIT_PATTERN.search(word) and _HAS_LETTER_PATTERN.search(word) and len(word) >= 3
+            and not _QUANTITY_PATTERN.match(word)
+        }
+        self.variants: Set[str] = self.words & _VARIANT_WORDS
+        self.shingles = self._shingles(self.title)
+    
+    @staticmethod
+    def _shingles(title: str, size: int = 3) -> Set[int]:
+        """Hashed character shingles of the title."""
+        if len(title) <= size:
+            return {zlib.crc32(title.encode())} if title else set()
+        return {zlib.crc32(title[i:i + size].encode()) for i in range(len(title) - size + 1)}
+
+
+def _compatible_models(first: Set[str], other: Set[str]) -> bool:
+    """
+    Model tokens of the same item: one set contains the other (a listing may add a
+    reference, e.g. "SM-S921B"). Listings without model tokens are compatible with any.
+    """
+    return not first or not other or first <= other or other <= first
+
+
+class ProductClusterer:
+    """
+    Groups near-duplicate listings with MinHash + LSH.
+    With 8 bands of 4 rows, pairs above ~0.6 Jaccard similarity almost always share a bucket.
+    """
+    
+    def __init__(self, num_hashes: int = 32, bands: int = 8, threshold: float = 0.5):
+        """
+        Initialize the clusterer.
+        
+        Args:
+            num_hashes: MinHash signature length (multiple of bands)
+            bands: LSH bands (num_hashes / bands rows each)
+            threshold: Minimum estimated Jaccard similarity of two titles in a cluster
+        """
+        if num_hashes % bands:
+            raise ValueError("num_hashes must be a multiple of bands")
+        self.num_hashes = num_hashes
+        self.bands = bands
+        self.rows = num_hashes // bands
+        self.threshold = threshold
+        
+        # Fixed permutations (a * x + b) mod p: the same title always gets the same signature
+        self._permutations = [
+            (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode()))
+            for i in range(num_hashes)
+        ]
+    
+    def cluster(self, products: List[Product]) -> List[List[Product]]:
+        """
+        Group products listing the same item.
+        
+        Args:
+            products: Products to cluster
+        
+        Returns:
+            Clusters (lists of products), in order of first appearance; singletons included
+        """
+        fingerprints = [ProductFingerprint(product) for product in products]
+        signatures = [self._signature(fingerprint.shingles) for fingerprint in fingerprints]
+        parents = list(range(len(products)))
+        # Model tokens per cluster root: a listing without model number must not chain two models together
+        cluster_models = [set(fingerprint.models) for fingerprint in fingerprints]
+        
+        def find(index: int) -> int:
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+        
+        def try_merge(first: int, other: int, threshold: float):
+            root_first, root_other = find(first), find(other)
+            if root_first == root_other:
+                return
+            models_first, models_other = cluster_models[root_first], cluster_models[root_other]
+            if not _compatible_models(models_first, models_other):
+                return
+            if self._same_item(fingerprints[first], fingerprints[other], signatures[first], signatures[other], threshold):
+                parents[root_other] = root_first
+                models_first |= models_other
+        
+        # LSH: listings sharing a band are candidate duplicates
+        for band in range(self.bands):
+            buckets: Dict[tuple, List[int]] = {}
+            start = band * self.rows
+            for index, signature in enumerate(signatures):
+                if signature is not None:
+                    buckets.setdefault(tuple(signature[start:start + self.rows]), []).append(index)
+            self._merge_buckets(buckets, try_merge, self.threshold)
+        
+        # Same model number: candidates even when the titles are worded differently
+        model_buckets: Dict[str, List[int]] = {}
+        for index, fingerprint in enumerate(fingerprints):
+            for model in fingerprint.models:
+                model_buckets.setdefault(model, []).append(index)
+        self._merge_buckets(model_buckets, try_merge, self.threshold / 2)
+        
+        clusters: Dict[int, List[Product]] = {}
+        for index, product in enumerate(products):
+            clusters.setdefault(find(index), []).append(product)
+        return list(clusters.values())
+    
+    @staticmethod
+    def _merge_buckets(buckets: Dict, try_merge, threshold: float):
+        """Try to merge every pair of listings sharing a bucket (buckets are small)."""
+        for members in buckets.values():
+            for position, other in enumerate(members[1:], 1):
+                for first in members[:position]:
+                    try_merge(first, other, threshold)
+    
+    def _signature(self, shingles: Set[int]) -> Optional[List[int]]:
+        """MinHash signature of a shingle set (None if the title is empty)."""
+        if not shingles:
+            return None
+        return [min((a * shingle + b) % _PRIME for shingle in shingles) for a, b in self._permutations]
+    
+    def _same_item(
+        self,
+        first: ProductFingerprint,
+        other: ProductFingerprint,
+        first_signature: List[int],
+        other_signature: List[int],
+        threshold: float
+    ) -> bool:
+        """Confirm a candidate pair: same brand, compatible model tokens and variants, similar titles."""
+        # Brands differ only if neither title mentions the other's brand
+        if first.brand and other.brand and first.brand not in other.words and other.brand not in first.words:
+            return False
+        if not _compatible_models(first.models, other.models) or first.variants != other.variants:
+            return False
+        agreement = sum(1 for x, y in zip(first_signature, other_signature) if x == y)
+        return agreement / self.num_hashes >= threshold
@@ -0,0 +1,276 @@
+"""
+Product normalization: price, currency and platform are parsed once per product.
+Search clients call normalize_products() right after ingest; downstream consumers
+(price filter, price comparator, product message) read get_product_record() instead
+of parsing price strings themselves.
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Optional
+from urllib.parse import urlparse
+from app.models.schemas import Product
+
+
+# Approximate conversion rates to EUR (1 unit = rate EUR)
+EUR_RATES = {
+    "EUR": 1.0,
+    "USD": 0.92,
+    "CAD": 0.68,
+    "AUD": 0.61,
+    "GBP": 1.17,
+    "CHF": 1.05,
+    "JPY": 0.0062,
+    "CNY": 0.13,
+    "INR": 0.011,
+    "BRL": 0.17,
+    "MXN": 0.05,
+}
+
+# Currency of "$" and bare amounts per ISO country code (SerperDev gl parameter)
+COUNTRY_CURRENCIES = {
+    "us": "USD", "ca": "CAD", "au": "AUD", "gb": "GBP", "mx": "MXN", "br": "BRL",
+    "jp": "JPY", "cn": "CNY", "in": "INR", "ch": "CHF",
+    "fr": "EUR", "de": "EUR", "es": "EUR", "it": "EUR", "be": "EUR", "nl": "EUR",
+}
+
+# Currency markers, most specific first ("CA$" before "$")
+_CURRENCY_PATTERNS = [
+    (re.compile(r"\b(?:CA|C)\$|\bCAD\b", re.IGNORECASE), "CAD"),
+    (re.compile(r"\b(?:AU|A)\$|\bAUD\b", re.IGNORECASE), "AUD"),
+    (re.compile(r"\bMX\$|\bMXN\b", re.IGNORECASE), "MXN"),
+    (re.compile(r"\bR\$|\bBRL\b", re.IGNORECASE), "BRL"),
+    (re.compile(r"\bUS\$|\bUSD\b", re.IGNORECASE), "USD"),
+    (re.compile(r"€|\bEUR\b|\beuros?\b", re.IGNORECASE), "EUR"),
+    (re.compile(r"£|\bGBP\b", re.IGNORECASE), "GBP"),
+    (re.compile(r"\bCHF\b", re.IGNORECASE), "CHF"),
+    (re.compile(r"₹|\bINR\b", re.IGNORECASE), "INR"),
+    (re.compile(r"\bJPY\b", re.IGNORECASE), "JPY"),
+    (re.compile(r"\bCNY\b|\bRMB\b", re.IGNORECASE), "CNY"),
+    (re.compile(r"¥", re.IGNORECASE), "JPY"),
+]
+_DOLLAR_PATTERN = re.compile(r"\$|\bdollars?\b", re.IGNORECASE)
+
+# First amount: space-grouped thousands ("1 299,00") or digits with "," / "." separators
+_AMOUNT_PATTERN = re.compile(r"\d{1,3}(?:[ \u00a0\u202f]\d{3})+(?:[.,]\d{1,2})?|\d[\d.,]*")
+_SPACES_PATTERN = re.compile(r"[ \u00a0\u202f]")
+
+# Canonical platform names, matched against the source name or the link domain
+_PLATFORMS = [
+    ("amazon", "Amazon"),
+    ("ebay", "eBay"),
+    ("walmart", "Walmart"),
+    ("bestbuy", "Best Buy"),
+    ("best buy", "Best Buy"),
+    ("target", "Target"),
+    ("newegg", "Newegg"),
+]
+_TLD_SUFFIX_PATTERN = re.compile(r"\.(?:com|ca|fr|co\.uk|de|es|it|com\.au)$", re.IGNORECASE)
+
+
+class ProductRecord:
+    """Parsed fields of a product: numeric price, ISO currency, EUR value, platform and link domain."""
+    
+    __slots__ = ("price", "currency", "price_eur", "platform", "domain")
+    
+    def __init__(
+        self,
+        price: Optional[float],
+        currency: Optional[str],
+        price_eur: Optional[float],
+        platform: str,
+        domain: str
+    ):
+        """
+        Initialize the record.
+        
+        Args:
+            price: Numeric price in its own currency (None if the product has no parsable price)
+            currency: ISO currency code (None if unknown)
+            price_eur: Price converted to EUR (price itself if the currency is unknown)
+            platform: Canonical platform name (e.g., "Amazon", "Best Buy")
+            domain: Link domain without "www." (e.g., "amazon.ca")
+        """
+        self.price = price
+        self.currency = currency
+        self.price_eur = price_eur
+        self.platform = platform
+        self.domain = domain
+    
+    def __repr__(self) -> str:
+        return (
+            f"ProductRecord(price={self.price!r}, currency={self.currency!r}, price_eur={self.price_eur!r}, "
+            f"platform={self.platform!r}, domain={self.domain!r})"
+        )
+
+
+def parse_price(price_str: Optional[str], default_currency: Optional[str] = None):
+    """
+    Parse a price string.
+    
+    Args:
+        price_str: Price string (e.g., "$1,299.99", "1 299,00 €", "CA$45")
+        default_currency: Currency of "$" and bare amounts (e.g., "CAD" for Canadian results)
+    
+    Returns:
+        Tuple (amount, currency); amount is None if no number is found
+    """
+    if not price_str:
+        return None, None
+    
+    currency = None
+    for pattern, code in _CURRENCY_PATTERNS:
+        if pattern.search(price_str):
+            currency = code
+            break
+    if currency is None:
+        if _DOLLAR_PATTERN.search(price_str):
+            currency = default_currency if default_currency in ("USD", "CAD", "AUD", "MXN") else "USD"
+        else:
+            currency = default_currency
+    
+    match = _AMOUNT_PATTERN.search(price_str)
+    if match is None:
+        return None, currency
+    return _parse_amount(match.group(0)), currency
+
+
+def _parse_amount(text: str) -> Optional[float]:
+    """
+    Convert an amount with thousands/decimal separators to a float.
+    The last "," or "." is the decimal separator when 1-2 digits follow it
+    ("1,299.99", "1.299,99", "45,5"); otherwise separators group thousands ("1,299", "1.299").
+    """
+    text = _SPACES_PATTERN.sub("", text).rstrip(",.")
+    last = max(text.rfind(","), text.rfind("."))
+    digits = text.replace(",", "").replace(".", "")
+    if last != -1 and len(text) - last - 1 in (1, 2):
+        digits = text[:last].replace(",", "").replace(".", "") + "." + text[last + 1:]
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def to_eur(amount: Optional[float], currency: Optional[str]) -> Optional[float]:
+    """
+    Convert an amount to EUR (amounts in an unknown currency are taken as EUR).
+    
+    Args:
+        amount: Amount
+        currency: ISO currency code
+    
+    Returns:
+        Amount in EUR, or None if amount is None
+    """
+    if amount is None:
+        return None
+    return round(amount * EUR_RATES.get(currency or "EUR", 1.0), 2)
+
+
+@lru_cache(maxsize=4096)
+def get_domain(url: str) -> str:
+    """Link domain without "www." (memoized)."""
+    try:
+        return urlparse(url).netloc.lower().removeprefix("www.")
+    except ValueError:
+        return ""
+
+
+@lru_cache(maxsize=4096)
+def platform_from_domain(domain: str) -> str:
+    """
+    Canonical platform of a link domain (memoized).
+    
+    Args:
+        domain: Domain without "www." (e.g., "amazon.ca")
+    
+    Returns:
+        Platform name (e.g., "Amazon"), the capitalized main domain name, or "Unknown"
+    """
+    if not domain:
+        return "Unknown"
+    for marker, platform in _PLATFORMS:
+        if marker in domain:
+            return platform
+    return domain.split(".")[0].capitalize() or "Unknown"
+
+
+@lru_cache(maxsize=4096)
+def canonical_platform(source: Optional[str], domain: str = "") -> str:
+    """
+    Canonical platform from a source name (e.g., "Walmart - Seller", "Amazon.ca") or the link domain.
+    
+    Args:
+        source: Source/platform name reported by the search API
+        domain: Link domain (used when the source is empty)
+    
+    Returns:
+        Platform name
+    """
+    if source:
+        name = source.split(" - ")[0].strip()
+        lowered = name.lower()
+        for marker, platform in _PLATFORMS:
+            if marker in lowered:
+                return platform
+        # "Store.com" -> "Store"
+        return _TLD_SUFFIX_PATTERN.sub("", name) or name
+    return platform_from_domain(domain)
+
+
+def normalize_product(product: Product, default_currency: Optional[str] = None) -> ProductRecord:
+    """
+    Parse a product's price, currency and platform and attach the record to the product.
+    
+    Args:
+        product: Product to normalize
+        default_currency: Currency of "$" and bare amounts (see COUNTRY_CURRENCIES)
+    
+    Returns:
+        ProductRecord
+    """
+    amount, currency = parse_price(product.price, default_currency)
+    domain = get_domain(product.link) if product.link else ""
+    record = ProductRecord(
+        price=amount,
+        currency=currency,
+        price_eur=to_eur(amount, currency),
+        platform=canonical_platform(product.platform, domain),
+        domain=domain
+    )
+    product._record = record
+    return record
+
+
+def normalize_products(products: List[Product], country_code: Optional[str] = None) -> List[Product]:
+    """
+    Normalize search results right after ingest.
+    
+    Args:
+        products: Products returned by a search
+        country_code: ISO country code of the search (currency of "$" and bare amounts)
+    
+    Returns:
+        The same products, with their records attached
+    """
+    default_currency = COUNTRY_CURRENCIES.get(country_code or "")
+    for product in products:
+        normalize_product(product, default_currency)
+    return products
+
+
+def get_product_record(product: Product) -> ProductRecord:
+    """
+    Get a product's record, normalizing it on first use (products built outside a search client).
+    
+    Args:
+        product: Product
+    
+    Returns:
+        ProductRecord
+    """
+    record = product._record
+    if record is None:
+        record = normalize_product(product)
+    return record
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import List, Optional, Dict, Any
 
 
@@ -10,6 +10,9 @@ class Product(BaseModel):
     link: str
     platform: Optional[str] = None
     image: Optional[str] = None
+    
+    # Parsed price/currency/platform (app.models.normalization.ProductRecord), never serialized
+    _record: Any = PrivateAttr(default=None)
 
 
 class SearchRequest(BaseModel):
@@ -54,4 +57,26 @@ class ChatResponse(BaseModel):
     price_comparison: Optional[Dict[str, Any]] = Field(None, description="Price comparison results")
     conversational_response: Optional[str] = Field(None, description="Text response for conversational queries")
     product_message: Optional[str] = Field(None, description="Contextual message accompanying product results")
+    turn_id: Optional[str] = Field(None, description="Turn ID (used to fetch the final product message)")
+    product_message_pending: bool = Field(False, description="True if product_message is a template and the final message is still being generated")
     error: Optional[str] = Field(None, description="Error message if any")
+
+
+class ProductMessageResponse(BaseModel):
+    """Product message generated in the background for a chat turn."""
+    session_id: str
+    turn_id: str
+    status: str = Field(..., description="pending, ready or failed (failed keeps the template message)")
+    message: Optional[str] = None
+
+
+class CompareRequest(BaseModel):
+    """Bulk price comparison request schema."""
+    product_lists: List[List[Product]] = Field(..., description="Product lists (e.g., cached searches), compared independently")
+    include_clusters: bool = Field(True, description="Group listings of the same item across platforms (slower on large batches)")
+
+
+class CompareResponse(BaseModel):
+    """Bulk price comparison response schema."""
+    results: List[Dict[str, Any]] = Field(..., description="Price comparison per product list, in request order")
+    total: int
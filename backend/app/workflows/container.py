@@ -0,0 +1,189 @@
+"""
+Dependency container for the shopping workflow.
+Builds the LLM provider, API clients and agents once per process and injects them into nodes.
+"""
+
+import threading
+from typing import Optional, Any
+from app.agents.query_understanding import QueryUnderstandingAgent
+from app.agents.product_researcher import ProductResearcherAgent
+from app.agents.price_comparator import PriceComparatorAgent
+from app.agents.conversation_handler import ConversationHandlerAgent
+from app.agents.combined_understanding import CombinedUnderstandingAgent
+from app.infrastructure.external_apis.serperdev_client import SerperDevClient
+from app.infrastructure.external_apis.search_cache import with_search_cache
+from app.infrastructure.product_sources import ProductSearchFanOut, get_product_search
+from app.infrastructure.llm import get_llm_provider, LLMProvider, with_response_cache
+from app.infrastructure.cache.query_cache import QueryCache, get_query_cache
+from app.core.config import settings
+
+
+class AgentContainer:
+    """
+    Holds the shared components used by workflow nodes.
+    Components are built lazily on first use and then reused by every request,
+    so system prompts, providers, connection pools and caches persist across requests.
+    Any component can be passed explicitly (tests, benchmarks).
+    """
+    
+    def __init__(
+        self,
+        llm_provider: Optional[LLMProvider] = None,
+        serper_client: Optional[SerperDevClient] = None,
+        product_search: Optional[ProductSearchFanOut] = None,
+        query_understanding_agent: Optional[QueryUnderstandingAgent] = None,
+        conversation_handler_agent: Optional[ConversationHandlerAgent] = None,
+        product_researcher_agent: Optional[ProductResearcherAgent] = None,
+        price_comparator_agent: Optional[PriceComparatorAgent] = None,
+        query_cache: Optional[QueryCache] = None,
+        combined_understanding_agent: Optional[CombinedUnderstandingAgent] = None
+    ):
+        """
+        Initialize the container.
+        
+        Args:
+            llm_provider: LLM provider (default: get_llm_provider())
+            serper_client: SerperDev client (default: SerperDevClient())
+            product_search: Multi-source product search (default: get_product_search(serper_client))
+            query_understanding_agent: Query understanding agent
+            conversation_handler_agent: Conversation handler agent
+            product_researcher_agent: Product researcher agent
+            price_comparator_agent: Price comparator agent
+            query_cache: Normalized-query cache (default: get_query_cache())
+            combined_understanding_agent: Classification + extraction agent (combined mode)
+        """
+        self._components = {
+            "llm_provider": llm_provider,
+            "serper_client": serper_client,
+            "product_search": product_search,
+            "query_understanding_agent": query_understanding_agent,
+            "conversation_handler_agent": conversation_handler_agent,
+            "product_researcher_agent": product_researcher_agent,
+            "price_comparator_agent": price_comparator_agent,
+            "query_cache": query_cache,
+            "combined_understanding_agent": combined_understanding_agent,
+        }
+        self._lock = threading.RLock()
+    
+    def _get(self, name: str, factory) -> Any:
+        """
+        Get a component, building it on first use.
+        
+        Args:
+            name: Component name
+            factory: Callable building the component
+        
+        Returns:
+            Component instance
+        """
+        component = self._components[name]
+        if component is None:
+            with self._lock:
+                component = self._components[name]
+                if component is None:
+                    component = factory()
+                    self._components[name] = component
+        return component
+    
+    @property
+    def llm_provider(self) -> LLMProvider:
+        """
+        Shared LLM provider (uncached).
+        The classification/extraction agents get it wrapped in the response cache;
+        the product message uses it directly since its output is not reusable.
+        """
+        return self._get("llm_provider", get_llm_provider)
+    
+    @property
+    def serper_client(self) -> SerperDevClient:
+        """Shared SerperDev client (behind the search result cache)."""
+        return self._get("serper_client", lambda: with_search_cache(SerperDevClient()))
+    
+    @property
+    def product_search(self) -> ProductSearchFanOut:
+        """Shared multi-source product search (SerperDev through the shared client, eBay, Best Buy)."""
+        return self._get("product_search", lambda: get_product_search(self.serper_client))
+    
+    @property
+    def query_understanding_agent(self) -> QueryUnderstandingAgent:
+        """Shared query understanding agent."""
+        return self._get(
+            "query_understanding_agent",
+            lambda: QueryUnderstandingAgent(
+                llm_provider=with_response_cache(
+                    self.llm_provider, "query_understanding", ttl=settings.llm_cache_ttl_query
+                )
+            )
+        )
+    
+    @property
+    def conversation_handler_agent(self) -> ConversationHandlerAgent:
+        """Shared conversation handler agent."""
+        return self._get(
+            "conversation_handler_agent",
+            lambda: ConversationHandlerAgent(
+                llm_provider=with_response_cache(
+                    self.llm_provider, "conversation_handler", ttl=settings.llm_cache_ttl_conversation
+                )
+            )
+        )
+    
+    @property
+    def combined_understanding_agent(self) -> CombinedUnderstandingAgent:
+        """Shared combined classification + extraction agent."""
+        return self._get(
+            "combined_understanding_agent",
+            lambda: CombinedUnderstandingAgent(
+                llm_provider=with_response_cache(
+                    self.llm_provider, "combined_understanding", ttl=settings.llm_cache_ttl_query
+                )
+            )
+        )
+    
+    @property
+    def product_researcher_agent(self) -> ProductResearcherAgent:
+        """Shared product researcher agent."""
+        return self._get(
+            "product_researcher_agent",
+            lambda: ProductResearcherAgent(serper_client=self.serper_client, product_search=self.product_search)
+        )
+    
+    @property
+    def price_comparator_agent(self) -> PriceComparatorAgent:
+        """Shared price comparator agent."""
+        return self._get("price_comparator_agent", PriceComparatorAgent)
+    
+    @property
+    def query_cache(self) -> Optional[QueryCache]:
+        """Shared normalized-query cache (None if disabled)."""
+        return self._get("query_cache", get_query_cache)
+    
+    def override(self, **components) -> "AgentContainer":
+        """
+        Create a copy of this container with some components replaced.
+        Components that depend on a replaced one are rebuilt (e.g. replacing
+        llm_provider rebuilds the agents that use it).
+        
+        Args:
+            **components: Components to replace (same names as __init__ arguments)
+        
+        Returns:
+            New AgentContainer
+        """
+        unknown = set(components) - set(self._components)
+        if unknown:
+            raise ValueError(f"Unknown container components: {', '.join(sorted(unknown))}")
+        
+        kept = dict(self._components)
+        if "llm_provider" in components:
+            kept["query_understanding_agent"] = None
+            kept["conversation_handler_agent"] = None
+            kept["combined_understanding_agent"] = None
+        if "serper_client" in components:
+            kept["product_search"] = None
+            kept["product_researcher_agent"] = None
+        if "product_search" in components:
+            kept["product_researcher_agent"] = None
+        kept.update(components)
+        
+        return AgentContainer(**kept)
@@ -2,36 +2,100 @@
 LangGraph nodes for shopping workflow.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from app.workflows.state import ShoppingState
-from app.agents.query_understanding import QueryUnderstandingAgent
-from app.agents.product_researcher import ProductResearcherAgent
-from app.agents.price_comparator import PriceComparatorAgent
-from app.agents.conversation_handler import ConversationHandlerAgent
 from app.models.schemas import StructuredQuery
-from app.infrastructure.llm import get_llm_provider
+from app.models.normalization import get_product_record
+from app.workflows.container import AgentContainer
+from app.workflows.product_message_store import product_message_store
+from app.workflows.result_pool import session_result_pool
+from app.infrastructure.cache.query_cache import canonicalize_query
+from app.infrastructure.cache.single_flight import single_flight
+from app.core.config import settings
+import json
 import re
 
 
-def understand_query_node(state: ShoppingState) -> Dict[str, Any]:
+def _get_container(config: Optional[Dict[str, Any]]) -> AgentContainer:
+    """
+    Get the AgentContainer passed by ShoppingWorkflow in the run config.
+    Falls back to a fresh container when a node is called outside the workflow.
+    """
+    container = ((config or {}).get("configurable") or {}).get("container")
+    return container or AgentContainer()
+
+
+def _get_token_sink(config: Optional[Dict[str, Any]]):
+    """
+    Get the token sink passed by ShoppingWorkflow.astream (None outside streaming).
+    The sink is called as sink(event_name, text) for each generated text delta.
+    """
+    return ((config or {}).get("configurable") or {}).get("token_sink")
+
+
+def _message_key(message: str) -> str:
+    """
+    Coalescing key for LLM calls on a user message: its canonical form
+    (same equivalence as the query cache), or the raw message if nothing is left.
+    """
+    return canonicalize_query(message) or " ".join(message.lower().split())
+
+
+def _research_key(researcher_agent, structured_query: StructuredQuery, num_results: Optional[int] = None) -> str:
+    """
+    Key of a product search: normalized search query, country codes, price filters
+    and number of results (None for the session result pool, which spans page depths).
+    """
+    search_query = researcher_agent._build_search_query(structured_query)
+    country_key = researcher_agent.serper_client._get_country_key(structured_query.location)
+    return json.dumps([
+        canonicalize_query(search_query) or search_query.lower(),
+        country_key,
+        structured_query.min_price,
+        structured_query.max_price,
+        num_results
+    ])
+
+
+def understand_query_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Node 1: Understand the user query and extract structured information.
     
     Args:
         state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer)
         
     Returns:
         Updated state with structured_query
     """
     try:
-        understanding_agent = QueryUnderstandingAgent()
-        structured_data = understanding_agent.understand(state["user_message"])
+        container = _get_container(config)
+        query_cache = container.query_cache
+        
+        # Same message modulo case/accents/punctuation/filler words: reuse the validated query
+        structured_data = query_cache.get(state["user_message"]) if query_cache else None
+        if structured_data is not None:
+            return {
+                "structured_query": StructuredQuery(**structured_data),
+                "error": None
+            }
+        
+        def understand() -> StructuredQuery:
+            understanding_agent = container.query_understanding_agent
+            structured_data = understanding_agent.understand(state["user_message"])
+        
+            # Ensure all required fields exist with defaults (including new fields)
+            structured_data.setdefault("condition", None)
+            structured_data.setdefault("style", None)
+        
+            structured_query = StructuredQuery(**structured_data)
         
-        # Ensure all required fields exist with defaults (including new fields)
-        structured_data.setdefault("condition", None)
-        structured_data.setdefault("style", None)
+            if query_cache:
+                query_cache.set(state["user_message"], structured_data)
+            return structured_query
         
-        structured_query = StructuredQuery(**structured_data)
+        # Identical messages in flight share one LLM call
+        structured_query = single_flight.do("query_understanding", _message_key(state["user_message"]), understand)
         
         return {
             "structured_query": structured_query,
@@ -49,20 +113,70 @@ def understand_query_node(state: ShoppingState) -> Dict[str, Any]:
         }
 
 
-def check_conversation_node(state: ShoppingState) -> Dict[str, Any]:
+async def aunderstand_query_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
-    Node 0: Check if user message is a conversational query using LLM.
-    Uses fast keyword detection first to avoid LLM call for obvious product searches.
+    Async version of understand_query_node (non-blocking LLM call).
     
     Args:
         state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer)
         
     Returns:
-        Updated state with is_conversational flag and response
+        Updated state with structured_query
     """
-    message = state.get("user_message", "").lower().strip()
+    try:
+        container = _get_container(config)
+        query_cache = container.query_cache
+        
+        structured_data = await query_cache.aget(state["user_message"]) if query_cache else None
+        if structured_data is not None:
+            return {
+                "structured_query": StructuredQuery(**structured_data),
+                "error": None
+            }
+        
+        async def understand() -> StructuredQuery:
+            understanding_agent = container.query_understanding_agent
+            structured_data = await understanding_agent.aunderstand(state["user_message"])
     
-    # Fast detection: if message contains obvious product keywords, skip LLM call
+            # Ensure all required fields exist with defaults (including new fields)
+            structured_data.setdefault("condition", None)
+            structured_data.setdefault("style", None)
+        
+            structured_query = StructuredQuery(**structured_data)
+        
+            if query_cache:
+                await query_cache.aset(state["user_message"], structured_data)
+            return structured_query
+        
+        # Identical messages in flight share one LLM call
+        structured_query = await single_flight.ado("query_understanding", _message_key(state["user_message"]), understand)
+        
+        return {
+            "structured_query": structured_query,
+            "error": None
+        }
+    except Exception as e:
+        import traceback
+        print(f"Error in aunderstand_query_node: {str(e)}")
+        print(traceback.format_exc())
+        
+        return {
+            "structured_query": None,
+            "error": f"Error understanding query: {str(e)}"
+        }
+
+
+def _is_obvious_product_search(message: str) -> bool:
+    """
+    Fast keyword detection for obvious product searches (avoids an LLM call).
+    
+    Args:
+        message: Lowercased, stripped user message
+    
+    Returns:
+        True if the message contains product keywords
+    """
     # Include both French and English keywords to ensure language-independent detection
     product_keywords = [
         # Products
@@ -84,8 +198,26 @@ def check_conversation_node(state: ShoppingState) -> Dict[str, Any]:
         "air force", "nike", "adidas", "samsung", "apple", "iphone"
     ]
     
+    return any(keyword in message for keyword in product_keywords)
+
+
+def check_conversation_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Node 0: Check if user message is a conversational query using LLM.
+    Uses fast keyword detection first to avoid LLM call for obvious product searches.
+    
+    Args:
+        state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer)
+    
+    Returns:
+        Updated state with is_conversational flag and response
+    """
+    message = state.get("user_message", "").lower().strip()
+    
+    # Fast detection: if message contains obvious product keywords, skip LLM call
     # If message contains product keywords, it's likely a product search - skip LLM
-    if any(keyword in message for keyword in product_keywords):
+    if _is_obvious_product_search(message):
         return {
             "is_conversational": False,
             "conversational_response": None
@@ -93,12 +225,25 @@ def check_conversation_node(state: ShoppingState) -> Dict[str, Any]:
     
     # For ambiguous cases (short messages, greetings, questions), use LLM
     try:
-        conversation_handler = ConversationHandlerAgent()
-        analysis = conversation_handler.analyze_message(message)
+        container = _get_container(config)
+        if settings.combined_understanding_enabled:
+            # One call classifies the message and extracts the structured query
+            analysis = single_flight.do(
+                "combined_understanding",
+                _message_key(message),
+                lambda: container.combined_understanding_agent.analyze(state.get("user_message", ""))
+            )
+        else:
+            analysis = single_flight.do(
+                "conversation",
+                message,
+                lambda: container.conversation_handler_agent.analyze_message(message)
+            )
         
         return {
             "is_conversational": analysis.get("is_conversational", False),
-            "conversational_response": analysis.get("response")
+            "conversational_response": analysis.get("response"),
+            "combined_structured_query": _to_structured_query(analysis.get("structured_query"))
         }
     except Exception as e:
         # If LLM fails, assume it's a product search
@@ -108,6 +253,105 @@ def check_conversation_node(state: ShoppingState) -> Dict[str, Any]:
         }
 
 
+async def acheck_conversation_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Async version of check_conversation_node (non-blocking LLM call).
+    When streaming, the conversational reply is pushed token by token ("conversation_delta").
+    
+    Args:
+        state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer and, when streaming, a token sink)
+    
+    Returns:
+        Updated state with is_conversational flag and response
+    """
+    message = state.get("user_message", "").lower().strip()
+    
+    if _is_obvious_product_search(message):
+        return {
+            "is_conversational": False,
+            "conversational_response": None
+        }
+    
+    try:
+        container = _get_container(config)
+        if settings.combined_understanding_enabled:
+            # One call classifies the message and extracts the structured query
+            analyzer = container.combined_understanding_agent
+            stream_analysis, analyze = analyzer.astream_analysis, analyzer.aanalyze
+            namespace, key = "combined_understanding", _message_key(message)
+            message = state.get("user_message", "")
+        else:
+            handler = container.conversation_handler_agent
+            stream_analysis, analyze = handler.astream_analysis, handler.aanalyze_message
+            namespace, key = "conversation", message
+        
+        token_sink = _get_token_sink(config)
+        if token_sink:
+            analysis = await stream_analysis(
+                message,
+                lambda text: token_sink("conversation_delta", text)
+            )
+        else:
+            # Streamed replies are per client; only non-streaming calls are coalesced
+            analysis = await single_flight.ado(namespace, key, lambda: analyze(message))
+        
+        return {
+            "is_conversational": analysis.get("is_conversational", False),
+            "conversational_response": analysis.get("response"),
+            "combined_structured_query": _to_structured_query(analysis.get("structured_query"))
+        }
+    except Exception as e:
+        # If LLM fails, assume it's a product search
+        return {
+            "is_conversational": False,
+            "conversational_response": None
+        }
+
+
+def _to_structured_query(structured_data: Optional[Dict[str, Any]]) -> Optional[StructuredQuery]:
+    """
+    Validate structured query fields returned by the combined agent.
+    
+    Args:
+        structured_data: Structured query dictionary (or None)
+    
+    Returns:
+        StructuredQuery, or None if missing/invalid (understand_query then runs as usual)
+    """
+    if not structured_data:
+        return None
+    try:
+        return StructuredQuery(**structured_data)
+    except Exception as e:
+        print(f"Warning: Invalid combined structured query: {e}")
+        return None
+
+
+def use_combined_query_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Node 1 (combined mode): use the structured query extracted by check_conversation
+    instead of calling the query understanding agent.
+    
+    Args:
+        state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer)
+    
+    Returns:
+        Updated state with structured_query
+    """
+    structured_query = state["combined_structured_query"]
+    
+    query_cache = _get_container(config).query_cache
+    if query_cache:
+        query_cache.set(state["user_message"], structured_query.model_dump())
+    
+    return {
+        "structured_query": structured_query,
+        "error": None
+    }
+
+
 def check_feedback_node(state: ShoppingState) -> Dict[str, Any]:
     """
     Node 1.5: Check if user message is negative feedback.
@@ -150,13 +394,15 @@ def check_feedback_node(state: ShoppingState) -> Dict[str, Any]:
     }
 
 
-def research_products_node(state: ShoppingState) -> Dict[str, Any]:
+def research_products_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Node 2: Search for products based on structured query.
     Excludes products already shown if this is a negative feedback.
+    Negative feedback is answered from the session result pool when it has products.
     
     Args:
         state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer)
         
     Returns:
         Updated state with products
@@ -169,32 +415,91 @@ def research_products_node(state: ShoppingState) -> Dict[str, Any]:
         }
     
     try:
-        researcher_agent = ProductResearcherAgent()
-        excluded_links = state.get("excluded_product_links", [])
+        researcher_agent = _get_container(config).product_researcher_agent
+        structured_query = state["structured_query"]
+        pool_key = _research_key(researcher_agent, structured_query)
         
-        # Search for more products if negative feedback (get more to exclude previous ones)
-        num_results = 20 if state.get("is_negative_feedback") else 10
+        # "Show me more": products over-fetched by previous searches, no SerperDev round trip
+        update = _take_pooled_products(state, pool_key)
         
-        products = researcher_agent.search(
-            state["structured_query"],
-            num_results=num_results
-        )
+        if update is None:
+            # Search for more products if negative feedback (get more to exclude previous ones)
+            num_results = 20 if state.get("is_negative_feedback") else 10
         
-        # Exclude products already shown
-        if excluded_links:
-            products = [p for p in products if p.link not in excluded_links]
-        
-        # Limit to 10 results
-        products = products[:10]
+            # Identical searches in flight share one SerperDev call
+            products = single_flight.do(
+                "research",
+                _research_key(researcher_agent, structured_query, num_results),
+                lambda: researcher_agent.search(structured_query, num_results=num_results)
+            )
+            
+            update = _select_new_products(state, products)
+            _pool_products(state, pool_key, products, num_results, update)
         
-        # Update excluded links with new products shown
-        new_excluded_links = excluded_links + [p.link for p in products]
+        if settings.result_pool_enabled and state.get("session_id"):
+            # Refill the pool with the next page while the user looks at these products
+            session_result_pool.prefetch_in_thread(
+                state["session_id"],
+                pool_key,
+                lambda depth: researcher_agent.search(structured_query, num_results=depth),
+                update["excluded_product_links"]
+            )
         
+        return update
+    except Exception as e:
         return {
-            "products": products,
-            "excluded_product_links": new_excluded_links,
-            "error": None
+            "products": [],
+            "error": f"Error researching products: {str(e)}"
+        }
+
+
+async def aresearch_products_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Async version of research_products_node (non-blocking SerperDev calls,
+    result pool refilled by a background task).
+    
+    Args:
+        state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer)
+    
+    Returns:
+        Updated state with products
+    """
+    if not state.get("structured_query"):
+        return {
+            "products": [],
+            "error": "No structured query available"
         }
+    
+    try:
+        researcher_agent = _get_container(config).product_researcher_agent
+        structured_query = state["structured_query"]
+        pool_key = _research_key(researcher_agent, structured_query)
+        
+        update = _take_pooled_products(state, pool_key)
+        
+        if update is None:
+            num_results = 20 if state.get("is_negative_feedback") else 10
+            
+            # Identical searches in flight share one SerperDev call
+            products = await single_flight.ado(
+                "research",
+                _research_key(researcher_agent, structured_query, num_results),
+                lambda: researcher_agent.asearch(structured_query, num_results=num_results)
+            )
+            
+            update = _select_new_products(state, products)
+            _pool_products(state, pool_key, products, num_results, update)
+        
+        if settings.result_pool_enabled and state.get("session_id"):
+            session_result_pool.prefetch(
+                state["session_id"],
+                pool_key,
+                lambda depth: researcher_agent.asearch(structured_query, num_results=depth),
+                update["excluded_product_links"]
+            )
+        
+        return update
     except Exception as e:
         return {
             "products": [],
@@ -202,12 +507,80 @@ def research_products_node(state: ShoppingState) -> Dict[str, Any]:
         }
 
 
-def compare_prices_node(state: ShoppingState) -> Dict[str, Any]:
+def _take_pooled_products(state: ShoppingState, pool_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Answer negative feedback from the session result pool.
+    
+    Args:
+        state: Current workflow state
+        pool_key: Key of the current search (see _research_key)
+    
+    Returns:
+        Updated state with products, or None if the pool cannot answer (search as usual)
+    """
+    session_id = state.get("session_id")
+    if not (settings.result_pool_enabled and session_id and state.get("is_negative_feedback")):
+        return None
+    
+    products = session_result_pool.take(session_id, pool_key, state.get("excluded_product_links", []))
+    if not products:
+        return None
+    return _select_new_products(state, products)
+
+
+def _pool_products(state: ShoppingState, pool_key: str, products, num_results: int, update: Dict[str, Any]):
+    """
+    Keep the search results that were not shown in the session result pool.
+    
+    Args:
+        state: Current workflow state
+        pool_key: Key of the current search (see _research_key)
+        products: Products returned by the search
+        num_results: Number of results requested
+        update: State update returned by _select_new_products
+    """
+    session_id = state.get("session_id")
+    if settings.result_pool_enabled and session_id:
+        session_result_pool.add(session_id, pool_key, products, num_results, update["excluded_product_links"])
+
+
+def _select_new_products(state: ShoppingState, products) -> Dict[str, Any]:
+    """
+    Exclude products already shown in the session and keep the first 10.
+    
+    Args:
+        state: Current workflow state
+        products: Products returned by the search
+    
+    Returns:
+        Updated state with products and excluded_product_links
+    """
+    excluded_links = state.get("excluded_product_links", [])
+    
+    # Exclude products already shown
+    if excluded_links:
+        products = [p for p in products if p.link not in excluded_links]
+    
+    # Limit to 10 results
+    products = products[:10]
+    
+    # Update excluded links with new products shown
+    new_excluded_links = excluded_links + [p.link for p in products]
+    
+    return {
+        "products": products,
+        "excluded_product_links": new_excluded_links,
+        "error": None
+    }
+
+
+def compare_prices_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Node 3: Compare prices across products and identify best deal.
     
     Args:
         state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer)
         
     Returns:
         Updated state with price comparison results
@@ -221,7 +594,7 @@ def compare_prices_node(state: ShoppingState) -> Dict[str, Any]:
         }
     
     try:
-        comparator_agent = PriceComparatorAgent()
+        comparator_agent = _get_container(config).price_comparator_agent
         comparison_result = comparator_agent.compare_prices(products)
         
         return {
@@ -235,115 +608,91 @@ def compare_prices_node(state: ShoppingState) -> Dict[str, Any]:
         }
 
 
-def generate_product_message_node(state: ShoppingState) -> Dict[str, Any]:
+def _build_product_message_context(state: ShoppingState) -> Dict[str, Any]:
     """
-    Node 4: Generate a contextual message to accompany product results using LLM.
+    Build the prompts and fallback context used to present product results.
     
     Args:
-        state: Current workflow state
+        state: Current workflow state (must contain products)
         
     Returns:
-        Updated state with product_message
+        Dictionary with system_prompt, user_prompt and the fields used by the fallback message
     """
     products = state.get("products", [])
     structured_query = state.get("structured_query")
     price_comparison = state.get("price_comparison")
     user_message = state.get("user_message", "")
     
-    # If no products, don't generate a message
-    if not products:
-        return {
-            "product_message": None,
-            "error": None
-        }
+    # Build context about products
+    num_products = len(products)
+    product_type = structured_query.product_type if structured_query else "produits"
+    category = structured_query.category if structured_query and structured_query.category else None
+    location = structured_query.location if structured_query and structured_query.location else None
+    delivery_location = structured_query.delivery_location if structured_query and structured_query.delivery_location else None
     
-    try:
-        llm = get_llm_provider()
-        
-        # Build context about products
-        num_products = len(products)
-        product_type = structured_query.product_type if structured_query else "produits"
-        category = structured_query.category if structured_query and structured_query.category else None
-        location = structured_query.location if structured_query and structured_query.location else None
-        delivery_location = structured_query.delivery_location if structured_query and structured_query.delivery_location else None
-        
-        # Get best price info if available
-        best_price_info = ""
-        if price_comparison:
-            best_price = price_comparison.get("best_price")
-            best_platform = price_comparison.get("best_platform")
-            if best_price and best_platform:
-                best_price_info = f"Le meilleur prix trouvé est {best_price} sur {best_platform}."
-        
-        # Build detailed product information for LLM
-        product_details = []
-        for i, product in enumerate(products[:5], 1):  # Top 5 products
-            product_info = f"{i}. {product.name}"
-            if product.price:
-                product_info += f" - {product.price}"
-            if product.platform:
-                product_info += f" ({product.platform})"
-            product_details.append(product_info)
-        
-        product_summary = "\n".join(product_details)
-        
-        # Extract unique platforms
-        platforms = list(set([p.platform for p in products if p.platform]))
-        platforms_text = ", ".join(platforms[:4])  # Top 4 platforms
-        if len(platforms) > 4:
-            platforms_text += f" et {len(platforms) - 4} autres"
-        
-        # Extract price range
-        price_range = ""
-        prices_with_values = []
-        for p in products:
-            if p.price:
-                try:
-                    import re
-                    price_str = p.price.replace("€", "").replace("$", "").replace(",", "").strip()
-                    numbers = re.findall(r'\d+\.?\d*', price_str)
-                    if numbers:
-                        prices_with_values.append(float(numbers[0]))
-                except:
-                    pass
-        
-        if prices_with_values:
-            min_price = min(prices_with_values)
-            max_price = max(prices_with_values)
-            if min_price == max_price:
-                price_range = f"Prix: {products[0].price}"
-            else:
-                # Find the actual price strings for min and max
-                min_price_product = next((p for p in products if p.price and str(min_price) in p.price.replace(",", "")), None)
-                max_price_product = next((p for p in products if p.price and str(max_price) in p.price.replace(",", "")), None)
-                if min_price_product and max_price_product:
-                    price_range = f"Prix de {min_price_product.price} à {max_price_product.price}"
-        
-        # Build location context
-        location_context = ""
-        if delivery_location:
-            # Prefer delivery location (more specific)
-            location_context = f" disponibles à {delivery_location.title()}"
-        elif location:
-            location_context = f" disponibles en {location.capitalize()}"
-        
-        # Build category context
-        category_context = ""
-        if category:
-            category_context = f" {category}"
-        
-        # Determine language (French or English)
-        is_french = any(word in user_message.lower() for word in ["je", "vous", "cherche", "moins", "sous", "euro", "€"])
-        
-        if is_french:
-            system_prompt = """Tu es BuyBuddy, un assistant shopping amical et utile.
+    # Get best price info if available
+    best_price_info = ""
+    if price_comparison:
+        best_price = price_comparison.get("best_price")
+        best_platform = price_comparison.get("best_platform")
+        if best_price and best_platform:
+            best_price_info = f"Le meilleur prix trouvé est {best_price} sur {best_platform}."
+        
+    # Build detailed product information for LLM
+    product_details = []
+    for i, product in enumerate(products[:5], 1):  # Top 5 products
+        product_info = f"{i}. {product.name}"
+        if product.price:
+            product_info += f" - {product.price}"
+        if product.platform:
+            product_info += f" ({product.platform})"
+        product_details.append(product_info)
+        
+    product_summary = "\n".join(product_details)
+        
+    # Extract unique platforms
+    platforms = list(set([p.platform for p in products if p.platform]))
+    platforms_text = ", ".join(platforms[:4])  # Top 4 platforms
+    if len(platforms) > 4:
+        platforms_text += f" et {len(platforms) - 4} autres"
+        
+    # Extract price range (prices parsed at ingest, compared in euros)
+    price_range = ""
+    priced_products = [p for p in products if p.price and get_product_record(p).price_eur is not None]
+        
+    if priced_products:
+        min_price_product = min(priced_products, key=lambda p: get_product_record(p).price_eur)
+        max_price_product = max(priced_products, key=lambda p: get_product_record(p).price_eur)
+        if get_product_record(min_price_product).price_eur == get_product_record(max_price_product).price_eur:
+            price_range = f"Prix: {min_price_product.price}"
+        else:
+            price_range = f"Prix de {min_price_product.price} à {max_price_product.price}"
+        
+    # Build location context
+    location_context = ""
+    if delivery_location:
+        # Prefer delivery location (more specific)
+        location_context = f" disponibles à {delivery_location.title()}"
+    elif location:
+        location_context = f" disponibles en {location.capitalize()}"
+        
+    # Build category context
+    category_context = ""
+    if category:
+        category_context = f" {category}"
+        
+    # Determine language (French or English)
+    is_french = any(word in user_message.lower() for word in ["je", "vous", "cherche", "moins", "sous", "euro", "€"])
+        
+    if is_french:
+        system_prompt = """Tu es BuyBuddy, un assistant shopping amical et utile.
 Génère un message naturel et amical en français pour présenter les résultats de recherche de produits.
 Sois concis, amical et informatif. Mentionne le nombre de produits trouvés et la meilleure offre si disponible.
 Garde-le court (1-2 phrases maximum).
 
 IMPORTANT: Retourne UNIQUEMENT le texte du message, PAS de JSON, PAS d'explications, juste le message."""
             
-            user_prompt = f"""Génère un message amical et informatif pour présenter ces résultats de recherche de produits à l'utilisateur.
+        user_prompt = f"""Génère un message amical et informatif pour présenter ces résultats de recherche de produits à l'utilisateur.
 
 Demande originale de l'utilisateur: "{user_message}"
 
@@ -366,15 +715,15 @@ Génère un message naturel et informatif qui:
 - Les encourage à vérifier les résultats
 
 Sois amical, informatif mais concis (2-3 phrases maximum). Retourne UNIQUEMENT le texte du message, rien d'autre."""
-        else:
-            system_prompt = """You are BuyBuddy, a friendly shopping assistant. 
+    else:
+        system_prompt = """You are BuyBuddy, a friendly shopping assistant. 
 Generate a natural, helpful message in English to introduce product search results.
 Be concise, friendly, and informative. Mention the number of products found and the best deal if available.
 Keep it short (1-2 sentences max).
 
 IMPORTANT: Return ONLY the message text, no JSON, no explanations, just the message."""
             
-            user_prompt = f"""Generate a friendly and informative message to present these product search results to the user.
+        user_prompt = f"""Generate a friendly and informative message to present these product search results to the user.
 
 User's original request: "{user_message}"
 
@@ -398,80 +747,253 @@ Generate a natural and informative message that:
 
 Be friendly, informative but concise (2-3 sentences max). Return ONLY the message text, nothing else."""
 
+    return {
+        "system_prompt": system_prompt,
+        "user_prompt": user_prompt,
+        "num_products": num_products,
+        "product_type": product_type,
+        "category_context": category_context,
+        "location": location,
+        "delivery_location": delivery_location,
+        "best_price_info": best_price_info
+    }
+
+
+def _clean_product_message(message: Optional[str]) -> Optional[str]:
+    """
+    Clean up an LLM product message (remove any JSON formatting if present).
+    
+    Args:
+        message: Raw LLM output
+    
+    Returns:
+        Cleaned message or None if empty
+    """
+    if not message:
+        return None
+    
+    message = message.strip()
+    # Remove JSON wrapper if present
+    if message.startswith("{") or message.startswith("["):
         try:
-            # Generate message with LLM using generate() for direct text output
+            import json
+            parsed = json.loads(message)
+            if isinstance(parsed, dict):
+                message = parsed.get("message") or parsed.get("response") or parsed.get("text") or message
+            elif isinstance(parsed, str):
+                message = parsed
+        except:
+            pass  # Keep original message if JSON parsing fails
+    
+    # Ensure message is not empty
+    if not message or len(message.strip()) == 0:
+        return None
+    
+    return message
+
+
+def _fallback_product_message(context: Dict[str, Any]) -> str:
+    """
+    Generate a simple product message without LLM.
+    
+    Args:
+        context: Context built by _build_product_message_context()
+    
+    Returns:
+        Fallback message
+    """
+    num_products = context["num_products"]
+    product_type = context["product_type"]
+    category_context = context["category_context"]
+    delivery_location = context["delivery_location"]
+    location = context["location"]
+    
+    if delivery_location:
+        message = f"J'ai trouvé {num_products} {product_type}{category_context} disponibles à {delivery_location.title()}."
+    elif location:
+        message = f"J'ai trouvé {num_products} {product_type}{category_context} disponibles en {location.capitalize()}."
+    else:
+        message = f"J'ai trouvé {num_products} {product_type}{category_context} pour vous."
+    
+    if context["best_price_info"]:
+        message += f" {context['best_price_info']}"
+    
+    return message
+
+
+def _template_product_message(state: ShoppingState, context: Dict[str, Any]) -> str:
+    """
+    Deterministic product message built from the price comparison (no LLM).
+    
+    Args:
+        state: Current workflow state (products and price_comparison)
+        context: Context built by _build_product_message_context()
+    
+    Returns:
+        Template message
+    """
+    message = _fallback_product_message(context)
+    
+    price_comparison = state.get("price_comparison") or {}
+    best_deal = price_comparison.get("best_deal")
+    if best_deal and best_deal.price and not context["best_price_info"]:
+        message += f" Meilleur prix : {best_deal.price}"
+        if best_deal.platform:
+            message += f" sur {best_deal.platform}"
+        message += "."
+    
+    platforms = list(dict.fromkeys(p.platform for p in state.get("products", []) if p.platform))
+    if len(platforms) > 1:
+        message += f" Offres de {', '.join(platforms[:3])}{' et autres' if len(platforms) > 3 else ''}."
+    
+    return message
+
+
+def _start_background_product_message(state: ShoppingState, config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Background mode: answer with the template message now and generate the LLM message
+    in the background (fetched via GET /chat/{session_id}/message/{turn_id}).
+    
+    Args:
+        state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer)
+    
+    Returns:
+        Updated state with the template product_message
+    """
+    llm = _get_container(config).llm_provider
+    context = _build_product_message_context(state)
+    template_message = _template_product_message(state, context)
+    
+    async def polish() -> Optional[str]:
+        return _clean_product_message(
+            await llm.agenerate(context["user_prompt"], system_prompt=context["system_prompt"])
+        )
+    
+    product_message_store.start(state["session_id"], state["turn_id"], template_message, polish())
+    
+    return {
+        "product_message": template_message,
+        "product_message_pending": True,
+        "error": None
+    }
+
+
+def _simple_product_message(state: ShoppingState) -> Dict[str, Any]:
+    """
+    Last-resort product message when building the context fails.
+    
+    Args:
+        state: Current workflow state
+    
+    Returns:
+        Updated state with product_message
+    """
+    num_products = len(state.get("products", []))
+    if num_products > 0:
+        return {
+            "product_message": f"J'ai trouvé {num_products} produit{'s' if num_products > 1 else ''} correspondant à votre recherche.",
+            "error": None
+        }
+    else:
+        return {
+            "product_message": None,
+            "error": None
+        }
+
+
+def generate_product_message_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Node 4: Generate a contextual message to accompany product results using LLM.
+    
+    Args:
+        state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer)
+    
+    Returns:
+        Updated state with product_message
+    """
+    # If no products, don't generate a message
+    if not state.get("products"):
+        return {
+            "product_message": None,
+            "error": None
+        }
+    
+    try:
+        llm = _get_container(config).llm_provider
+        context = _build_product_message_context(state)
+        
+        # Generate message with LLM using generate() for direct text output
+        try:
+            message = _clean_product_message(
+                llm.generate(context["user_prompt"], system_prompt=context["system_prompt"])
+            )
+        except Exception as e:
+            # If generate fails, use fallback
             message = None
-            try:
-                # Use generate() method which returns text directly
-                message = llm.generate(user_prompt, system_prompt=system_prompt)
                 
-                # Clean up the message (remove any JSON formatting if present)
-                if message:
-                    message = message.strip()
-                    # Remove JSON wrapper if present
-                    if message.startswith("{") or message.startswith("["):
-                        try:
-                            import json
-                            parsed = json.loads(message)
-                            if isinstance(parsed, dict):
-                                message = parsed.get("message") or parsed.get("response") or parsed.get("text") or message
-                            elif isinstance(parsed, str):
-                                message = parsed
-                        except:
-                            pass  # Keep original message if JSON parsing fails
+        # Fallback if LLM doesn't return expected format
+        if not message:
+            message = _fallback_product_message(context)
                     
-                    # Ensure message is not empty
-                    if not message or len(message.strip()) == 0:
-                        message = None
-            except Exception as e:
-                # If generate fails, use fallback
-                message = None
-            
-            # Fallback if LLM doesn't return expected format
-            if not message:
-                # Generate simple fallback message
-                if delivery_location:
-                    message = f"J'ai trouvé {num_products} {product_type}{category_context} disponibles à {delivery_location.title()}."
-                elif location:
-                    message = f"J'ai trouvé {num_products} {product_type}{category_context} disponibles en {location.capitalize()}."
-                else:
-                    message = f"J'ai trouvé {num_products} {product_type}{category_context} pour vous."
-                
-                if best_price_info:
-                    message += f" {best_price_info}"
-            
-            return {
-                "product_message": message,
-                "error": None
-            }
-        except Exception as e:
-            # Fallback: generate simple message without LLM
-            if delivery_location:
-                fallback_message = f"J'ai trouvé {num_products} {product_type}{category_context} disponibles à {delivery_location.title()}."
-            elif location:
-                fallback_message = f"J'ai trouvé {num_products} {product_type}{category_context} disponibles en {location.capitalize()}."
-            else:
-                fallback_message = f"J'ai trouvé {num_products} {product_type}{category_context} pour vous."
-            
-            if best_price_info:
-                fallback_message += f" {best_price_info}"
-            
-            return {
-                "product_message": fallback_message,
-                "error": None
-            }
-            
+        return {
+            "product_message": message,
+            "error": None
+        }
     except Exception as e:
         # Even if everything fails, provide a simple message
-        num_products = len(state.get("products", []))
-        if num_products > 0:
-            return {
-                "product_message": f"J'ai trouvé {num_products} produit{'s' if num_products > 1 else ''} correspondant à votre recherche.",
-                "error": None
-            }
-        else:
-            return {
-                "product_message": None,
-                "error": None
-            }
+        return _simple_product_message(state)
 
+
+async def agenerate_product_message_node(state: ShoppingState, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Async version of generate_product_message_node (non-blocking LLM call).
+    When streaming, the message is pushed token by token ("message_delta").
+    In background mode (settings.product_message_mode), returns a template message
+    immediately and generates the LLM message after the response.
+    
+    Args:
+        state: Current workflow state
+        config: LangGraph run config (carries the AgentContainer and, when streaming, a token sink)
+    
+    Returns:
+        Updated state with product_message
+    """
+    if not state.get("products"):
+        return {
+            "product_message": None,
+            "error": None
+        }
+    
+    try:
+        if settings.product_message_mode == "background" and state.get("turn_id"):
+            return _start_background_product_message(state, config)
+        
+        llm = _get_container(config).llm_provider
+        context = _build_product_message_context(state)
+        
+        token_sink = _get_token_sink(config)
+        try:
+            if token_sink:
+                chunks = []
+                async for chunk in llm.generate_stream(context["user_prompt"], system_prompt=context["system_prompt"]):
+                    chunks.append(chunk)
+                    token_sink("message_delta", chunk)
+                message = _clean_product_message("".join(chunks))
+            else:
+                message = _clean_product_message(
+                    await llm.agenerate(context["user_prompt"], system_prompt=context["system_prompt"])
+                )
+        except Exception as e:
+            message = None
+        
+        if not message:
+            message = _fallback_product_message(context)
+        
+        return {
+            "product_message": message,
+            "error": None
+        }
+    except Exception as e:
+        return _simple_product_message(state)
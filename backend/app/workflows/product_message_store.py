@@ -0,0 +1,189 @@
+"""
+In-memory store for product messages generated in the background.
+/chat answers with a template message; the LLM-polished message is stored here
+per turn and fetched with GET /chat/{session_id}/message/{turn_id} (or pushed on the stream).
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Awaitable, Callable, Set
+
+
+class ProductMessageStore:
+    """Pending/ready product messages, keyed by turn ID."""
+    
+    def __init__(self, max_entries: int = 1000, ttl: float = 900.0):
+        """
+        Initialize the store.
+        
+        Args:
+            max_entries: Maximum number of turns kept (oldest are dropped, unless still being generated)
+            ttl: Seconds a message is kept after the turn started
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Guards entry status and callbacks (on_ready is called from worker threads)
+        self._lock = threading.Lock()
+        # Running generations (the event loop only keeps weak references to tasks)
+        self._tasks: Set[asyncio.Task] = set()
+        
+        # Statistics
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+    
+    def start(self, session_id: str, turn_id: str, template_message: str, generation: Awaitable[Optional[str]]):
+        """
+        Register a turn and generate its polished message in the background.
+        Must be called from a running event loop.
+        
+        Args:
+            session_id: Session ID
+            turn_id: Turn ID
+            template_message: Message already returned to the client (kept if generation fails)
+            generation: Coroutine returning the polished message (or None)
+        """
+        entry = {
+            "session_id": session_id,
+            "turn_id": turn_id,
+            "status": "pending",
+            "message": template_message,
+            "created_at": time.time(),
+            "ready": asyncio.Event(),
+            "callbacks": [],
+            "task": None
+        }
+        with self._lock:
+            self._purge()
+            self._entries[turn_id] = entry
+        self.started += 1
+        
+        async def run():
+            try:
+                message = await generation
+                with self._lock:
+                    entry["status"] = "ready"
+                    if message:
+                        entry["message"] = message
+                self.completed += 1
+            except Exception as e:
+                print(f"Warning: Background product message failed: {e}")
+                with self._lock:
+                    entry["status"] = "failed"
+                self.failed += 1
+            finally:
+                entry["ready"].set()
+            
+            with self._lock:
+                callbacks, entry["callbacks"] = entry["callbacks"], []
+            if entry["status"] == "ready" and callbacks:
+                # Callbacks may write to SQLite: keep them off the event loop
+                await asyncio.to_thread(self._run_callbacks, callbacks, entry["message"])
+        
+        # Keep a reference so the task is not garbage collected, even once its turn is dropped
+        entry["task"] = asyncio.create_task(run())
+        self._tasks.add(entry["task"])
+        entry["task"].add_done_callback(self._tasks.discard)
+    
+    def get(self, session_id: str, turn_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the product message of a turn.
+        
+        Args:
+            session_id: Session ID
+            turn_id: Turn ID
+        
+        Returns:
+            Dictionary with session_id, turn_id, status ("pending", "ready", "failed") and message,
+            or None if the turn is unknown
+        """
+        entry = self._entries.get(turn_id)
+        if entry is None or entry["session_id"] != session_id:
+            return None
+        return {key: entry[key] for key in ("session_id", "turn_id", "status", "message")}
+    
+    def on_ready(self, session_id: str, turn_id: str, callback: Callable[[str], None]) -> bool:
+        """
+        Call back with the polished message once it is generated (right away if it already is).
+        Not called if generation fails: the template message stays the turn's message.
+        
+        Args:
+            session_id: Session ID
+            turn_id: Turn ID
+            callback: Called with the polished message
+        
+        Returns:
+            False if the turn is unknown or its generation failed
+        """
+        with self._lock:
+            entry = self._entries.get(turn_id)
+            if entry is None or entry["session_id"] != session_id or entry["status"] == "failed":
+                return False
+            if entry["status"] == "pending":
+                entry["callbacks"].append(callback)
+                return True
+            message = entry["message"]
+        
+        self._run_callbacks([callback], message)
+        return True
+    
+    async def wait(self, session_id: str, turn_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait (up to timeout seconds) for the polished message, then return it like get().
+        
+        Args:
+            session_id: Session ID
+            turn_id: Turn ID
+            timeout: Maximum wait in seconds
+        
+        Returns:
+            Same as get()
+        """
+        entry = self._entries.get(turn_id)
+        if entry is not None and entry["session_id"] == session_id and timeout > 0:
+            try:
+                await asyncio.wait_for(entry["ready"].wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(session_id, turn_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get background generation statistics.
+        
+        Returns:
+            Dictionary with pending, started, completed and failed counts
+        """
+        return {
+            "pending": sum(1 for entry in self._entries.values() if entry["status"] == "pending"),
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+    
+    @staticmethod
+    def _run_callbacks(callbacks, message: str):
+        """Run on_ready callbacks, logging their failures."""
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"Warning: Product message callback failed: {e}")
+    
+    def _purge(self):
+        """Drop expired turns and the oldest turns above max_entries (turns still being generated are kept)."""
+        cutoff = time.time() - self.ttl
+        excess = len(self._entries) - self.max_entries + 1
+        for turn_id, entry in list(self._entries.items()):
+            if entry["created_at"] >= cutoff and excess <= 0:
+                break
+            if entry["status"] != "pending":
+                del self._entries[turn_id]
+                excess -= 1
+
+
+# Global instance
+product_message_store = ProductMessageStore()
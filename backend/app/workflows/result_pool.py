@@ -0,0 +1,257 @@
+"""
+Per-session pool of over-fetched products not shown yet.
+After a search, the products beyond the 10 shown are kept here and the next, deeper
+page is prefetched in the background, so "show me more" is answered from memory.
+Prefetches are background SerperDev requests (see rate_limiter): they stop once the
+daily credit budget is nearly spent.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Set
+from app.models.schemas import Product
+from app.infrastructure.external_apis.rate_limiter import serper_rate_limiter, background_priority
+from app.core.config import settings
+
+
+class SessionResultPool:
+    """Not-yet-shown products per session, for the session's current search."""
+    
+    def __init__(self, max_sessions: int = 1000, ttl: float = 1800.0):
+        """
+        Initialize the pool.
+        
+        Args:
+            max_sessions: Maximum number of sessions kept (least recently used are dropped)
+            ttl: Seconds a session pool is kept after its last update
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._pools: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._background_tasks: Set[asyncio.Task] = set()
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.prefetches = 0
+        self.prefetch_failures = 0
+    
+    def take(self, session_id: str, search_key: str, excluded_links: List[str], count: int = 10) -> List[Product]:
+        """
+        Take up to `count` products not shown yet for the session's current search.
+        
+        Args:
+            session_id: Session ID
+            search_key: Key of the search the products must come from
+            excluded_links: Links already shown in the session
+            count: Maximum number of products
+        
+        Returns:
+            List of products (empty if the pool has nothing for this search)
+        """
+        excluded = set(excluded_links)
+        with self._lock:
+            pool = self._get_pool(session_id, search_key)
+            products = []
+            if pool is not None:
+                remaining = [p for p in pool["products"] if p.link not in excluded]
+                products, pool["products"] = remaining[:count], remaining[count:]
+                pool["updated_at"] = time.time()
+        
+        if products:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return products
+    
+    def add(
+        self,
+        session_id: str,
+        search_key: str,
+        products: List[Product],
+        depth: int,
+        excluded_links: List[str],
+        replace: bool = True
+    ):
+        """
+        Add search results to the session pool.
+        
+        Args:
+            session_id: Session ID
+            search_key: Key of the search that returned the products
+            products: Products returned by the search
+            depth: Number of results requested from the search
+            excluded_links: Links already shown in the session
+            replace: Replace the pool of a different search (False for prefetches,
+                whose results are dropped if the session moved on to another search)
+        """
+        with self._lock:
+            pool = self._get_pool(session_id, search_key)
+            if pool is None:
+                if not replace:
+                    return
+                pool = {"search_key": search_key, "products": [], "depth": 0, "exhausted": False, "refilling": False}
+                self._pools[session_id] = pool
+            
+            known = set(excluded_links) | {p.link for p in pool["products"]}
+            new_products = [p for p in products if p.link not in known]
+            pool["products"].extend(new_products)
+            
+            if depth > pool["depth"]:
+                # A deeper page bringing nothing new: the search has no more results
+                if pool["depth"] and not new_products:
+                    pool["exhausted"] = True
+                pool["depth"] = depth
+            pool["updated_at"] = time.time()
+            
+            self._pools.move_to_end(session_id)
+            self._purge()
+    
+    def claim_prefetch(self, session_id: str, search_key: str) -> Optional[int]:
+        """
+        Decide whether the session pool needs a refill, and mark it as refilling.
+        
+        Args:
+            session_id: Session ID
+            search_key: Key of the session's current search
+        
+        Returns:
+            Number of results to request (next page depth), or None if no prefetch is needed
+        """
+        with self._lock:
+            pool = self._get_pool(session_id, search_key)
+            if pool is None or pool["refilling"] or pool["exhausted"]:
+                return None
+            if serper_rate_limiter.degraded:
+                return None
+            if len(pool["products"]) >= settings.result_pool_low_watermark:
+                return None
+            depth = min(pool["depth"] + settings.result_pool_page_size, settings.result_pool_max_depth)
+            if depth <= pool["depth"]:
+                return None
+            pool["refilling"] = True
+            self.prefetches += 1
+            return depth
+    
+    def prefetch(
+        self,
+        session_id: str,
+        search_key: str,
+        search: Callable[[int], Awaitable[List[Product]]],
+        excluded_links: List[str]
+    ):
+        """
+        Refill the session pool with the next page in a background asyncio task.
+        Must be called from a running event loop.
+        
+        Args:
+            session_id: Session ID
+            search_key: Key of the session's current search
+            search: Coroutine function search(num_results) returning products
+            excluded_links: Links already shown in the session
+        """
+        depth = self.claim_prefetch(session_id, search_key)
+        if depth is None:
+            return
+        
+        async def run():
+            try:
+                with background_priority():
+                    products = await search(depth)
+                self.add(session_id, search_key, products, depth, excluded_links, replace=False)
+            except Exception as e:
+                self.prefetch_failures += 1
+                print(f"Warning: Result pool prefetch failed: {e}")
+            finally:
+                self._release(session_id, search_key)
+        
+        task = asyncio.create_task(run())
+        # Keep a reference so the task is not garbage collected
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    def prefetch_in_thread(
+        self,
+        session_id: str,
+        search_key: str,
+        search: Callable[[int], List[Product]],
+        excluded_links: List[str]
+    ):
+        """
+        Sync version of prefetch(): the next page is fetched in a background thread.
+        
+        Args:
+            session_id: Session ID
+            search_key: Key of the session's current search
+            search: Function search(num_results) returning products
+            excluded_links: Links already shown in the session
+        """
+        depth = self.claim_prefetch(session_id, search_key)
+        if depth is None:
+            return
+        
+        def run():
+            try:
+                with background_priority():
+                    products = search(depth)
+                self.add(session_id, search_key, products, depth, excluded_links, replace=False)
+            except Exception as e:
+                self.prefetch_failures += 1
+                print(f"Warning: Result pool prefetch failed: {e}")
+            finally:
+                self._release(session_id, search_key)
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+        
+        Returns:
+            Dictionary with sessions, pooled products, hits/misses and prefetch counters
+        """
+        with self._lock:
+            pooled = sum(len(pool["products"]) for pool in self._pools.values())
+            refilling = sum(1 for pool in self._pools.values() if pool["refilling"])
+        return {
+            "enabled": settings.result_pool_enabled,
+            "sessions": len(self._pools),
+            "pooled_products": pooled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "prefetches": self.prefetches,
+            "prefetches_in_flight": refilling,
+            "prefetch_failures": self.prefetch_failures
+        }
+    
+    def _get_pool(self, session_id: str, search_key: str) -> Optional[Dict[str, Any]]:
+        """Get the session pool if it belongs to this search and is not expired (lock held)."""
+        pool = self._pools.get(session_id)
+        if pool is None or pool["search_key"] != search_key:
+            return None
+        if time.time() - pool["updated_at"] > self.ttl:
+            del self._pools[session_id]
+            return None
+        return pool
+    
+    def _release(self, session_id: str, search_key: str):
+        """Clear the refilling flag of a session pool."""
+        with self._lock:
+            pool = self._pools.get(session_id)
+            if pool is not None and pool["search_key"] == search_key:
+                pool["refilling"] = False
+    
+    def _purge(self):
+        """Drop expired pools and the least recently used ones above max_sessions (lock held)."""
+        now = time.time()
+        for session_id in [sid for sid, pool in self._pools.items() if now - pool["updated_at"] > self.ttl]:
+            del self._pools[session_id]
+        while len(self._pools) > self.max_sessions:
+            self._pools.popitem(last=False)
+
+
+# Global result pool instance
+session_result_pool = SessionResultPool()
@@ -3,8 +3,10 @@ LangGraph shopping workflow.
 Orchestrates the query understanding and product research agents.
 """
 
+import asyncio
+import uuid
 from langgraph.graph import StateGraph, END
-from typing import Optional
+from typing import Optional, Tuple, Dict, Any, AsyncIterator
 from app.workflows.state import ShoppingState
 from app.workflows.nodes import (
     understand_query_node,
@@ -12,40 +14,63 @@ from app.workflows.nodes import (
     check_feedback_node,
     compare_prices_node,
     generate_product_message_node,
-    check_conversation_node
+    check_conversation_node,
+    use_combined_query_node,
+    aunderstand_query_node,
+    aresearch_products_node,
+    agenerate_product_message_node,
+    acheck_conversation_node
 )
 from app.workflows.session_manager import session_manager
+from app.workflows.product_message_store import product_message_store
+from app.workflows.container import AgentContainer
 from app.models.schemas import StructuredQuery
 from app.infrastructure.repositories.sqlite_repository import SQLiteRepository
+from app.infrastructure.repositories.write_behind import persistence_writer
+from app.core.config import settings
 
 
 class ShoppingWorkflow:
     """Shopping workflow using LangGraph."""
     
-    def __init__(self):
-        """Initialize the workflow."""
+    def __init__(self, container: Optional[AgentContainer] = None):
+        """
+        Initialize the workflow.
+        
+        Args:
+            container: Shared agents/clients/provider (default: built lazily once per workflow)
+        """
+        self.container = container or AgentContainer()
         self.graph = self._build_graph()
         self.app = self.graph.compile()
+        # Same graph with async nodes, used by arun() (LLM and SerperDev calls don't block the event loop)
+        self.async_graph = self._build_graph(use_async=True)
+        self.async_app = self.async_graph.compile()
         self.repository = SQLiteRepository()  # Initialize repository
     
-    def _build_graph(self) -> StateGraph:
+    def _build_graph(self, use_async: bool = False) -> StateGraph:
         """
         Build the LangGraph workflow with iterative search support.
         
+        Args:
+            use_async: Use the async node implementations (for ainvoke)
+        
         Flow:
         1. check_conversation -> (if conversational) -> END
         2. check_conversation -> (else) -> check_feedback -> (if negative feedback + session) -> research_products -> compare_prices -> generate_message -> END
         3. check_conversation -> (else) -> check_feedback -> (else) -> understand_query -> research_products -> compare_prices -> generate_message -> END
+        4. Combined mode: check_conversation already extracted the query -> check_feedback -> use_combined_query -> research_products -> ...
         """
         workflow = StateGraph(ShoppingState)
         
         # Add nodes
-        workflow.add_node("check_conversation", check_conversation_node)
+        workflow.add_node("check_conversation", acheck_conversation_node if use_async else check_conversation_node)
         workflow.add_node("check_feedback", check_feedback_node)
-        workflow.add_node("understand_query", understand_query_node)
-        workflow.add_node("research_products", research_products_node)
+        workflow.add_node("understand_query", aunderstand_query_node if use_async else understand_query_node)
+        workflow.add_node("use_combined_query", use_combined_query_node)
+        workflow.add_node("research_products", aresearch_products_node if use_async else research_products_node)
         workflow.add_node("compare_prices", compare_prices_node)
-        workflow.add_node("generate_message", generate_product_message_node)
+        workflow.add_node("generate_message", agenerate_product_message_node if use_async else generate_product_message_node)
         
         # Define conditional routing for conversation
         def is_conversational_route(state: ShoppingState) -> str:
@@ -60,7 +85,9 @@ class ShoppingWorkflow:
             Decide if we should skip understanding (reuse previous query).
             
             Returns:
-                "skip" if negative feedback and session exists, "understand" otherwise
+                "skip" if negative feedback and session exists,
+                "combined" if check_conversation already extracted the query (combined mode),
+                "understand" otherwise
             """
             is_negative = state.get("is_negative_feedback", False)
             session_id = state.get("session_id")
@@ -70,6 +97,9 @@ class ShoppingWorkflow:
                 if session and session.last_structured_query:
                     return "skip"
             
+            if state.get("combined_structured_query"):
+                return "combined"
+            
             return "understand"
         
         # Define edges
@@ -87,10 +117,12 @@ class ShoppingWorkflow:
             should_skip_understanding,
             {
                 "skip": "research_products",
+                "combined": "use_combined_query",
                 "understand": "understand_query"
             }
         )
         workflow.add_edge("understand_query", "research_products")
+        workflow.add_edge("use_combined_query", "research_products")
         workflow.add_edge("research_products", "compare_prices")
         workflow.add_edge("compare_prices", "generate_message")
         workflow.add_edge("generate_message", END)
@@ -108,6 +140,187 @@ class ShoppingWorkflow:
         Returns:
             Final state with products and structured query
         """
+        session_id, initial_state = self._prepare_run(user_message, session_id)
+        
+        # Run the workflow with error handling
+        try:
+            result = self.app.invoke(initial_state, config=self._run_config())
+        except Exception as e:
+            return self._error_state(initial_state, e)
+        
+        self._update_session(session_id, result)
+        self._save_result(user_message, session_id, result)
+        
+        return result
+    
+    async def arun(self, user_message: str, session_id: Optional[str] = None) -> ShoppingState:
+        """
+        Execute the workflow without blocking the event loop.
+        LLM and SerperDev calls are awaited, SQLite writes are queued from a worker thread
+        (enqueueing may wait when the write-behind queue is full).
+        
+        Args:
+            user_message: User's message/query
+            session_id: Optional session ID for iterative searches
+        
+        Returns:
+            Final state with products and structured query
+        """
+        session_id, initial_state = self._prepare_run(user_message, session_id)
+        
+        try:
+            result = await self.async_app.ainvoke(initial_state, config=self._run_config())
+        except Exception as e:
+            return self._error_state(initial_state, e)
+        
+        self._update_session(session_id, result)
+        await asyncio.to_thread(self._save_result, user_message, session_id, result)
+        
+        return result
+    
+    async def astream(self, user_message: str, session_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Execute the workflow and yield events as soon as each stage completes.
+        
+        Events (name, data):
+        - "session": {"session_id"} (always first)
+        - "conversation_delta": {"text"} pieces of the conversational reply as they are generated
+        - "conversation": {"response"} for conversational messages
+        - "structured_query": {"structured_query"}
+        - "products": {"products"}
+        - "price_comparison": {"price_comparison"}
+        - "message_delta": {"text"} pieces of the product message as they are generated
+        - "product_message": {"message"} (final, cleaned message; template in background mode)
+        - "product_message_final": {"turn_id", "message"} LLM message generated in background mode
+        - "error": {"error"}
+        - "done": {"session_id", "error"} (always last)
+        
+        Args:
+            user_message: User's message/query
+            session_id: Optional session ID for iterative searches
+        
+        Yields:
+            Tuples (event name, event data)
+        """
+        session_id, initial_state = self._prepare_run(user_message, session_id)
+        yield "session", {"session_id": session_id}
+        
+        # Node updates and LLM token deltas are multiplexed through one queue:
+        # the graph runs in a task while this generator forwards events in arrival order
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def token_sink(event: str, text: str):
+            queue.put_nowait(("delta", event, text))
+        
+        async def run_graph():
+            try:
+                config = self._run_config(token_sink=token_sink)
+                async for update in self.async_app.astream(initial_state, config=config, stream_mode="updates"):
+                    queue.put_nowait(("update", update, None))
+                queue.put_nowait(("end", None, None))
+            except Exception as e:
+                queue.put_nowait(("exception", e, None))
+        
+        # Final state = initial state + every node update (nodes return partial states)
+        result: ShoppingState = dict(initial_state)
+        seen_nodes = set()
+        graph_task = asyncio.create_task(run_graph())
+        
+        try:
+            while True:
+                kind, payload, text = await queue.get()
+                
+                if kind == "end":
+                    break
+                
+                if kind == "exception":
+                    result = self._error_state(initial_state, payload)
+                    yield "error", {"error": result["error"]}
+                    yield "done", {"session_id": session_id, "error": result["error"]}
+                    return
+                
+                if kind == "delta":
+                    yield payload, {"text": text}
+                    continue
+                
+                for node_name, node_update in payload.items():
+                    if not node_update:
+                        continue
+                    # Negative feedback reuses the session query: announce it before the products
+                    if node_name == "research_products" and not seen_nodes & {"understand_query", "use_combined_query"} and result.get("structured_query"):
+                        yield "structured_query", {"structured_query": result["structured_query"]}
+                    seen_nodes.add(node_name)
+                    result.update(node_update)
+                    for event in self._stream_events(node_name, node_update):
+                        yield event
+        finally:
+            # Client disconnected: stop the graph (and its LLM calls)
+            if not graph_task.done():
+                graph_task.cancel()
+        
+        self._update_session(session_id, result)
+        await asyncio.to_thread(self._save_result, user_message, session_id, result)
+        
+        # Background mode: push the LLM message on the same stream once it is ready
+        if result.get("product_message_pending"):
+            final = await product_message_store.wait(session_id, result["turn_id"], timeout=settings.product_message_stream_timeout)
+            if final and final["status"] != "pending":
+                yield "product_message_final", {"turn_id": result["turn_id"], "message": final["message"]}
+        
+        yield "done", {"session_id": session_id, "error": result.get("error")}
+    
+    def _stream_events(self, node_name: str, node_update: Dict[str, Any]):
+        """
+        Map a node update to stream events.
+        
+        Args:
+            node_name: Name of the node that completed
+            node_update: Partial state returned by the node
+        
+        Returns:
+            List of (event name, event data) tuples
+        """
+        events = []
+        
+        if node_name == "check_conversation" and node_update.get("is_conversational"):
+            events.append(("conversation", {"response": node_update.get("conversational_response")}))
+        elif node_name in ("understand_query", "use_combined_query"):
+            events.append(("structured_query", {"structured_query": node_update.get("structured_query")}))
+        elif node_name == "research_products":
+            events.append(("products", {"products": node_update.get("products", [])}))
+        elif node_name == "compare_prices":
+            events.append(("price_comparison", {"price_comparison": node_update.get("price_comparison")}))
+        elif node_name == "generate_message":
+            events.append(("product_message", {"message": node_update.get("product_message")}))
+        
+        if node_update.get("error"):
+            events.append(("error", {"error": node_update["error"]}))
+        
+        return events
+    
+    def _run_config(self, **configurable) -> Dict[str, Any]:
+        """
+        Build the LangGraph run config passed to every node.
+        
+        Args:
+            **configurable: Extra values for nodes (e.g. token_sink)
+        
+        Returns:
+            Run config with the shared container
+        """
+        return {"configurable": {"container": self.container, **configurable}}
+    
+    def _prepare_run(self, user_message: str, session_id: Optional[str]) -> Tuple[str, ShoppingState]:
+        """
+        Get or create the session and build the initial state.
+        
+        Args:
+            user_message: User's message/query
+            session_id: Optional session ID for iterative searches
+        
+        Returns:
+            Tuple (session_id, initial_state)
+        """
         # Get or create session
         if not session_id:
             session_id = session_manager.create_session()
@@ -138,40 +351,63 @@ class ShoppingWorkflow:
         initial_state: ShoppingState = {
             "user_message": user_message,
             "session_id": session_id,
+            "turn_id": uuid.uuid4().hex,
             "structured_query": previous_query,  # May be overridden by understand_query_node
+            "combined_structured_query": None,
             "products": [],
             "excluded_product_links": excluded_links,
             "price_comparison": None,
             "product_message": None,
+            "product_message_pending": False,
             "is_conversational": False,
             "conversational_response": None,
             "is_negative_feedback": False,
             "error": None
         }
         
-        # Run the workflow with error handling
-        try:
-            result = self.app.invoke(initial_state)
-        except Exception as e:
-            # If workflow fails, return error state
-            import traceback
-            print(f"Error in workflow execution: {str(e)}")
-            print(traceback.format_exc())
-            
-            return {
-                "user_message": user_message,
-                "session_id": session_id,
-                "structured_query": None,
-                "products": [],
-                "excluded_product_links": excluded_links,
-                "price_comparison": None,
-                "product_message": None,
-                "is_conversational": False,
-                "conversational_response": None,
-                "is_negative_feedback": False,
-                "error": f"Workflow error: {str(e)}"
-            }
+        return session_id, initial_state
+    
+    def _error_state(self, initial_state: ShoppingState, error: Exception) -> ShoppingState:
+        """
+        Build the state returned when the workflow itself fails.
+        
+        Args:
+            initial_state: State the workflow was started with
+            error: Exception raised by the workflow
+        
+        Returns:
+            Error state
+        """
+        # If workflow fails, return error state
+        import traceback
+        print(f"Error in workflow execution: {str(error)}")
+        print("".join(traceback.format_exception(type(error), error, error.__traceback__)))
         
+        return {
+            "user_message": initial_state["user_message"],
+            "session_id": initial_state["session_id"],
+            "turn_id": initial_state["turn_id"],
+            "structured_query": None,
+            "combined_structured_query": None,
+            "products": [],
+            "excluded_product_links": initial_state["excluded_product_links"],
+            "price_comparison": None,
+            "product_message": None,
+            "product_message_pending": False,
+            "is_conversational": False,
+            "conversational_response": None,
+            "is_negative_feedback": False,
+            "error": f"Workflow error: {str(error)}"
+        }
+    
+    def _update_session(self, session_id: str, result: ShoppingState):
+        """
+        Update session with new data from the workflow result.
+        
+        Args:
+            session_id: Session ID
+            result: Final workflow state
+        """
         # Update session with new data
         if result.get("structured_query"):
             try:
@@ -183,35 +419,63 @@ class ShoppingWorkflow:
             except Exception as e:
                 # Don't fail if session update fails, just log it
                 print(f"Warning: Failed to update session: {str(e)}")
+    
+    def _save_result(self, user_message: str, session_id: str, result: ShoppingState):
+        """
+        Save the conversation, search and products to the database.
+        Writes are queued for the write-behind writer (settings.persistence_write_behind):
+        they are committed together with other requests' writes, off the response path.
         
+        Args:
+            user_message: User's message/query
+            session_id: Session ID
+            result: Final workflow state
+        """
         # Save to database
         try:
             # Save conversation
             assistant_response = result.get("conversational_response") or result.get("product_message")
-            self.repository.save_conversation(
+            self._persist(
+                "save_conversation",
                 session_id=session_id or "anonymous",
                 user_message=user_message,
                 assistant_response=assistant_response,
-                structured_query=result.get("structured_query")
+                structured_query=result.get("structured_query"),
+                turn_id=result.get("turn_id")
             )
             
-            # Save search if products were found
+            # Background mode: the template message is saved now, the LLM message once generated
+            if result.get("product_message_pending") and not result.get("conversational_response"):
+                turn_id = result["turn_id"]
+                product_message_store.on_ready(
+                    session_id,
+                    turn_id,
+                    lambda message: self._persist("update_assistant_response", turn_id=turn_id, assistant_response=message)
+                )
+            
+            # Save search, cache products and link them to the search if products were found
             if result.get("products") and len(result.get("products", [])) > 0:
                 query_text = result.get("structured_query").query_text if result.get("structured_query") else user_message
-                self.repository.save_search(
+                self._persist(
+                    "save_search_results",
                     session_id=session_id,
                     query_text=query_text,
-                    structured_query=result.get("structured_query"),
-                    num_results=len(result.get("products", []))
-                )
-                
-                # Cache products
-                self.repository.cache_products(
                     products=result.get("products", []),
-                    search_query=query_text
+                    structured_query=result.get("structured_query")
                 )
         except Exception as e:
             print(f"Warning: Failed to save to database: {str(e)}")
+    
+    def _persist(self, method: str, **kwargs):
+        """
+        Run a repository write, queued for the write-behind writer when enabled.
         
-        return result
-
+        Args:
+            method: Repository method (save_conversation, save_search_results, ...)
+            **kwargs: Method arguments
+        """
+        if settings.persistence_write_behind:
+            persistence_writer.enqueue(method, **kwargs)
+        else:
+            getattr(self.repository, method)(**kwargs)
+        
\ No newline at end of file
@@ -11,9 +11,11 @@ class ShoppingState(TypedDict):
     # Input
     user_message: str
     session_id: Optional[str]
+    turn_id: Optional[str]  # Identifies this message/response in the session
     
     # Step 1: Understanding
     structured_query: Optional[StructuredQuery]
+    combined_structured_query: Optional[StructuredQuery]  # Extracted by check_conversation in combined mode
     
     # Step 2: Research
     products: List[Product]
@@ -24,6 +26,7 @@ class ShoppingState(TypedDict):
     
     # Step 4: Product Message
     product_message: Optional[str]  # Contextual message accompanying product results
+    product_message_pending: bool  # Template message sent, LLM message generated in the background
     
     # Conversation handling
     is_conversational: bool
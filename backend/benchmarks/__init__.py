@@ -0,0 +1,11 @@
+"""
+Micro-benchmarks for the persistence layer.
+Run from the backend directory, e.g. python -m benchmarks.bench_upsert_products.
+Each benchmark uses its own temporary database (DATABASE_DIR), never data/.
+"""
+
+import os
+import tempfile
+
+# Must run before app.core.database is imported: the database file is created on import
+os.environ["DATABASE_DIR"] = tempfile.mkdtemp(prefix="buybuddy-bench-")
@@ -0,0 +1,184 @@
+"""
+Benchmark: pooled WAL connections (get_db / get_read_db) vs the former
+connect-per-call access (new connection, rollback journal, commit, close).
+
+Both run the same repository statements (save a search, read a session's search
+history) against their own copy of the schema: sequentially, then from several
+threads mixing writes and reads.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_db_pool
+    python -m benchmarks.bench_db_pool --operations 2000 --threads 8
+"""
+
+import argparse
+import shutil
+import sqlite3
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List
+
+from app.core.database import DB_PATH, get_db, get_db_pool_stats, init_database
+from app.infrastructure.repositories.sqlite_repository import SQLiteRepository
+
+
+INSERT_SEARCH = "INSERT INTO searches (session_id, query_text, structured_query, num_results) VALUES (?, ?, ?, ?)"
+SELECT_HISTORY = "SELECT s.* FROM searches s WHERE s.session_id = ? ORDER BY s.timestamp DESC LIMIT ?"
+
+
+class ConnectPerCall:
+    """Former get_db(): one connection per call, default journal (DELETE) and synchronous (FULL)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, session_id: str, index: int):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute(INSERT_SEARCH, (session_id, f"query {index}", None, 10))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def read(self, session_id: str):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            return conn.execute(SELECT_HISTORY, (session_id, 50)).fetchall()
+        finally:
+            conn.close()
+
+
+class Pooled:
+    """Current access: repository calls on the read-write and read-only pools."""
+
+    def __init__(self):
+        self.repository = SQLiteRepository()
+
+    def write(self, session_id: str, index: int):
+        self.repository.save_search(session_id, f"query {index}", num_results=10)
+
+    def read(self, session_id: str):
+        return self.repository.get_search_history(session_id, limit=50)
+
+
+def make_legacy_copy() -> str:
+    """
+    Copy the initialized database next to it and switch the copy back to a rollback journal.
+
+    Returns:
+        Path of the copy
+    """
+    with get_db() as conn:
+        conn.execute("DELETE FROM searches")
+    with get_db() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    path = str(DB_PATH.with_name("legacy.db"))
+    shutil.copyfile(DB_PATH, path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+    return path
+
+
+def time_each(operation: Callable[[int], object], count: int) -> float:
+    """
+    Run an operation count times.
+
+    Returns:
+        Average microseconds per call
+    """
+    started = time.perf_counter()
+    for index in range(count):
+        operation(index)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def run_concurrent(access, threads: int, operations: int) -> Dict[str, float]:
+    """
+    Run threads that each do `operations` calls, one write for three reads.
+
+    Returns:
+        Throughput, read and write p95 latencies and the number of failed calls
+    """
+    read_latencies: List[float] = []
+    write_latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(thread_index: int):
+        session_id = f"session-{thread_index % 4}"
+        for index in range(operations):
+            write = index % 4 == 0
+            started = time.perf_counter()
+            try:
+                if write:
+                    access.write(session_id, index)
+                else:
+                    access.read(session_id)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                (write_latencies if write else read_latencies).append(elapsed)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    def p95(latencies: List[float]) -> float:
+        return statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) >= 2 else 0.0
+
+    return {
+        "ops_per_second": threads * operations / elapsed,
+        "read_p95_ms": p95(read_latencies),
+        "write_p95_ms": p95(write_latencies),
+        "errors": errors[0]
+    }
+
+
+def run(operations: int, threads: int):
+    """Run both access modes and print the results."""
+    init_database()
+    legacy_path = make_legacy_copy()
+    modes = (("connect per call", ConnectPerCall(legacy_path)), ("pooled + WAL", Pooled()))
+
+    print(f"Sequential, {operations} calls each")
+    print(f"{'access':>17} {'write':>12} {'read':>12}")
+    for name, access in modes:
+        write_us = time_each(lambda index: access.write("session-seq", index), operations)
+        read_us = time_each(lambda index: access.read("session-seq"), operations)
+        print(f"{name:>17} {write_us:>9,.0f} us {read_us:>9,.0f} us")
+
+    print(f"\n{threads} threads x {operations} calls (1 write : 3 reads)")
+    print(f"{'access':>17} {'ops/s':>10} {'read p95':>10} {'write p95':>10} {'errors':>7}")
+    for name, access in modes:
+        result = run_concurrent(access, threads, operations)
+        print(
+            f"{name:>17} {result['ops_per_second']:>10,.0f} {result['read_p95_ms']:>7.2f} ms "
+            f"{result['write_p95_ms']:>7.2f} ms {result['errors']:>7}"
+        )
+
+    stats = get_db_pool_stats()
+    print(f"\nPooled database: journal_mode={stats['journal_mode']}, synchronous={stats['synchronous']}")
+    for pool_name, pool in stats["pools"].items():
+        print(
+            f"  {pool_name}: {pool['checkouts']} checkouts on {pool['connections_opened']} connections, "
+            f"{pool['waits']} waits"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--operations", type=int, default=1000, help="Calls per thread (and per sequential run)")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent threads")
+    args = parser.parse_args()
+    run(args.operations, args.threads)
@@ -0,0 +1,127 @@
+"""
+Benchmark: caching product batches with upsert_products() vs the former
+INSERT OR REPLACE loop (one statement per product).
+
+Each batch size is measured on an empty table (insert), on the same batch again
+(unchanged) and with a share of the prices changed (update). The max product id
+shows how many ids each approach burns.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_upsert_products
+    python -m benchmarks.bench_upsert_products --sizes 10000 50000 --changed 0.1
+"""
+
+import argparse
+import time
+from typing import Callable, List
+
+from app.core.database import get_db, init_database
+from app.infrastructure.repositories.sqlite_repository import SQLiteRepository
+from app.models.schemas import Product
+
+
+def make_products(count: int, price_version: int = 0, changed: float = 0.0) -> List[Product]:
+    """
+    Build a batch of products with unique links.
+
+    Args:
+        count: Number of products
+        price_version: Version mixed into the changed prices
+        changed: Share of the products whose price depends on price_version
+
+    Returns:
+        List of Product objects
+    """
+    changed_every = round(1 / changed) if changed else 0
+    products = []
+    for i in range(count):
+        version = price_version if changed_every and i % changed_every == 0 else 0
+        products.append(Product(
+            name=f"Product {i}",
+            description=f"Description of product {i}",
+            price=f"{100 + i % 900 + version},99 €",
+            link=f"https://shop.example/products/{i}",
+            platform="shop.example",
+            image=f"https://shop.example/images/{i}.jpg"
+        ))
+    return products
+
+
+def insert_or_replace(products: List[Product], search_query: str):
+    """Former cache_products(): one INSERT OR REPLACE per product."""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        for product in products:
+            cursor.execute("""
+                INSERT OR REPLACE INTO products
+                (name, description, price, link, platform, image, search_query)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                product.name,
+                product.description,
+                product.price,
+                product.link,
+                product.platform,
+                product.image,
+                search_query
+            ))
+
+
+def upsert(products: List[Product], search_query: str):
+    """Current cache_products(): bulk upsert."""
+    SQLiteRepository().upsert_products(products, search_query)
+
+
+def reset_products():
+    """Empty the products table, restart its ids and compact the file."""
+    with get_db() as conn:
+        conn.execute("DELETE FROM products")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'products'")
+    with get_db() as conn:
+        # Writes into freed pages are several times slower: every round starts from a compact file
+        conn.execute("VACUUM")
+
+
+def max_product_id() -> int:
+    """Highest product id (ids burnt by REPLACE show up here)."""
+    with get_db() as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM products").fetchone()[0]
+
+
+def measure(write: Callable[[List[Product], str], None], products: List[Product]) -> float:
+    """
+    Time one batch write.
+
+    Returns:
+        Rows per second
+    """
+    started = time.perf_counter()
+    write(products, "benchmark query")
+    return len(products) / (time.perf_counter() - started)
+
+
+def run(sizes: List[int], changed: float):
+    """Run every scenario for each batch size and print a table."""
+    init_database()
+    print(f"{'products':>9} {'method':>18} {'insert':>12} {'unchanged':>12} {'update':>12} {'max id':>9}")
+    for size in sizes:
+        fresh = make_products(size)
+        updated = make_products(size, price_version=1, changed=changed)
+        for name, write in (("INSERT OR REPLACE", insert_or_replace), ("upsert_products", upsert)):
+            reset_products()
+            insert_rate = measure(write, fresh)
+            unchanged_rate = measure(write, fresh)
+            update_rate = measure(write, updated)
+            print(
+                f"{size:>9} {name:>18} {insert_rate:>10,.0f}/s {unchanged_rate:>10,.0f}/s "
+                f"{update_rate:>10,.0f}/s {max_product_id():>9}"
+            )
+    reset_products()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 20000, 50000], help="Batch sizes")
+    parser.add_argument("--changed", type=float, default=0.1, help="Share of prices changed in the update batch")
+    args = parser.parse_args()
+    run(args.sizes, args.changed)
@@ -1,12 +1,42 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import router as api_router
 from app.core.config import settings
+from app.infrastructure.llm.http_pool import aclose_http_pools
+from app.infrastructure.cache.query_cache import get_query_cache
+from app.core.database import close_db_pools
+from app.infrastructure.repositories.write_behind import persistence_writer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown."""
+    # Pre-warm the normalized-query cache from stored searches/conversations
+    query_cache = get_query_cache()
+    if query_cache:
+        try:
+            loaded = await asyncio.to_thread(query_cache.warm_from_history)
+            print(f"Query cache warmed with {loaded} entries")
+        except Exception as e:
+            print(f"Warning: Could not warm query cache: {e}")
+    
+    yield
+    # Close pooled keep-alive connections
+    await aclose_http_pools()
+    # Commit queued conversation/search/product writes, then close pooled SQLite connections
+    drained = await asyncio.to_thread(persistence_writer.close, settings.persistence_shutdown_timeout)
+    if not drained:
+        print(f"Warning: Write-behind queue not drained at shutdown: {persistence_writer.stats()['pending']} records pending")
+    close_db_pools()
+
 
 app = FastAPI(
     title="BuyBuddy API",
     description="Intelligent Product Search Service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -0,0 +1,30 @@
+"""
+Shared test setup.
+The SQLite database is created on import of app.core.database: point it at a
+temporary directory before any app module is imported.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ["DATABASE_DIR"] = tempfile.mkdtemp(prefix="buybuddy-tests-")
+os.environ.setdefault("SERPER_API_KEY", "test-key")
+
+
+@pytest.fixture
+def clean_db():
+    """Empty the application tables before a test."""
+    from app.core.database import get_db
+    
+    with get_db() as conn:
+        for table in ("search_results", "products", "searches", "conversations", "cache_entries"):
+            conn.execute(f"DELETE FROM {table}")
+    yield
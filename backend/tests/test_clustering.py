@@ -0,0 +1,52 @@
+"""
+Tests for cross-platform duplicate clustering (app.models.clustering).
+"""
+
+from app.models.clustering import ProductClusterer, ProductFingerprint
+from app.models.schemas import Product
+
+
+def listing(name: str, platform: str = "Amazon") -> Product:
+    return Product(name=name, link=f"https://{platform.lower()}.example/{abs(hash(name))}", platform=platform)
+
+
+def cluster_names(*names):
+    clusters = ProductClusterer().cluster([listing(name) for name in names])
+    return [[product.name for product in cluster] for cluster in clusters]
+
+
+def test_same_item_on_several_platforms_is_one_cluster():
+    assert cluster_names(
+        "Sony WH-1000XM5 Wireless Noise Cancelling Headphones Black",
+        "Sony WH1000XM5 Wireless Noise Cancelling Headphones - Black",
+        "Bose QuietComfort 45 Headphones",
+    ) == [
+        ["Sony WH-1000XM5 Wireless Noise Cancelling Headphones Black",
+         "Sony WH1000XM5 Wireless Noise Cancelling Headphones - Black"],
+        ["Bose QuietComfort 45 Headphones"],
+    ]
+
+
+def test_capacities_and_sizes_are_not_model_tokens():
+    assert ProductFingerprint(listing("Samsung Galaxy S24 256GB 5G 6.2in 4K")).models == {"s24"}
+
+
+def test_same_capacity_different_models_stay_apart():
+    assert len(cluster_names("Samsung Galaxy S24 256GB Black", "Samsung Galaxy S23 256GB Black")) == 2
+    assert len(cluster_names("Apple iPhone 15 128GB", "iPhone 15 Pro 128GB")) == 2
+
+
+def test_a_listing_adding_a_reference_keeps_the_model():
+    assert len(cluster_names("Samsung Galaxy S24 256GB Black", "Samsung Galaxy S24 SM-S921B 256GB Black")) == 1
+
+
+def test_listing_without_model_does_not_chain_two_models():
+    clusters = cluster_names(
+        "Samsung Galaxy S24 256GB Black",
+        "Samsung Galaxy 256GB Black",
+        "Samsung Galaxy S23 256GB Black",
+    )
+    assert not any(
+        "Samsung Galaxy S24 256GB Black" in cluster and "Samsung Galaxy S23 256GB Black" in cluster
+        for cluster in clusters
+    )
@@ -0,0 +1,193 @@
+"""
+Tests for SQLite connection pooling and schema migrations (app.core.database).
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import SQLiteConnectionPool, get_db, get_db_pool_stats, init_database
+
+
+def count_searches(session_id: str) -> int:
+    with get_db() as conn:
+        return conn.execute("SELECT COUNT(*) FROM searches WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    """Point the read-write pool at a new database file, to be filled with an older schema."""
+    path = tmp_path / "legacy.db"
+    pool = SQLiteConnectionPool(1)
+    monkeypatch.setattr(database, "DB_PATH", path)
+    monkeypatch.setattr(database, "db_pool", pool)
+    yield path
+    pool.close_all()
+
+
+def test_connections_are_reused():
+    pool = SQLiteConnectionPool(2)
+    try:
+        for _ in range(5):
+            with pool.connection() as conn:
+                conn.execute("SELECT 1")
+        stats = pool.stats()
+        assert stats["checkouts"] == 5
+        assert stats["connections_opened"] == 1
+        assert stats["reuse_ratio"] == 0.8
+    finally:
+        pool.close_all()
+
+
+def test_checkout_waits_for_a_returned_connection():
+    pool = SQLiteConnectionPool(1, timeout=5)
+    borrowed = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.connection():
+            borrowed.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    try:
+        borrowed.wait(5)
+        threading.Timer(0.05, release.set).start()
+        with pool.connection() as conn:
+            conn.execute("SELECT 1")
+        assert pool.stats()["waits"] == 1
+        assert pool.stats()["connections_opened"] == 1
+    finally:
+        release.set()
+        holder.join(5)
+        pool.close_all()
+
+
+def test_checkout_times_out_when_the_pool_is_exhausted():
+    pool = SQLiteConnectionPool(1, timeout=0.05)
+    try:
+        with pool.connection():
+            with pytest.raises(TimeoutError):
+                with pool.connection():
+                    pass
+    finally:
+        pool.close_all()
+
+
+def test_failed_transaction_is_rolled_back(clean_db):
+    pool = SQLiteConnectionPool(1)
+    try:
+        with pytest.raises(RuntimeError):
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO searches (session_id, query_text) VALUES ('rollback', 'q')")
+                raise RuntimeError("fail mid-transaction")
+        # The connection went back to the pool clean
+        with pool.connection() as conn:
+            conn.commit()
+        assert count_searches("rollback") == 0
+        assert pool.stats()["discarded"] == 0
+    finally:
+        pool.close_all()
+
+
+def test_read_only_pool_rejects_writes():
+    pool = SQLiteConnectionPool(1, read_only=True)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO searches (session_id, query_text) VALUES ('ro', 'q')")
+    finally:
+        pool.close_all()
+
+
+def test_stats_report_the_modes_of_the_database_file(monkeypatch):
+    # WAL is a property of the file: turning the setting off does not change it
+    monkeypatch.setattr(settings, "sqlite_wal", False)
+    stats = get_db_pool_stats()
+
+    assert stats["journal_mode"] == "wal"
+    assert stats["synchronous"] == "NORMAL"
+    assert set(stats["pools"]) == {"read_write", "read_only"}
+
+
+def test_migration_adds_the_turn_id_column(legacy_db):
+    conn = sqlite3.connect(legacy_db)
+    conn.execute("""
+        CREATE TABLE conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            user_message TEXT NOT NULL,
+            assistant_response TEXT,
+            structured_query TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("INSERT INTO conversations (session_id, user_message) VALUES ('s1', 'laptop')")
+    conn.commit()
+    conn.close()
+
+    init_database()
+    init_database()  # Idempotent
+
+    with get_db() as conn:
+        assert [tuple(row) for row in conn.execute("SELECT session_id, turn_id FROM conversations")] == [("s1", None)]
+
+
+def test_backfill_links_only_queries_run_by_one_search(legacy_db):
+    conn = sqlite3.connect(legacy_db)
+    conn.execute("""
+        CREATE TABLE products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            price TEXT,
+            link TEXT UNIQUE,
+            platform TEXT,
+            image TEXT,
+            search_query TEXT,
+            cached_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            query_text TEXT NOT NULL,
+            structured_query TEXT,
+            num_results INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.executemany("INSERT INTO searches (session_id, query_text) VALUES (?, ?)", [
+        ("s1", "laptop gaming"),
+        ("s2", "laptop gaming"),  # Same query: which search found the products is unknown
+        ("s1", "casque sony"),
+    ])
+    conn.executemany("INSERT INTO products (name, link, search_query) VALUES (?, ?, ?)", [
+        ("ASUS ROG", "https://shop.example/1", "laptop gaming"),
+        ("Sony WH-1000XM5", "https://shop.example/2", "casque sony"),
+        ("Sony WH-CH720N", "https://shop.example/3", "casque sony"),
+    ])
+    conn.commit()
+    conn.close()
+
+    init_database()
+
+    with get_db() as conn:
+        links = conn.execute("""
+            SELECT s.session_id, s.query_text, p.name, r.rank FROM search_results r
+            JOIN searches s ON s.id = r.search_id
+            JOIN products p ON p.id = r.product_id
+            ORDER BY r.search_id, r.rank
+        """).fetchall()
+    assert [tuple(row) for row in links] == [
+        ("s1", "casque sony", "Sony WH-1000XM5", 0),
+        ("s1", "casque sony", "Sony WH-CH720N", 1),
+    ]
@@ -0,0 +1,225 @@
+"""
+Tests for the multi-source product search (app.infrastructure.product_sources.fan_out),
+with the eBay and Best Buy sources pointed at a local stub server.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import pytest
+
+from app.infrastructure.product_sources import BestBuySource, EbaySource, ProductSearchFanOut, ProductSource
+from app.models.schemas import Product
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """eBay token + item search and Best Buy product search, answered from server.config."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.reply(200, {"access_token": "stub-token", "expires_in": 7200})
+
+    def do_GET(self):
+        source = "ebay" if self.path.startswith("/buy/browse/") else "bestbuy"
+        config = self.server.config[source]
+        time.sleep(config.get("delay", 0))
+        if config.get("status", 200) != 200:
+            self.reply(config["status"], {"error": "stub failure"})
+            return
+        links = config.get("links", [])
+        if source == "ebay":
+            body = {"itemSummaries": [
+                {"title": f"eBay {link}", "itemWebUrl": link, "price": {"value": "10.00", "currency": "USD"}}
+                for link in links
+            ]}
+        else:
+            body = {"products": [{"name": f"Best Buy {link}", "url": link, "salePrice": 12.5} for link in links]}
+        self.reply(200, body)
+
+    def reply(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (cancelled source)
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.config = {"ebay": {}, "bestbuy": {}}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_fan_out(server, deadline: float = 2.0, **options) -> ProductSearchFanOut:
+    sources = [
+        EbaySource(client_id="id", client_secret="secret", base_url=server.url),
+        BestBuySource(api_key="key", base_url=server.url),
+    ]
+    return ProductSearchFanOut(sources, deadline=deadline, **options)
+
+
+def links(products: List[Product]) -> List[str]:
+    return [product.link for product in products]
+
+
+class BlockingSource(ProductSource):
+    """In-process source whose searches block until released."""
+
+    name = "blocking"
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def search_products(self, query, num_results=10, location=None):
+        self.release.wait(10)
+        return [Product(name="late", link="https://late.example/1")]
+
+    async def asearch_products(self, query, num_results=10, location=None):
+        return self.search_products(query, num_results, location)
+
+
+class InstantSource(ProductSource):
+    """In-process source answering immediately."""
+
+    name = "instant"
+
+    def search_products(self, query, num_results=10, location=None):
+        return [Product(name="fast", link="https://fast.example/1")]
+
+    async def asearch_products(self, query, num_results=10, location=None):
+        return self.search_products(query, num_results, location)
+
+
+def test_results_are_merged_round_robin_without_duplicates(stub_server):
+    stub_server.config["ebay"]["links"] = ["https://e/1", "https://shared/1", "https://e/2"]
+    stub_server.config["bestbuy"]["links"] = ["https://shared/1", "https://b/1", "https://b/2"]
+    fan_out = make_fan_out(stub_server)
+
+    products = fan_out.search_products("laptop", num_results=5, location="usa")
+
+    assert links(products) == ["https://e/1", "https://shared/1", "https://e/2", "https://b/1", "https://b/2"]
+    # The shared link went to the first source that offered it in its round
+    assert products[1].platform == "Best Buy"
+
+
+def test_async_merge_matches_sync(stub_server):
+    stub_server.config["ebay"]["links"] = ["https://e/1", "https://e/2"]
+    stub_server.config["bestbuy"]["links"] = ["https://b/1", "https://b/2"]
+    fan_out = make_fan_out(stub_server)
+
+    products = asyncio.run(fan_out.asearch_products("laptop", num_results=3, location="usa"))
+
+    assert links(products) == ["https://e/1", "https://b/1", "https://e/2"]
+
+
+def test_slow_source_is_dropped_at_the_deadline(stub_server):
+    stub_server.config["ebay"]["links"] = ["https://e/1"]
+    stub_server.config["bestbuy"].update(links=["https://b/1"], delay=1.0)
+    fan_out = make_fan_out(stub_server, deadline=0.3)
+
+    started = time.monotonic()
+    products = fan_out.search_products("laptop", location="usa")
+
+    assert time.monotonic() - started < 0.9
+    assert links(products) == ["https://e/1"]
+    stats = fan_out.stats()["sources"]
+    assert stats["bestbuy"]["timeouts"] == 1
+    assert stats["bestbuy"]["abandoned"] == 1
+
+    # The abandoned thread finishes on its own and is no longer counted
+    deadline = time.monotonic() + 5
+    while fan_out.stats()["sources"]["bestbuy"]["abandoned"] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert fan_out.stats()["sources"]["bestbuy"]["abandoned"] == 0
+    assert fan_out.stats()["sources"]["bestbuy"]["successes"] == 1
+
+
+def test_async_slow_source_is_cancelled(stub_server):
+    stub_server.config["ebay"]["links"] = ["https://e/1"]
+    stub_server.config["bestbuy"].update(links=["https://b/1"], delay=1.0)
+    fan_out = make_fan_out(stub_server, deadline=0.3)
+
+    async def run():
+        started = time.monotonic()
+        products = await fan_out.asearch_products("laptop", location="usa")
+        elapsed = time.monotonic() - started
+        # Past the stub delay: a request that was not cancelled would have been recorded by now
+        await asyncio.sleep(1.0)
+        return products, elapsed
+
+    products, elapsed = asyncio.run(run())
+
+    assert elapsed < 0.9
+    assert links(products) == ["https://e/1"]
+    bestbuy = fan_out.stats()["sources"]["bestbuy"]
+    assert bestbuy["timeouts"] == 1
+    assert bestbuy["successes"] == 0 and bestbuy["errors"] == 0
+
+
+def test_every_source_failing_raises(stub_server):
+    stub_server.config["ebay"]["status"] = 500
+    stub_server.config["bestbuy"].update(delay=1.0)
+    fan_out = make_fan_out(stub_server, deadline=0.3)
+
+    with pytest.raises(Exception, match=r"(?s)every product source failed \(ebay: .*500.*; bestbuy: timed out\)"):
+        fan_out.search_products("laptop", location="usa")
+
+    with pytest.raises(Exception, match="every product source failed"):
+        asyncio.run(fan_out.asearch_products("laptop", location="usa"))
+
+
+def test_source_with_too_many_abandoned_requests_is_skipped():
+    blocking = BlockingSource()
+    fan_out = ProductSearchFanOut([blocking, InstantSource()], deadline=0.05, max_abandoned=2)
+    try:
+        for _ in range(3):
+            assert links(fan_out.search_products("laptop")) == ["https://fast.example/1"]
+
+        stats = fan_out.stats()["sources"]["blocking"]
+        assert stats["requests"] == 2
+        assert stats["abandoned"] == 2
+        assert stats["skipped"] == 1
+    finally:
+        blocking.release.set()
+
+    deadline = time.monotonic() + 5
+    while fan_out.stats()["sources"]["blocking"]["abandoned"] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert fan_out.stats()["sources"]["blocking"]["abandoned"] == 0
+
+
+def test_queued_request_is_cancelled_not_abandoned():
+    blocking = BlockingSource()
+    # One worker: the second source waits in the queue behind the blocked one
+    fan_out = ProductSearchFanOut([blocking, InstantSource()], deadline=0.05, max_workers=1)
+    try:
+        with pytest.raises(Exception, match="every product source failed"):
+            fan_out.search_products("laptop")
+
+        stats = fan_out.stats()["sources"]
+        assert stats["blocking"]["abandoned"] == 1
+        assert stats["instant"]["abandoned"] == 0
+        assert stats["instant"]["requests"] == 0
+    finally:
+        blocking.release.set()
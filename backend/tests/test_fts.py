@@ -0,0 +1,82 @@
+"""
+Tests for the FTS5 full-text lookups of the SQLite repository (products_fts, searches_fts).
+"""
+
+import pytest
+
+from app.core import database
+from app.core.database import get_db
+from app.infrastructure.repositories.sqlite_repository import SQLiteRepository
+from app.models.schemas import Product
+
+
+pytestmark = pytest.mark.skipif(not database.FTS_AVAILABLE, reason="SQLite built without FTS5")
+
+
+def product(index: int, name: str = "Product") -> Product:
+    return Product(name=f"{name} {index}", link=f"https://shop.example/{index}")
+
+
+def names(products):
+    return sorted(product.name for product in products)
+
+
+def test_cached_products_match_the_query_words(clean_db):
+    repository = SQLiteRepository()
+    repository.cache_products([product(1, "Sony WH-1000XM5")], "écouteurs sony")
+    repository.cache_products([product(2, "ASUS ROG")], "laptop gaming")
+
+    # Accents folded, case ignored, last word as a prefix
+    assert names(repository.get_cached_products("Ecouteurs SONY")) == ["Sony WH-1000XM5 1"]
+    assert names(repository.get_cached_products("laptop gam")) == ["ASUS ROG 2"]
+    assert repository.get_cached_products("phone") == []
+
+
+def test_query_is_matched_on_the_search_query_column_only(clean_db):
+    repository = SQLiteRepository()
+    repository.cache_products([product(1, "Laptop sleeve")], "housse")
+
+    assert repository.get_cached_products("laptop") == []
+
+
+def test_fts_operators_in_user_text_are_not_interpreted(clean_db):
+    repository = SQLiteRepository()
+    repository.cache_products([product(1)], "laptop gaming")
+
+    # Quotes and operators are plain words, never FTS syntax
+    assert names(repository.get_cached_products('"laptop" gaming')) == ["Product 1"]
+    assert repository.get_cached_products('laptop" OR "gaming') == []
+    assert repository.get_cached_products("NEAR(*)") == []
+    assert repository.get_cached_products("!!!") == []
+
+
+def test_index_follows_updates_and_deletes(clean_db):
+    repository = SQLiteRepository()
+    repository.cache_products([product(1)], "laptop gaming")
+    repository.cache_products([product(1)], "tablette")
+
+    assert repository.get_cached_products("laptop") == []
+    assert names(repository.get_cached_products("tablette")) == ["Product 1"]
+
+    with get_db() as conn:
+        conn.execute("DELETE FROM products")
+    assert repository.get_cached_products("tablette") == []
+
+
+def test_search_history_text_filter(clean_db):
+    repository = SQLiteRepository()
+    repository.save_search("s1", "Casque Sony bluetooth")
+    repository.save_search("s1", "laptop gaming")
+    repository.save_search("s2", "casque audio")
+
+    assert sorted(s["query_text"] for s in repository.get_search_history(text="casque")) == [
+        "Casque Sony bluetooth", "casque audio"
+    ]
+    assert [s["query_text"] for s in repository.get_search_history("s1", text="casque")] == ["Casque Sony bluetooth"]
+    assert [s["query_text"] for s in repository.get_search_history(text="sony blue")] == ["Casque Sony bluetooth"]
+
+
+def test_fts_query_builder():
+    assert SQLiteRepository._fts_query(["laptop gaming"]) == '"laptop gaming" *'
+    assert SQLiteRepository._fts_query(["a", "a", "b"], column="search_query") == 'search_query : ("a" * OR "b" *)'
+    assert SQLiteRepository._fts_query(["", "--"]) is None
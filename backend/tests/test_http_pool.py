@@ -0,0 +1,87 @@
+"""
+Tests for the shared HTTP connection pools (app.infrastructure.llm.http_pool).
+"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.infrastructure.llm.http_pool import HTTPConnectionPool
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answers every request after `delay` seconds."""
+
+    protocol_version = "HTTP/1.1"
+    delay = 0.3
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def slow_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_pool_wait_defaults_to_the_read_timeout():
+    pool = HTTPConnectionPool("http://localhost", connect_timeout=0.5, read_timeout=30.0, http2=False)
+    assert pool.timeout.connect == 0.5
+    assert pool.timeout.pool == 30.0
+
+    pool = HTTPConnectionPool("http://localhost", connect_timeout=0.5, pool_timeout=2.0, http2=False)
+    assert pool.timeout.pool == 2.0
+
+
+def test_requests_beyond_max_connections_wait_for_a_free_connection(slow_server):
+    # Each request holds the only connection longer than the connect timeout
+    pool = HTTPConnectionPool(slow_server, max_connections=1, connect_timeout=0.1, read_timeout=5.0, http2=False)
+
+    async def run():
+        responses = await asyncio.gather(*(pool.async_client.get(slow_server) for _ in range(3)))
+        await pool.aclose()
+        return [response.status_code for response in responses]
+
+    assert asyncio.run(run()) == [200, 200, 200]
+    assert pool.stats()["connections_opened"] == 1
+
+
+def test_client_of_a_previous_loop_is_closed():
+    pool = HTTPConnectionPool("http://localhost", http2=False)
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+
+    async def get_client():
+        return pool.async_client
+
+    try:
+        previous = asyncio.run_coroutine_threadsafe(get_client(), other_loop).result(5)
+        current = asyncio.run(get_client())
+
+        deadline = time.monotonic() + 5
+        while not previous.is_closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert previous.is_closed
+        assert current is not previous
+        assert pool.stats()["async_clients_replaced"] == 1
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join(5)
+        other_loop.close()
@@ -0,0 +1,116 @@
+"""
+Tests for the LLM response cache (app.infrastructure.llm.cache).
+"""
+
+import asyncio
+
+from app.infrastructure.cache.two_tier_cache import TwoTierCache
+from app.infrastructure.llm.base import LLMProvider
+from app.infrastructure.llm.cache import CachedLLMProvider, make_cache_key
+
+
+class CountingProvider(LLMProvider):
+    """Provider answering from its call counter, so a cached answer is recognizable."""
+
+    def __init__(self, model: str = "model-a"):
+        self.model = model
+        self.calls = 0
+
+    def generate(self, prompt, system_prompt=None, **kwargs):
+        self.calls += 1
+        return f"{prompt} #{self.calls}"
+
+    def generate_json(self, prompt, system_prompt=None, **kwargs):
+        self.calls += 1
+        return {"prompt": prompt, "call": self.calls}
+
+    async def agenerate(self, prompt, system_prompt=None, **kwargs):
+        return self.generate(prompt, system_prompt, **kwargs)
+
+    async def agenerate_json(self, prompt, system_prompt=None, **kwargs):
+        return self.generate_json(prompt, system_prompt, **kwargs)
+
+    async def generate_stream(self, prompt, system_prompt=None, **kwargs):
+        self.calls += 1
+        for chunk in ("a", "b", "c"):
+            yield chunk
+
+
+def make_provider(provider=None) -> CachedLLMProvider:
+    cache = TwoTierCache(namespace="test_llm", default_ttl=60, persist=False)
+    return CachedLLMProvider(provider or CountingProvider(), cache, name="test")
+
+
+def test_identical_calls_are_answered_from_the_cache():
+    cached = make_provider()
+
+    assert cached.generate("hello", "system") == "hello #1"
+    assert cached.generate("hello", "system") == "hello #1"
+    assert cached.provider.calls == 1
+    assert cached.stats()["hits"] == 1
+    assert cached.stats()["misses"] == 1
+
+
+def test_prompt_system_prompt_and_parameters_are_part_of_the_key():
+    cached = make_provider()
+
+    cached.generate("hello", "system")
+    cached.generate("hello", "other system")
+    cached.generate("hello!", "system")
+    cached.generate("hello", "system", max_tokens=10)
+    assert cached.provider.calls == 4
+
+
+def test_text_and_json_calls_do_not_share_entries():
+    cached = make_provider()
+
+    assert cached.generate("hello") == "hello #1"
+    assert cached.generate_json("hello") == {"prompt": "hello", "call": 2}
+    assert cached.generate_json("hello") == {"prompt": "hello", "call": 2}
+
+
+def test_sampling_and_opt_out_bypass_the_cache():
+    cached = make_provider()
+
+    cached.generate("hello", temperature=0.7)
+    cached.generate("hello", temperature=0.7)
+    cached.generate("hello", use_cache=False)
+    cached.generate("hello", use_cache=False)
+    assert cached.provider.calls == 4
+    assert cached.stats()["bypassed"] == 4
+
+
+def test_model_is_part_of_the_key():
+    first, second = CountingProvider("model-a"), CountingProvider("model-b")
+    params = {"temperature": 0}
+
+    assert make_cache_key(first, "text", "hello", None, params) != make_cache_key(second, "text", "hello", None, params)
+    assert make_cache_key(first, "text", "hello", None, params) == make_cache_key(CountingProvider("model-a"), "text", "hello", None, params)
+
+
+def test_async_calls_share_the_cache_with_sync_calls():
+    cached = make_provider()
+    cached.generate_json("hello")
+
+    async def run():
+        return await cached.agenerate_json("hello"), await cached.agenerate("bye"), await cached.agenerate("bye")
+
+    assert asyncio.run(run()) == ({"prompt": "hello", "call": 1}, "bye #2", "bye #2")
+    assert cached.provider.calls == 2
+
+
+def test_complete_streams_are_cached_as_one_chunk():
+    cached = make_provider()
+
+    async def collect():
+        return [chunk async for chunk in cached.generate_stream("hello")]
+
+    assert asyncio.run(collect()) == ["a", "b", "c"]
+    assert asyncio.run(collect()) == ["abc"]
+    assert cached.provider.calls == 1
+
+
+def test_wrapped_provider_attributes_are_exposed():
+    cached = make_provider(CountingProvider("model-z"))
+
+    assert cached.model == "model-z"
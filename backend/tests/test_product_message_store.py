@@ -0,0 +1,109 @@
+"""
+Tests for background product messages (app.workflows.product_message_store) and their persistence.
+"""
+
+import asyncio
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.workflows.product_message_store import ProductMessageStore, product_message_store
+from app.workflows.shopping_workflow import ShoppingWorkflow
+
+
+def saved_responses():
+    with get_db() as conn:
+        return [tuple(row) for row in conn.execute("SELECT turn_id, assistant_response FROM conversations ORDER BY id")]
+
+
+def test_on_ready_is_called_with_the_polished_message():
+    store = ProductMessageStore()
+    received = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def generation():
+            await release.wait()
+            return "Polished"
+
+        store.start("s1", "t1", "Template", generation())
+        assert store.on_ready("s1", "t1", received.append)
+        assert received == []
+        release.set()
+        await store.wait("s1", "t1", timeout=5)
+        await store._entries["t1"]["task"]
+
+        # Already generated: called right away
+        assert store.on_ready("s1", "t1", received.append)
+
+    asyncio.run(run())
+    assert received == ["Polished", "Polished"]
+
+
+def test_on_ready_is_not_called_for_failed_or_unknown_turns():
+    store = ProductMessageStore()
+    received = []
+
+    async def run():
+        async def generation():
+            raise RuntimeError("LLM down")
+
+        store.start("s1", "t1", "Template", generation())
+        await store._entries["t1"]["task"]
+
+    asyncio.run(run())
+    assert not store.on_ready("s1", "t1", received.append)
+    assert not store.on_ready("s2", "t1", received.append)
+    assert not store.on_ready("s1", "unknown", received.append)
+    assert received == []
+
+
+def test_turns_being_generated_are_not_purged():
+    store = ProductMessageStore(max_entries=2, ttl=0)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def generation():
+            await release.wait()
+            return "Polished"
+
+        async def instant():
+            return "Done"
+
+        store.start("s1", "pending", "Template", generation())
+        store.start("s1", "ready", "Template", instant())
+        await store._entries["ready"]["task"]
+        store.start("s1", "new", "Template", instant())
+
+        # Expired and over capacity, but still being generated
+        assert store.get("s1", "pending")["status"] == "pending"
+        assert store.get("s1", "ready") is None
+        release.set()
+        return await store.wait("s1", "pending", timeout=5)
+
+    assert asyncio.run(run())["message"] == "Polished"
+    assert store.stats()["completed"] == 3
+
+
+def test_polished_message_replaces_the_saved_template(clean_db, monkeypatch):
+    monkeypatch.setattr(settings, "persistence_write_behind", False)
+    workflow = ShoppingWorkflow()
+    result = {"turn_id": "turn-1", "product_message": "Template", "product_message_pending": True}
+
+    async def run():
+        release = asyncio.Event()
+
+        async def generation():
+            await release.wait()
+            return "Polished"
+
+        product_message_store.start("s1", "turn-1", "Template", generation())
+        await asyncio.to_thread(workflow._save_result, "laptop", "s1", result)
+        assert saved_responses() == [("turn-1", "Template")]
+
+        release.set()
+        await product_message_store._entries["turn-1"]["task"]
+
+    asyncio.run(run())
+    assert saved_responses() == [("turn-1", "Polished")]
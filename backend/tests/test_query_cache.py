@@ -0,0 +1,86 @@
+"""
+Tests for the normalized-query cache (app.infrastructure.cache.query_cache).
+"""
+
+import pytest
+
+from app.infrastructure.cache.query_cache import ORDER_SENSITIVE, STOPWORDS, QueryCache, canonicalize_query
+from app.infrastructure.cache.two_tier_cache import TwoTierCache
+
+
+def make_cache() -> QueryCache:
+    return QueryCache(cache=TwoTierCache(namespace="test_query_cache", default_ttl=60, persist=False), ttl=60)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Laptop gaming sous 1500€", "laptop  gaming sous 1500 €"),
+    ("Écouteurs Sony", "ecouteurs sony"),
+    ("nike shoes", "shoes nike"),
+    ("je cherche un casque bluetooth", "casque bluetooth svp"),
+    ("laptop under 1,500.00 dollars", "laptop under $1500"),
+])
+def test_equivalent_messages_share_a_key(first, second):
+    assert canonicalize_query(first) == canonicalize_query(second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("coque pour iphone", "iphone avec coque"),
+    ("chargeur pour samsung", "samsung avec chargeur"),
+    ("case for iphone", "iphone with case"),
+    ("case for iphone", "iphone for case"),
+    ("laptop sous 1000", "laptop sans 1000"),
+    ("tv under 500", "tv over 500"),
+])
+def test_different_products_get_different_keys(first, second):
+    assert canonicalize_query(first) != canonicalize_query(second)
+
+
+def test_relational_words_keep_token_order():
+    assert canonicalize_query("coque pour iphone") == "coque pour iphone"
+    assert canonicalize_query("iphone avec coque") == "iphone avec coque"
+
+
+def test_relational_words_are_not_stopwords():
+    assert not STOPWORDS & ORDER_SENSITIVE
+
+
+def test_filler_only_message_has_empty_key():
+    assert canonicalize_query("je cherche svp") == ""
+
+
+def test_get_returns_cached_query_for_equivalent_message():
+    cache = make_cache()
+    structured_query = {"product_type": "laptop", "query_text": "laptop gaming", "max_price": 1500.0}
+    
+    assert cache.set("Laptop gaming sous 1500€", structured_query)
+    
+    cached = cache.get("laptop gaming sous 1500 €")
+    assert cached["product_type"] == "laptop"
+    assert cached["max_price"] == 1500.0
+    assert cache.get("coque pour iphone") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_accessory_query_is_not_served_to_its_device():
+    cache = make_cache()
+    cache.set("coque pour iphone", {"product_type": "phone case", "query_text": "coque iphone"})
+    
+    assert cache.get("iphone avec coque") is None
+
+
+def test_invalid_or_fallback_queries_are_rejected():
+    cache = make_cache()
+    
+    assert not cache.set("laptop", {"product_type": "", "query_text": "laptop"})
+    assert not cache.set("svp", {"product_type": "laptop", "query_text": "laptop"})
+    assert cache.stats()["rejected"] == 2
+
+
+def test_cached_value_is_a_copy():
+    cache = make_cache()
+    cache.set("robe rouge", {"product_type": "dress", "query_text": "robe rouge", "features": ["rouge"]})
+    
+    cache.get("robe rouge")["features"].append("longue")
+    
+    assert cache.get("robe rouge")["features"] == ["rouge"]
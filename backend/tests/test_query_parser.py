@@ -0,0 +1,59 @@
+"""
+Tests for the rule-based fast path (app.agents.query_parser).
+"""
+
+import pytest
+
+from app.agents.query_parser import RuleBasedQueryParser
+from app.core.config import settings
+
+
+@pytest.fixture
+def parser():
+    return RuleBasedQueryParser()
+
+
+@pytest.mark.parametrize("message, product_type", [
+    ("nike shoes under 100 dollars", "shoes"),
+    ("robe de soirée moins de 80€", "dress"),
+    ("iphone 15 occasion canada", "phone"),
+    ("laptop gaming sous 1500€", "laptop"),
+])
+def test_simple_queries_take_the_fast_path(parser, message, product_type):
+    structured_query, confidence = parser.parse(message)
+    
+    assert confidence >= settings.query_fast_path_threshold
+    assert structured_query["product_type"] == product_type
+
+
+@pytest.mark.parametrize("message", [
+    "coque iphone",
+    "phone case",
+    "housse pc portable",
+    "chargeur samsung galaxy",
+    "iphone 15 screen protector",
+    "laptop sleeve 15 pouces",
+])
+def test_accessory_queries_fall_back_to_the_llm(parser, message):
+    _, confidence = parser.parse(message)
+    
+    assert confidence < settings.query_fast_path_threshold
+
+
+def test_one_unknown_word_is_enough_to_fall_back(parser):
+    _, confidence = parser.parse("laptop zorglub")
+    
+    assert confidence < settings.query_fast_path_threshold
+
+
+def test_prices_are_extracted_in_euros(parser):
+    structured_query, _ = parser.parse("nike shoes under 100 dollars")
+    
+    assert structured_query["brand"] == "nike"
+    assert structured_query["max_price"] == pytest.approx(92.0)
+
+
+def test_message_without_product_has_zero_confidence(parser):
+    _, confidence = parser.parse("bonjour comment ça va")
+    
+    assert confidence == 0.0
@@ -0,0 +1,148 @@
+"""
+Tests for the SerperDev rate limiter (app.infrastructure.external_apis.rate_limiter).
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.infrastructure.external_apis.rate_limiter import (
+    BACKGROUND,
+    USER,
+    SerperRateLimiter,
+    SerperRateLimitError,
+    background_priority,
+    current_priority,
+)
+
+
+@pytest.fixture
+def limiter_settings(monkeypatch):
+    """Small bucket, no budget, no waiting: each test adjusts what it needs."""
+    monkeypatch.setattr(settings, "serper_rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "serper_requests_per_second", 0.001)
+    monkeypatch.setattr(settings, "serper_burst", 3)
+    monkeypatch.setattr(settings, "serper_max_wait", 0.0)
+    monkeypatch.setattr(settings, "serper_background_reserve", 0)
+    monkeypatch.setattr(settings, "serper_daily_credit_budget", 0)
+    monkeypatch.setattr(settings, "serper_budget_degrade_ratio", 0.9)
+    return monkeypatch
+
+
+def test_request_cost():
+    assert SerperRateLimiter.request_cost(10) == 1
+    assert SerperRateLimiter.request_cost(20) == 2
+
+
+def test_burst_then_refused(limiter_settings):
+    limiter = SerperRateLimiter()
+    for _ in range(3):
+        limiter.acquire()
+
+    with pytest.raises(SerperRateLimitError, match="rate limit reached"):
+        limiter.acquire()
+    assert limiter.granted[USER] == 3
+    assert limiter.rejected[USER] == 1
+
+
+def test_user_request_waits_for_a_token(limiter_settings):
+    limiter_settings.setattr(settings, "serper_requests_per_second", 50.0)
+    limiter_settings.setattr(settings, "serper_burst", 1)
+    limiter_settings.setattr(settings, "serper_max_wait", 1.0)
+    limiter = SerperRateLimiter()
+
+    limiter.acquire()
+    limiter.acquire()
+    assert limiter.waited == 1
+    assert limiter.wait_seconds > 0
+
+
+def test_background_requests_never_wait_and_leave_the_reserve(limiter_settings):
+    limiter_settings.setattr(settings, "serper_requests_per_second", 50.0)
+    limiter_settings.setattr(settings, "serper_max_wait", 1.0)
+    limiter_settings.setattr(settings, "serper_background_reserve", 2)
+    limiter = SerperRateLimiter()
+
+    limiter.acquire(priority=BACKGROUND)
+    with pytest.raises(SerperRateLimitError):
+        limiter.acquire(priority=BACKGROUND)
+    # The reserved tokens are still there for user searches
+    limiter.acquire(priority=USER)
+    limiter.acquire(priority=USER)
+    assert limiter.rejected == {USER: 0, BACKGROUND: 1}
+    assert limiter.waited == 0
+
+
+def test_daily_budget_is_enforced(limiter_settings):
+    limiter_settings.setattr(settings, "serper_daily_credit_budget", 3)
+    limiter = SerperRateLimiter()
+
+    limiter.acquire(cost=2)
+    with pytest.raises(SerperRateLimitError, match="budget exhausted"):
+        limiter.acquire(cost=2)
+    limiter.acquire(cost=1)
+    assert limiter.stats()["credits_remaining_today"] == 0
+
+
+def test_degrade_mode_pauses_background_requests_only(limiter_settings):
+    limiter_settings.setattr(settings, "serper_burst", 10)
+    limiter_settings.setattr(settings, "serper_daily_credit_budget", 10)
+    limiter_settings.setattr(settings, "serper_budget_degrade_ratio", 0.5)
+    limiter = SerperRateLimiter()
+
+    for _ in range(4):
+        limiter.acquire()
+    assert not limiter.degraded
+    limiter.acquire()
+    assert limiter.degraded
+
+    with pytest.raises(SerperRateLimitError, match="nearly spent"):
+        limiter.acquire(priority=BACKGROUND)
+    limiter.acquire(priority=USER)
+
+
+def test_disabled_limiter_only_counts_credits(limiter_settings):
+    limiter_settings.setattr(settings, "serper_rate_limit_enabled", False)
+    limiter = SerperRateLimiter()
+
+    for _ in range(10):
+        limiter.acquire()
+    assert limiter.granted[USER] == 10
+    assert limiter.stats()["credits_used_today"] == 10
+
+
+def test_throttled_response_empties_the_bucket(limiter_settings):
+    limiter = SerperRateLimiter()
+    limiter.record_throttled()
+
+    with pytest.raises(SerperRateLimitError):
+        limiter.acquire()
+    assert limiter.stats()["throttled_429"] == 1
+
+
+def test_async_acquire(limiter_settings):
+    limiter_settings.setattr(settings, "serper_requests_per_second", 50.0)
+    limiter_settings.setattr(settings, "serper_burst", 1)
+    limiter_settings.setattr(settings, "serper_max_wait", 1.0)
+    limiter = SerperRateLimiter()
+
+    async def acquire_twice():
+        await limiter.aacquire()
+        await limiter.aacquire()
+
+    asyncio.run(acquire_twice())
+    assert limiter.granted[USER] == 2
+    assert limiter.waited == 1
+
+
+def test_background_priority_follows_asyncio_tasks():
+    async def priority_in_task():
+        return await asyncio.create_task(asyncio.sleep(0, result=current_priority()))
+
+    async def run():
+        with background_priority():
+            inside = await asyncio.create_task(priority_in_task())
+        return inside, current_priority()
+
+    assert asyncio.run(run()) == (BACKGROUND, USER)
@@ -0,0 +1,138 @@
+"""
+Tests for the per-session result pool (app.workflows.result_pool).
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.models.schemas import Product
+from app.workflows import result_pool
+from app.workflows.result_pool import SessionResultPool
+
+
+def products(*indexes):
+    return [Product(name=f"Product {i}", link=f"https://shop.example/{i}") for i in indexes]
+
+
+def links(items):
+    return [product.link for product in items]
+
+
+@pytest.fixture(autouse=True)
+def pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "result_pool_page_size", 20)
+    monkeypatch.setattr(settings, "result_pool_max_depth", 50)
+    monkeypatch.setattr(settings, "result_pool_low_watermark", 10)
+    monkeypatch.setattr(type(result_pool.serper_rate_limiter), "degraded", property(lambda self: False))
+
+
+def test_take_returns_pooled_products_not_shown_yet():
+    pool = SessionResultPool()
+    pool.add("s1", "laptop", products(*range(30)), depth=30, excluded_links=links(products(*range(10))))
+
+    assert links(pool.take("s1", "laptop", excluded_links=[], count=5)) == links(products(10, 11, 12, 13, 14))
+    # Products shown since they were pooled are skipped
+    assert links(pool.take("s1", "laptop", excluded_links=links(products(15)), count=2)) == links(products(16, 17))
+    assert pool.stats()["hits"] == 2
+
+
+def test_pool_belongs_to_one_search():
+    pool = SessionResultPool()
+    pool.add("s1", "laptop", products(1, 2), depth=20, excluded_links=[])
+
+    assert pool.take("s1", "phone", excluded_links=[]) == []
+    assert pool.take("s2", "laptop", excluded_links=[]) == []
+    assert pool.stats()["misses"] == 2
+
+
+def test_prefetch_results_of_an_old_search_are_dropped():
+    pool = SessionResultPool()
+    pool.add("s1", "laptop", products(1), depth=20, excluded_links=[])
+    pool.add("s1", "phone", products(2), depth=20, excluded_links=[])
+
+    pool.add("s1", "laptop", products(3), depth=40, excluded_links=[], replace=False)
+    assert links(pool.take("s1", "phone", excluded_links=[])) == links(products(2))
+
+
+def test_claim_prefetch_asks_for_the_next_page_once():
+    pool = SessionResultPool()
+    pool.add("s1", "laptop", products(1, 2), depth=20, excluded_links=[])
+
+    assert pool.claim_prefetch("s1", "laptop") == 40
+    assert pool.claim_prefetch("s1", "laptop") is None  # Already refilling
+    pool._release("s1", "laptop")
+    pool.add("s1", "laptop", products(3), depth=40, excluded_links=[])
+    assert pool.claim_prefetch("s1", "laptop") == 50  # Capped at result_pool_max_depth
+
+
+def test_no_prefetch_when_enough_products_or_exhausted():
+    pool = SessionResultPool()
+    pool.add("s1", "laptop", products(*range(12)), depth=20, excluded_links=[])
+    assert pool.claim_prefetch("s1", "laptop") is None
+
+    pool.add("s2", "laptop", products(1), depth=20, excluded_links=[])
+    # A deeper page with nothing new: the search has no more results
+    pool.add("s2", "laptop", products(1), depth=40, excluded_links=[])
+    assert pool.claim_prefetch("s2", "laptop") is None
+
+
+def test_no_prefetch_in_degrade_mode(monkeypatch):
+    monkeypatch.setattr(type(result_pool.serper_rate_limiter), "degraded", property(lambda self: True))
+    pool = SessionResultPool()
+    pool.add("s1", "laptop", products(1), depth=20, excluded_links=[])
+
+    assert pool.claim_prefetch("s1", "laptop") is None
+
+
+def test_async_prefetch_refills_the_pool():
+    pool = SessionResultPool()
+    pool.add("s1", "laptop", products(1), depth=20, excluded_links=[])
+    requested = []
+
+    async def search(num_results):
+        requested.append(num_results)
+        return products(1, 2, 3)
+
+    async def run():
+        pool.prefetch("s1", "laptop", search, excluded_links=[])
+        await asyncio.gather(*pool._background_tasks)
+
+    asyncio.run(run())
+    assert requested == [40]
+    assert links(pool.take("s1", "laptop", excluded_links=[])) == links(products(1, 2, 3))
+    assert pool.stats()["prefetches_in_flight"] == 0
+
+
+def test_thread_prefetch_failure_releases_the_pool():
+    pool = SessionResultPool()
+    pool.add("s1", "laptop", products(1), depth=20, excluded_links=[])
+
+    def search(num_results):
+        raise RuntimeError("upstream down")
+
+    pool.prefetch_in_thread("s1", "laptop", search, excluded_links=[])
+    deadline = time.monotonic() + 5
+    while pool.stats()["prefetch_failures"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert pool.stats()["prefetch_failures"] == 1
+    deadline = time.monotonic() + 5
+    while pool.stats()["prefetches_in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.claim_prefetch("s1", "laptop") == 40
+
+
+def test_sessions_expire_and_are_capped():
+    pool = SessionResultPool(max_sessions=2, ttl=60)
+    for session_id in ("s1", "s2", "s3"):
+        pool.add(session_id, "laptop", products(1), depth=20, excluded_links=[])
+    assert pool.stats()["sessions"] == 2
+    assert pool.take("s1", "laptop", excluded_links=[]) == []
+
+    expiring = SessionResultPool(ttl=0)
+    expiring.add("s1", "laptop", products(1), depth=20, excluded_links=[])
+    time.sleep(0.01)
+    assert expiring.take("s1", "laptop", excluded_links=[]) == []
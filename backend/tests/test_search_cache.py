@@ -0,0 +1,138 @@
+"""
+Tests for the SerperDev search result cache (app.infrastructure.external_apis.search_cache).
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.infrastructure.cache.two_tier_cache import TwoTierCache
+from app.infrastructure.external_apis import search_cache
+from app.infrastructure.external_apis.rate_limiter import SerperRateLimitError
+from app.infrastructure.external_apis.search_cache import CachedSerperDevClient, make_search_key
+from app.models.schemas import Product
+
+
+class FakeSerperClient:
+    """SerperDevClient stand-in returning scripted results (products or exceptions), in order."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def _get_country_key(self, location):
+        return "fr"
+
+    def search_products(self, query, num_results=10, location=None):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def asearch_products(self, query, num_results=10, location=None):
+        return self.search_products(query, num_results, location)
+
+
+def products(*names):
+    return [Product(name=name, price="10,00 €", link=f"https://shop.example/{name}") for name in names]
+
+
+def make_client(*results) -> CachedSerperDevClient:
+    cache = TwoTierCache(namespace="test_search", default_ttl=60, persist=False)
+    return CachedSerperDevClient(FakeSerperClient(*results), cache)
+
+
+def names(result):
+    return [product.name for product in result]
+
+
+def test_miss_then_hit():
+    client = make_client(products("a", "b"))
+
+    assert names(client.search_products("laptop")) == ["a", "b"]
+    assert names(client.search_products("  Laptop ")) == ["a", "b"]
+    assert client.client.calls == 1
+    assert (client.misses, client.hits) == (1, 1)
+
+
+def test_cached_prices_keep_their_currency():
+    client = make_client(products("a"))
+    client.search_products("laptop")
+
+    cached = client.search_products("laptop")[0]
+    assert cached._record is not None
+    assert cached._record.currency == "EUR"
+
+
+def test_errors_are_cached_briefly():
+    client = make_client(Exception("boom"), products("a"))
+
+    for _ in range(2):
+        with pytest.raises(Exception, match="boom"):
+            client.search_products("laptop")
+    assert client.client.calls == 1
+    assert client.negative_hits == 1
+
+
+def test_rate_limit_refusals_are_not_cached():
+    client = make_client(SerperRateLimitError("refused"), products("a"))
+
+    with pytest.raises(SerperRateLimitError):
+        client.search_products("laptop")
+    assert names(client.search_products("laptop")) == ["a"]
+    assert client.client.calls == 2
+
+
+def test_refused_search_serves_the_expired_entry(monkeypatch):
+    monkeypatch.setattr(settings, "search_cache_ttl", 0.0)
+    monkeypatch.setattr(settings, "search_cache_stale_ttl", 0.0)
+    client = make_client(products("old"), SerperRateLimitError("refused"))
+
+    client.search_products("laptop")
+    assert client.cache.get_entry(make_search_key("laptop", "fr", 10)) is None
+
+    assert names(client.search_products("laptop")) == ["old"]
+    assert client.fallback_hits == 1
+    assert client.client.calls == 2
+
+
+def test_async_refused_search_serves_the_expired_entry(monkeypatch):
+    monkeypatch.setattr(settings, "search_cache_ttl", 0.0)
+    monkeypatch.setattr(settings, "search_cache_stale_ttl", 0.0)
+    client = make_client(products("old"), SerperRateLimitError("refused"))
+
+    async def run():
+        await client.asearch_products("laptop")
+        return await client.asearch_products("laptop")
+
+    assert names(asyncio.run(run())) == ["old"]
+    assert client.fallback_hits == 1
+
+
+def test_stale_entry_is_served_and_refreshed(monkeypatch):
+    monkeypatch.setattr(settings, "search_cache_ttl", 0.0)
+    client = make_client(products("old"), products("new"))
+
+    client.search_products("laptop")
+    assert names(client.search_products("laptop")) == ["old"]
+    assert client.stale_hits == 1
+
+    deadline = time.monotonic() + 5
+    while client._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.refreshes == 1
+    assert names(client.search_products("laptop")) == ["new"]
+
+
+def test_degrade_mode_skips_refreshes(monkeypatch):
+    monkeypatch.setattr(settings, "search_cache_ttl", 0.0)
+    monkeypatch.setattr(type(search_cache.serper_rate_limiter), "degraded", property(lambda self: True))
+    client = make_client(products("old"))
+
+    client.search_products("laptop")
+    assert names(client.search_products("laptop")) == ["old"]
+    assert client.refreshes_skipped == 1
+    assert client.client.calls == 1
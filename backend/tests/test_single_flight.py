@@ -0,0 +1,148 @@
+"""
+Tests for single-flight request coalescing (app.infrastructure.cache.single_flight).
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.infrastructure.cache.single_flight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def upstream():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("search", "laptop", upstream)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do("search", "laptop", upstream)))
+        for _ in range(4)
+    ]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["namespaces"]["search"] == {"upstream_calls": 1, "collapsed": 4}
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_waiting_thread():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def upstream():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("upstream failed")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("search", "laptop", upstream)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    for thread in (leader, follower):
+        thread.join(5)
+
+    assert errors == ["upstream failed", "upstream failed"]
+
+
+def test_completed_calls_are_not_reused():
+    flight = SingleFlight()
+    counter = iter(range(10))
+
+    assert flight.do("search", "laptop", lambda: next(counter)) == 0
+    assert flight.do("search", "laptop", lambda: next(counter)) == 1
+
+
+def test_keys_and_namespaces_are_separate():
+    flight = SingleFlight()
+
+    async def run():
+        async def upstream(value):
+            await asyncio.sleep(0.05)
+            return value
+
+        return await asyncio.gather(
+            flight.ado("search", "laptop", lambda: upstream(1)),
+            flight.ado("search", "phone", lambda: upstream(2)),
+            flight.ado("query", "laptop", lambda: upstream(3)),
+        )
+
+    assert asyncio.run(run()) == [1, 2, 3]
+    assert flight.stats()["collapsed"] == 0
+
+
+def test_concurrent_coroutines_share_one_task():
+    flight = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.ado("search", "laptop", upstream) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["namespaces"]["search"] == {"upstream_calls": 1, "collapsed": 4}
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def upstream():
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def run():
+        first = asyncio.create_task(flight.ado("search", "laptop", upstream))
+        second = asyncio.create_task(flight.ado("search", "laptop", upstream))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "result"
+
+
+def test_disabled_single_flight_calls_upstream_every_time(monkeypatch):
+    monkeypatch.setattr(settings, "single_flight_enabled", False)
+    flight = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(flight.ado("search", "laptop", upstream) for _ in range(3)))
+
+    asyncio.run(run())
+    assert len(calls) == 3
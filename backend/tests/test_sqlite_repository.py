@@ -0,0 +1,121 @@
+"""
+Tests for the SQLite repository (app.infrastructure.repositories.sqlite_repository).
+"""
+
+from app.core.database import get_db
+from app.infrastructure.repositories.sqlite_repository import SQLiteRepository
+from app.models.schemas import Product
+
+
+def product(index: int, price: str = "10,00 €") -> Product:
+    return Product(
+        name=f"Product {index}",
+        description=f"Description {index}",
+        price=price,
+        link=f"https://shop.example/{index}",
+        platform="shop.example"
+    )
+
+
+def product_ids():
+    with get_db() as conn:
+        return {row["link"]: row["id"] for row in conn.execute("SELECT id, link FROM products")}
+
+
+def test_upsert_counts_inserted_updated_unchanged(clean_db):
+    repository = SQLiteRepository()
+
+    assert repository.upsert_products([product(1), product(2), product(3)], "q") == {
+        "inserted": 3, "updated": 0, "unchanged": 0
+    }
+    ids = product_ids()
+
+    assert repository.upsert_products([product(1), product(2), product(3)], "q") == {
+        "inserted": 0, "updated": 0, "unchanged": 3
+    }
+    counts = repository.upsert_products([product(1, price="12,00 €"), product(2), product(4)], "q")
+    assert counts == {"inserted": 1, "updated": 1, "unchanged": 1}
+
+    # Known rows keep their id (no delete + reinsert)
+    new_ids = product_ids()
+    assert {link: new_ids[link] for link in ids} == ids
+    with get_db() as conn:
+        price = conn.execute("SELECT price FROM products WHERE link = ?", (product(1).link,)).fetchone()[0]
+    assert price == "12,00 €"
+
+
+def test_upsert_changed_search_query_is_an_update(clean_db):
+    repository = SQLiteRepository()
+    repository.upsert_products([product(1)], "first query")
+
+    assert repository.upsert_products([product(1)], "second query")["updated"] == 1
+
+
+def test_upsert_duplicate_links_last_one_wins(clean_db):
+    repository = SQLiteRepository()
+
+    counts = repository.upsert_products([product(1), product(1, price="99,00 €")], "q")
+    assert counts == {"inserted": 1, "updated": 0, "unchanged": 0}
+    with get_db() as conn:
+        assert conn.execute("SELECT price FROM products").fetchall()[0][0] == "99,00 €"
+
+
+def test_upsert_batches_larger_than_a_lookup_chunk(clean_db):
+    repository = SQLiteRepository()
+    count = SQLiteRepository.LOOKUP_CHUNK_SIZE * 2 + 7
+    batch = [product(i) for i in range(count)]
+
+    assert repository.upsert_products(batch, "q")["inserted"] == count
+    assert repository.upsert_products(batch, "q")["unchanged"] == count
+
+
+def test_cache_products_returns_the_number_cached(clean_db):
+    repository = SQLiteRepository()
+
+    assert repository.cache_products([product(1), product(2)], "q") == 2
+    assert repository.cache_products([product(1), product(3)], "q") == 2
+    assert repository.cache_products([], "q") == 0
+
+
+def test_save_search_results_links_products_in_rank_order(clean_db):
+    repository = SQLiteRepository()
+
+    search_id = repository.save_search_results("session-1", "laptop", [product(3), product(1), product(2)])
+
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT p.link, r.rank FROM search_results r JOIN products p ON p.id = r.product_id "
+            "WHERE r.search_id = ? ORDER BY r.rank",
+            (search_id,)
+        ).fetchall()
+        num_results = conn.execute("SELECT num_results FROM searches WHERE id = ?", (search_id,)).fetchone()[0]
+    assert [(row["link"], row["rank"]) for row in rows] == [
+        (product(3).link, 0), (product(1).link, 1), (product(2).link, 2)
+    ]
+    assert num_results == 3
+
+
+def test_session_products_lists_each_search_of_the_session(clean_db):
+    repository = SQLiteRepository()
+    repository.save_search_results("session-1", "laptop", [product(1), product(2)])
+    repository.save_search_results("session-1", "laptop gaming", [product(2)])
+    repository.save_search_results("session-2", "phone", [product(9)])
+
+    products = repository.get_session_products("session-1")
+
+    # Most recent search first; a product found twice is listed once per search
+    assert [(item["search_query"], item["link"], item["rank"]) for item in products] == [
+        ("laptop gaming", product(2).link, 0),
+        ("laptop", product(1).link, 0),
+        ("laptop", product(2).link, 1),
+    ]
+
+
+def test_deleting_a_search_removes_its_links(clean_db):
+    repository = SQLiteRepository()
+    search_id = repository.save_search_results("session-1", "laptop", [product(1)])
+
+    with get_db() as conn:
+        conn.execute("DELETE FROM searches WHERE id = ?", (search_id,))
+        assert conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 1
@@ -0,0 +1,94 @@
+"""
+Tests for the two-tier (memory LRU + SQLite) cache (app.infrastructure.cache.two_tier_cache).
+"""
+
+import asyncio
+import time
+
+from app.infrastructure.cache.two_tier_cache import TwoTierCache
+
+
+def test_set_then_get(clean_db):
+    cache = TwoTierCache(namespace="test", default_ttl=60)
+    cache.set("key", {"value": [1, 2]})
+
+    assert cache.get("key") == {"value": [1, 2]}
+    assert cache.get("missing") is None
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_survive_a_new_instance(clean_db):
+    TwoTierCache(namespace="test", default_ttl=60).set("key", "persisted")
+
+    cache = TwoTierCache(namespace="test", default_ttl=60)
+    assert cache.get("key") == "persisted"
+    assert cache.stats()["persisted_hits"] == 1
+    # Promoted to memory on the first read
+    assert cache.get("key") == "persisted"
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_namespaces_are_isolated(clean_db):
+    TwoTierCache(namespace="first", default_ttl=60).set("key", "first")
+
+    assert TwoTierCache(namespace="second", default_ttl=60).get("key") is None
+
+
+def test_expired_entries_are_misses_unless_allowed(clean_db):
+    cache = TwoTierCache(namespace="test", default_ttl=60)
+    cache.set("key", "old", ttl=0)
+
+    assert cache.get("key") is None
+    entry = cache.get_entry("key", allow_expired=True)
+    assert entry is not None and entry.value == "old" and entry.expired
+
+    # Also from SQLite
+    fresh_instance = TwoTierCache(namespace="test", default_ttl=60)
+    assert fresh_instance.get("key") is None
+    assert fresh_instance.get_entry("key", allow_expired=True).value == "old"
+
+
+def test_memory_tier_is_a_bounded_lru():
+    cache = TwoTierCache(namespace="test", default_ttl=60, max_memory_entries=2, persist=False)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    # "b" was the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cleanup_caps_persisted_rows(clean_db, monkeypatch):
+    monkeypatch.setattr(TwoTierCache, "CLEANUP_EVERY", 5)
+    cache = TwoTierCache(namespace="test", default_ttl=60, max_memory_entries=1, max_persisted_entries=3)
+    for index in range(5):
+        cache.set(f"key-{index}", index)
+        time.sleep(0.001)
+
+    fresh_instance = TwoTierCache(namespace="test", default_ttl=60)
+    assert [fresh_instance.get(f"key-{index}") for index in range(5)] == [None, None, 2, 3, 4]
+
+
+def test_delete_and_clear(clean_db):
+    cache = TwoTierCache(namespace="test", default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert TwoTierCache(namespace="test", default_ttl=60).get("b") is None
+
+
+def test_async_get_and_set(clean_db):
+    cache = TwoTierCache(namespace="test", default_ttl=60)
+
+    async def run():
+        await cache.aset("key", "value")
+        return await cache.aget("key"), await TwoTierCache(namespace="test", default_ttl=60).aget("key")
+
+    assert asyncio.run(run()) == ("value", "value")
@@ -0,0 +1,134 @@
+"""
+Tests for the write-behind persistence queue (app.infrastructure.repositories.write_behind).
+"""
+
+import threading
+
+import pytest
+
+from app.core.database import get_db
+from app.infrastructure.repositories.sqlite_repository import SQLiteRepository
+from app.infrastructure.repositories.write_behind import PersistenceWriter
+
+
+def search_queries():
+    with get_db() as conn:
+        return [row[0] for row in conn.execute("SELECT query_text FROM searches ORDER BY id")]
+
+
+class BlockingRepository(SQLiteRepository):
+    """Repository whose batched writes (conn passed by the writer) wait for `release`."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.batch_started = threading.Event()
+
+    def save_search(self, *args, conn=None, **kwargs):
+        if conn is not None:
+            self.batch_started.set()
+            self.release.wait(10)
+        return super().save_search(*args, conn=conn, **kwargs)
+
+
+def test_queued_writes_are_group_committed(clean_db):
+    writer = PersistenceWriter(flush_interval=0.2)
+    try:
+        for index in range(20):
+            writer.enqueue("save_search", session_id="s1", query_text=f"query {index}")
+        assert writer.flush(timeout=5)
+
+        assert search_queries() == [f"query {index}" for index in range(20)]
+        stats = writer.stats()
+        assert stats["committed"] == 20
+        assert stats["batches"] < 20
+        assert stats["pending"] == 0
+    finally:
+        writer.close(timeout=5)
+
+
+def test_batches_are_capped_at_max_batch(clean_db):
+    writer = PersistenceWriter(max_batch=3, flush_interval=0.2)
+    try:
+        for index in range(7):
+            writer.enqueue("save_search", session_id="s1", query_text=f"query {index}")
+        assert writer.flush(timeout=5)
+        assert writer.stats()["batches"] >= 3
+        assert len(search_queries()) == 7
+    finally:
+        writer.close(timeout=5)
+
+
+def test_one_bad_record_does_not_lose_the_batch(clean_db):
+    writer = PersistenceWriter(flush_interval=0.2)
+    try:
+        writer.enqueue("save_search", session_id="s1", query_text="good 1")
+        writer.enqueue("save_search", session_id="s1", query_text=None)  # NOT NULL violation
+        writer.enqueue("save_search", session_id="s1", query_text="good 2")
+        assert writer.flush(timeout=5)
+
+        assert search_queries() == ["good 1", "good 2"]
+        assert writer.stats()["failed"] == 1
+    finally:
+        writer.close(timeout=5)
+
+
+def test_full_queue_makes_the_caller_write_itself(clean_db):
+    repository = BlockingRepository()
+    writer = PersistenceWriter(repository=repository, max_queue=1, flush_interval=0, enqueue_timeout=0.05)
+    try:
+        writer.enqueue("save_search", session_id="s1", query_text="in batch")
+        repository.batch_started.wait(5)
+        writer.enqueue("save_search", session_id="s1", query_text="queued")
+        writer.enqueue("save_search", session_id="s1", query_text="overflow")
+
+        # Written synchronously while the writer is still blocked
+        assert search_queries() == ["overflow"]
+        assert writer.stats()["overflow_writes"] == 1
+        assert writer.stats()["backpressure_waits"] == 1
+    finally:
+        repository.release.set()
+        writer.close(timeout=5)
+    assert sorted(search_queries()) == ["in batch", "overflow", "queued"]
+
+
+def test_update_of_a_queued_row_is_not_written_ahead_of_it(clean_db):
+    repository = BlockingRepository()
+    writer = PersistenceWriter(repository=repository, max_queue=1, flush_interval=0, enqueue_timeout=0.05)
+    try:
+        writer.enqueue("save_search", session_id="s1", query_text="in batch")
+        repository.batch_started.wait(5)
+        writer.enqueue("save_conversation", session_id="s1", user_message="laptop",
+                       assistant_response="Template", turn_id="t1")
+
+        update = threading.Thread(target=lambda: writer.enqueue(
+            "update_assistant_response", turn_id="t1", assistant_response="Polished"
+        ))
+        update.start()
+        update.join(0.3)
+        assert update.is_alive()  # Waits for room instead of overtaking the insert
+    finally:
+        repository.release.set()
+        update.join(5)
+        writer.close(timeout=5)
+
+    with get_db() as conn:
+        assert conn.execute("SELECT assistant_response FROM conversations WHERE turn_id = 't1'").fetchone()[0] == "Polished"
+    assert writer.stats()["overflow_writes"] == 0
+
+
+def test_close_drains_the_queue_then_writes_synchronously(clean_db):
+    writer = PersistenceWriter(flush_interval=0.5)
+    writer.enqueue("save_search", session_id="s1", query_text="queued")
+
+    assert writer.close(timeout=5)
+    assert search_queries() == ["queued"]
+
+    writer.enqueue("save_search", session_id="s1", query_text="after close")
+    assert search_queries() == ["queued", "after close"]
+
+
+def test_only_repository_writes_can_be_queued():
+    writer = PersistenceWriter()
+
+    with pytest.raises(ValueError):
+        writer.enqueue("get_search_history", session_id="s1")